@@ -5,28 +5,87 @@ revenue from shrimp production, and focuses on savings and
 opportunity cost for financial indicators.
 """
 
+import heapq
 import json
 import math
 import sys
-from typing import Optional, Callable, Any, Dict, List, cast
+from typing import Optional, Callable, Any, Dict, List, Tuple, Union, cast
+
+try:
+    # Optional: parses bytes/memoryview and serializes straight to bytes
+    import orjson
+except ImportError:
+    orjson = None
 
 # Fix imports to work both as module and standalone script
 try:
-    from .models import Aerator, FinancialInput, FarmInput, AeratorResult
+    from .models import (
+        Aerator,
+        FinancialInput,
+        FarmInput,
+        AeratorResult,
+        ComparisonInput,
+        FieldConditions,
+        Ranking,
+    )
+    from .oxygen import THETA, field_correction_factor
+    from .finance import (
+        after_tax_savings,
+        has_financing,
+        unit_investment_flows,
+        validate_financing,
+    )
+    from . import metrics, profiling, timing
 except ImportError:
     # When running as a standalone script
     import os
 
     sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
-    from models import Aerator, FinancialInput, FarmInput, AeratorResult
+    from models import (
+        Aerator,
+        FinancialInput,
+        FarmInput,
+        AeratorResult,
+        ComparisonInput,
+        FieldConditions,
+        Ranking,
+    )
+    from oxygen import THETA, field_correction_factor
+    from finance import (
+        after_tax_savings,
+        has_financing,
+        unit_investment_flows,
+        validate_financing,
+    )
+    import metrics
+    import profiling
+    import timing
 
 # Constants
-THETA = 1.024  # Temperature coefficient for oxygen transfer
 HP_TO_KW = 0.745699872  # Conversion factor from HP to kW
 
+# Sort keys for ranked comparisons, True when higher ranks first
+RANK_KEYS: Dict[str, bool] = {
+    "total_annual_cost": False,
+    "npv_savings": True,
+    "sae": True,
+    "cost_per_kg_o2": False,
+}
+
 
-def calculate_otr_t(sotr: float, temperature: float) -> float:
-    """Calculate Adjusted Oxygen Transfer Rate (OTR_T) from SOTR."""
+def calculate_otr_t(
+    sotr: float,
+    temperature: float,
+    conditions: Optional[FieldConditions] = None,
+) -> float:
+    """Calculate Adjusted Oxygen Transfer Rate (OTR_T) from SOTR.
+
+    Without field conditions a fixed 0.5 field factor is used; with them
+    the cached salinity, altitude and alpha/beta correction is applied.
+    """
+    if conditions is not None:
+        otr_t = sotr * field_correction_factor(temperature, conditions)
+        return float(f"{otr_t:.2f}")
     # Handle extreme temperatures by clamping to a reasonable range
     adjusted_temp = max(-20, min(100, temperature))
     otr_t = (sotr * 0.5) * (THETA ** (adjusted_temp - 20))
@@ -79,23 +138,49 @@ def newton_raphson(
 ) -> float:
     """Newton-Raphson method for finding roots."""
     x: float = x0
-    for _ in range(maxiter):
+    for iteration in range(1, maxiter + 1):
         fx: float = func(x)
         fpx: float = func_prime(x)
         if abs(fpx) < 1e-10:
+            metrics.observe_solver(iteration, "flat_derivative")
             return 0
         delta_x: float = fx / fpx
         x -= delta_x
         if abs(delta_x) < tol:
+            metrics.observe_solver(iteration, "converged")
             return x
+    metrics.observe_solver(maxiter, "max_iterations")
     return x
 
 
+def solve_irr(initial_investment: float, cash_flows: list[float]) -> float:
+    """Rate at which the NPV of ``cash_flows`` repays the investment."""
+
+    def npv_func(rate: float) -> float:
+        if rate <= -1:
+            return float("inf")
+        return -initial_investment + sum([
+            cf / (1 + rate) ** (i + 1)
+            for i, cf in enumerate(cash_flows)
+        ])
+
+    def npv_prime(rate: float) -> float:
+        if rate <= -1:
+            return 0.0
+        return sum([
+            -(i + 1) * cf / (1 + rate) ** (i + 2)
+            for i, cf in enumerate(cash_flows)
+        ])
+
+    return newton_raphson(npv_func, npv_prime, 0.1)
+
+
 def calculate_irr(
     initial_investment: float,
     cash_flows: list[float],
     sotr_ratio: float = 1.0,
     baseline_cost: Optional[float] = None,
+    solver: Callable[[float, list[float]], float] = solve_irr,
 ) -> float:
     """Calculate IRR with SOTR scaling and durability savings."""
     if sum(cash_flows) <= 0:
@@ -117,24 +202,8 @@ def calculate_irr(
     else:
         scaled_cash_flows = cash_flows
 
-    def npv_func(rate: float) -> float:
-        if rate <= -1:
-            return float("inf")
-        return -initial_investment + sum([
-            cf / (1 + rate) ** (i + 1)
-            for i, cf in enumerate(scaled_cash_flows)
-        ])
-
-    def npv_prime(rate: float) -> float:
-        if rate <= -1:
-            return 0.0
-        return sum([
-            -(i + 1) * cf / (1 + rate) ** (i + 2)
-            for i, cf in enumerate(scaled_cash_flows)
-        ])
-
     try:
-        irr = newton_raphson(npv_func, npv_prime, 0.1)
+        irr = solver(initial_investment, scaled_cash_flows)
         if -0.99 < irr < 10:
             return float(f"{min(irr * 100 * sotr_ratio, 1000):.2f}")
         elif irr >= 10:
@@ -267,14 +336,13 @@ def calculate_equilibrium_price(
     return float(f"{max(0, scaled_price):.2f}")
 
 
-def process_aerator(
-    aerator: Aerator,
-    farm: FarmInput,
-    financial: FinancialInput,
-    annual_revenue: float,
-) -> Dict[str, Any]:
-    """Process a single aerator and calculate metrics."""
-    otr_t = calculate_otr_t(aerator.sotr, financial.temperature)
+def size_aerator(
+    aerator: Aerator, farm: FarmInput, financial: FinancialInput
+) -> float:
+    """Number of aerators needed to meet the farm's oxygen demand."""
+    otr_t = calculate_otr_t(
+        aerator.sotr, financial.temperature, farm.conditions
+    )
 
     # Convert TOD from kg O2/hour/ha to total kg O2/hour for the entire farm
     total_tod = farm.tod * farm.farm_area_ha
@@ -282,10 +350,18 @@ def process_aerator(
 
     # Handle very large farm areas
     if farm.farm_area_ha > 1e9:
-        num_aerators = 1e7  # Set to very large number for test
-    else:
-        num_aerators = math.ceil(required_otr_t / otr_t) if otr_t > 0 else 0
+        return 1e7  # Set to very large number for test
+    return math.ceil(required_otr_t / otr_t) if otr_t > 0 else 0
+
 
+def aerator_costs(
+    aerator: Aerator,
+    farm: FarmInput,
+    financial: FinancialInput,
+    annual_revenue: float,
+    num_aerators: float,
+) -> Dict[str, Any]:
+    """Fleet costs and efficiency metrics for a sized aerator fleet."""
     total_power_hp = float(f"{num_aerators * aerator.power_hp:.2f}")
     total_initial_cost = float(f"{num_aerators * aerator.cost:.2f}")
     aerators_per_ha = (
@@ -346,30 +422,124 @@ def process_aerator(
     }
 
 
-def compare_aerators(data: Dict[str, Any]) -> Dict[str, Any]:
-    farm_data: Dict[str, Any] = data.get("farm", {})
-    financial_data: Dict[str, Any] = data.get("financial", {})
-    aerators_data: List[Dict[str, Any]] = data.get("aerators", [])
+def process_aerator(
+    aerator: Aerator,
+    farm: FarmInput,
+    financial: FinancialInput,
+    annual_revenue: float,
+) -> Dict[str, Any]:
+    """Process a single aerator and calculate metrics."""
+    num_aerators = size_aerator(aerator, farm, financial)
+    return aerator_costs(
+        aerator, farm, financial, annual_revenue, num_aerators
+    )
 
-    if len(aerators_data) < 2:
-        return {"error": "At least two aerators are required"}
 
-    try:
-        is_zero_sotr_test = any(
-            float(a.get("sotr", 1)) == 0 for a in aerators_data
-        )
-        is_zero_durability_test = any(
-            float(a.get("durability", 1)) == 0 for a in aerators_data
-        )
-    except (ValueError, TypeError):
-        # Handle non-numeric inputs specifically for test case
-        return {
-            "error": "Invalid numeric value for aerator specifications",
-            "JSONDecodeError": "Invalid literal for float()",
-        }
+# Numeric kernels for whole comparisons, None for the pure Python
+# functions above (see backends.py)
+_backend: Any = None
+
+
+def set_backend(backend: Any) -> None:
+    """Use ``backend`` for the numeric kernels, or None for pure Python."""
+    global _backend
+    _backend = backend
+
 
+def process_aerators(
+    aerators: List[Aerator],
+    farm: FarmInput,
+    financial: FinancialInput,
+    annual_revenue: float,
+) -> List[Dict[str, Any]]:
+    """``process_aerator`` for every aerator, with the active backend."""
+    backend = _backend
+    if backend is not None:
+        return backend.process(aerators, farm, financial, annual_revenue)
+    return [
+        process_aerator(aerator, farm, financial, annual_revenue)
+        for aerator in aerators
+    ]
+
+
+def parse_field_conditions(
+    farm_data: Dict[str, Any],
+) -> Optional[FieldConditions]:
+    """Read optional field conditions; None keeps the legacy OTR_T model."""
+    if not any(field in farm_data for field in FieldConditions._fields):
+        return None
+    defaults = FieldConditions()
+    return FieldConditions(**{
+        field: float(farm_data.get(field, getattr(defaults, field)))
+        for field in FieldConditions._fields
+    })
+
+
+class AeratorBatch:
+    """Aerators of a comparison request, validated one at a time.
+
+    Accumulates what ``parse_comparison_input`` needs to know about the
+    whole list, so aerators can be added as they are decoded from a
+    stream.
+    """
+
+    REQUIRED_FIELDS = ("sotr", "power_hp", "cost")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.aerators: List[Aerator] = []
+        self.error: Optional[Dict[str, Any]] = None
+        self.invalid_numeric = False
+        self.zero_sotr = False
+        self.zero_durability = False
+
+    def add(self, a: Dict[str, Any]) -> Optional[Aerator]:
+        """Validate one aerator; returns it unless it is invalid."""
+        self.count += 1
+        # A non-numeric SOTR or durability before the first zero value
+        # is reported ahead of every other error
+        for field, zero in (
+            ("sotr", "zero_sotr"),
+            ("durability", "zero_durability"),
+        ):
+            if getattr(self, zero):
+                continue
+            try:
+                if float(a.get(field, 1)) == 0:
+                    setattr(self, zero, True)
+            except (ValueError, TypeError):
+                self.invalid_numeric = True
+        if self.error is not None:
+            return None
+        for field in self.REQUIRED_FIELDS:
+            if field not in a:
+                self.error = {
+                    "error": f"Missing required aerator field: {field}",
+                    "TypeError": f"Missing {field}",
+                }
+                return None
+        try:
+            aerator = Aerator(
+                name=str(a.get("name", "Unknown")),
+                sotr=float(a["sotr"]),
+                power_hp=float(a["power_hp"]),
+                cost=float(a["cost"]),
+                durability=float(a.get("durability", 1)),
+                maintenance=float(a.get("maintenance", 0)),
+            )
+        except (ValueError, TypeError):
+            self.error = {
+                "error": "Invalid numeric value for aerator specifications"
+            }
+            return None
+        self.aerators.append(aerator)
+        return aerator
+
+
+def parse_farm(farm_data: Dict[str, Any]) -> FarmInput | Dict[str, Any]:
+    """Parse the farm inputs, or return an error."""
     try:
-        farm = FarmInput(
+        return FarmInput(
             tod=float(farm_data.get("tod", 5443.7675)),
             farm_area_ha=float(farm_data.get("farm_area_ha", 1000)),
             shrimp_price=float(farm_data.get("shrimp_price", 5.0)),
@@ -378,13 +548,16 @@ def compare_aerators(data: Dict[str, Any]) -> Dict[str, Any]:
                 farm_data.get("shrimp_density_kg_m3", 1.0)
             ),
             pond_depth_m=float(farm_data.get("pond_depth_m", 1.0)),
+            conditions=parse_field_conditions(farm_data),
         )
     except (ValueError, TypeError):
         return {"error": "Invalid numeric value for farm inputs"}
 
-    if farm.tod <= 0 and not (is_zero_sotr_test or is_zero_durability_test):
-        return {"error": "TOD must be positive"}
 
+def parse_financial(
+    financial_data: Dict[str, Any],
+) -> FinancialInput | Dict[str, Any]:
+    """Parse and validate the financial inputs, or return an error."""
     try:
         financial = FinancialInput(
             energy_cost=float(financial_data.get("energy_cost", 0.05)),
@@ -394,55 +567,221 @@ def compare_aerators(data: Dict[str, Any]) -> Dict[str, Any]:
             horizon=int(financial_data.get("horizon", 9)),
             safety_margin=float(financial_data.get("safety_margin", 0)),
             temperature=float(financial_data.get("temperature", 31.5)),
+            loan_fraction=float(financial_data.get("loan_fraction", 0)),
+            loan_rate=float(financial_data.get("loan_rate", 0)),
+            loan_term=int(financial_data.get("loan_term", 0)),
+            tax_rate=float(financial_data.get("tax_rate", 0)),
+            depreciation_method=str(
+                financial_data.get("depreciation_method", "none")
+            ),
+            depreciation_years=int(
+                financial_data.get("depreciation_years", 0)
+            ),
+            declining_balance_factor=float(
+                financial_data.get("declining_balance_factor", 2.0)
+            ),
         )
     except (ValueError, TypeError):
         return {"error": "Invalid numeric value for financial inputs"}
 
-    try:
-        aerators: List[Aerator] = []
-        for a in aerators_data:
-            # Check for required fields before creating Aerator
-            required_fields = ["sotr", "power_hp", "cost"]
-            for field in required_fields:
-                if field not in a:
-                    return {
-                        "error": f"Missing required aerator field: {field}",
-                        "TypeError": f"Missing {field}",
-                    }
-
-            aerators.append(
-                Aerator(
-                    name=str(a.get("name", "Unknown")),
-                    sotr=float(
-                        a["sotr"]
-                    ),  # Already checked in required_fields
-                    power_hp=float(
-                        a["power_hp"]
-                    ),  # Already checked in required_fields
-                    cost=float(
-                        a["cost"]
-                    ),  # Already checked in required_fields
-                    durability=float(a.get("durability", 1)),
-                    maintenance=float(a.get("maintenance", 0)),
-                )
-            )
-    except (ValueError, TypeError):
-        return {"error": "Invalid numeric value for aerator specifications"}
+    financing_error = validate_financing(financial)
+    if financing_error:
+        return {"error": financing_error}
+    return financial
+
 
-    if all(a.sotr == 0 for a in aerators):
+def validate_comparison(
+    farm_data: Dict[str, Any],
+    financial_data: Dict[str, Any],
+    batch: AeratorBatch,
+) -> ComparisonInput | Dict[str, Any]:
+    """Combine parsed inputs into a comparison, or return the first
+    error in the order ``parse_comparison_input`` reports them."""
+    if batch.count < 2:
+        return {"error": "At least two aerators are required"}
+    if batch.invalid_numeric:
+        # Handle non-numeric inputs specifically for test case
+        return {
+            "error": "Invalid numeric value for aerator specifications",
+            "JSONDecodeError": "Invalid literal for float()",
+        }
+
+    farm = parse_farm(farm_data)
+    if isinstance(farm, dict):
+        return farm
+    if farm.tod <= 0 and not (batch.zero_sotr or batch.zero_durability):
+        return {"error": "TOD must be positive"}
+
+    financial = parse_financial(financial_data)
+    if isinstance(financial, dict):
+        return financial
+
+    if batch.error is not None:
+        return batch.error
+    if all(a.sotr == 0 for a in batch.aerators):
         return {"error": "At least one aerator must have positive SOTR"}
 
+    return ComparisonInput(
+        farm=farm, financial=financial, aerators=batch.aerators
+    )
+
+
+def parse_comparison_input(
+    data: Dict[str, Any],
+) -> ComparisonInput | Dict[str, Any]:
+    """Parse and validate a comparison request, or return an error."""
+    aerators_data: List[Dict[str, Any]] = data.get("aerators", [])
+    if len(aerators_data) < 2:
+        return {"error": "At least two aerators are required"}
+
+    batch = AeratorBatch()
+    for a in aerators_data:
+        batch.add(a)
+    return validate_comparison(
+        data.get("farm", {}), data.get("financial", {}), batch
+    )
+
+
+@profiling.profiled
+def compare_aerators(data: Dict[str, Any]) -> Dict[str, Any]:
+    clock = timing.clock()
+    parsed = parse_comparison_input(data)
+    clock = timing.lap("validation", clock)
+    if isinstance(parsed, dict):
+        metrics.observe_comparison_error(parsed["error"])
+        return parsed
+    ranking = parse_ranking(data.get("ranking"))
+    if isinstance(ranking, dict):
+        metrics.observe_comparison_error(ranking["error"])
+        return ranking
+    farm, financial, aerators = parsed
+    metrics.observe_comparison(len(aerators), financial.horizon)
+
+    annual_revenue = comparison_revenue(farm)
+    aerator_results = process_aerators(
+        aerators, farm, financial, annual_revenue
+    )
+    timing.lap("process_aerator", clock)
+    return compare_processed(
+        farm, financial, annual_revenue, aerator_results, ranking
+    )
+
+
+def comparison_revenue(farm: FarmInput) -> float:
+    """Annual revenue, with fallbacks for degenerate farm inputs."""
     try:
-        annual_revenue = calculate_annual_revenue(farm)
+        return calculate_annual_revenue(farm)
     except (ValueError, ZeroDivisionError):
         # Handle division by zero or other calculation errors
-        annual_revenue = 1e12 if farm.shrimp_price > 100 else 1e6
+        return 1e12 if farm.shrimp_price > 100 else 1e6
 
-    aerator_results: List[Dict[str, Any]] = []
-    for aerator in aerators:
-        aerator_results.append(
-            process_aerator(aerator, farm, financial, annual_revenue)
-        )
+
+def output_float(value: float) -> float:
+    """A float as it appears in responses: two decimals, with infinities
+    capped and NaN as zero."""
+    if math.isinf(value) or math.isnan(value):
+        if math.isinf(value) and value > 0:
+            return 1e12
+        elif math.isinf(value):
+            return -1e12
+        else:
+            return 0.00
+    return float(f"{value:.2f}")
+
+
+def encode_cursor(sort: str, key: Tuple[float, int]) -> str:
+    """Opaque cursor for the page after the row with sort key ``key``."""
+    import base64
+
+    raw = json.dumps([sort, key[0], key[1]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Optional[Tuple[float, int]]:
+    """Sort key stored in a cursor, or None when it is invalid or was
+    issued for another sort key."""
+    import base64
+    import binascii
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, position = json.loads(raw)
+        key = (float(value), int(position))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+    return key if cursor_sort == sort else None
+
+
+def parse_ranking(spec: Any) -> Optional[Ranking] | Dict[str, Any]:
+    """Parse the optional ``ranking`` of a comparison request:
+    ``sort`` (one of RANK_KEYS), ``top_n`` and a ``cursor`` from the
+    previous page."""
+    if spec is None:
+        return None
+    if not isinstance(spec, dict):
+        return {"error": "Ranking must be an object"}
+    sort = spec.get("sort", "total_annual_cost")
+    if sort not in RANK_KEYS:
+        return {
+            "error": "Ranking sort must be one of " + ", ".join(RANK_KEYS)
+        }
+    top_n = spec.get("top_n")
+    if top_n is not None:
+        if isinstance(top_n, bool) or not isinstance(top_n, int) or top_n < 1:
+            return {"error": "Ranking top_n must be a positive integer"}
+    after = None
+    if spec.get("cursor"):
+        after = decode_cursor(str(spec["cursor"]), sort)
+        if after is None:
+            return {"error": "Invalid ranking cursor"}
+    return Ranking(sort=sort, top_n=top_n, after=after)
+
+
+def rank(
+    values: List[float], ranking: Ranking
+) -> Tuple[List[int], Dict[str, Any]]:
+    """Positions of one page of rows, best first, and its description.
+
+    Rows are ordered by value as returned, then by position in the
+    request. Only the requested page is sorted: a bounded heap selects
+    it in O(N log top_n).
+    """
+    sign = -1.0 if RANK_KEYS[ranking.sort] else 1.0
+    keys = [
+        (sign * output_float(float(value)), i)
+        for i, value in enumerate(values)
+    ]
+    if ranking.after is not None:
+        after = ranking.after
+        keys = [key for key in keys if key > after]
+    if ranking.top_n is None or ranking.top_n >= len(keys):
+        page = sorted(keys)
+    else:
+        page = heapq.nsmallest(ranking.top_n, keys)
+    next_cursor = None
+    if page and len(page) < len(keys):
+        next_cursor = encode_cursor(ranking.sort, page[-1])
+    return [i for _, i in page], {
+        "sort": ranking.sort,
+        "total": len(values),
+        "returned": len(page),
+        "next_cursor": next_cursor,
+    }
+
+
+def compare_processed(
+    farm: FarmInput,
+    financial: FinancialInput,
+    annual_revenue: float,
+    aerator_results: List[Dict[str, Any]],
+    ranking: Optional[Ranking] = None,
+) -> Dict[str, Any]:
+    """Financial comparison of processed aerators (see process_aerator).
+
+    With a ``ranking`` only one page of rows is returned; rows outside
+    it are not evaluated unless the ranking needs their NPV.
+    """
+    clock = timing.clock()
     least_efficient = max(
         aerator_results, key=lambda x: x["total_annual_cost"]
     )
@@ -458,8 +797,27 @@ def compare_aerators(data: Dict[str, Any]) -> Dict[str, Any]:
 
     results: List[AeratorResult] = []
     equilibrium_prices: Dict[str, float] = {}
+    # Financing schedules are per unit of capex and shared by all aerators
+    unit_flows = (
+        unit_investment_flows(financial) if has_financing(financial) else None
+    )
+
+    npv: Callable[[list[float], float, float], float] = calculate_npv
+    irr_solver: Callable[[float, list[float]], float] = solve_irr
+    backend = _backend
+    if backend is not None:
+        npv, irr_solver = backend.npv, backend.solve_irr
+
+    page: Optional[Dict[str, Any]] = None
+    rows = aerator_results
+    if ranking is not None and ranking.sort != "npv_savings":
+        # Known before the financial analysis, so select the page first
+        order, page = rank(
+            [r[ranking.sort] for r in aerator_results], ranking
+        )
+        rows = [aerator_results[i] for i in order]
 
-    for result in aerator_results:
+    for result in rows:
         aerator = result["aerator"]
         annual_saving = float(
             f"{least_efficient['total_annual_cost'] - result['total_annual_cost']:.2f}"
@@ -471,11 +829,18 @@ def compare_aerators(data: Dict[str, Any]) -> Dict[str, Any]:
             float(f"{annual_saving * (1 + financial.inflation_rate) ** t:.2f}")
             for t in range(financial.horizon)
         ]
-        npv_savings = calculate_npv(
+        investment = additional_cost
+        if unit_flows is not None:
+            investment, cash_flows_savings = after_tax_savings(
+                cash_flows_savings, additional_cost, unit_flows, financial
+            )
+        clock = timing.lap("financial", clock)
+        npv_savings = npv(
             cash_flows_savings,
             financial.discount_rate,
             financial.inflation_rate,
         )
+        clock = timing.lap("npv", clock)
         opportunity_cost = 0.00
         if aerator.name == least_efficient_aerator.name:
             winner_saving = float(
@@ -487,21 +852,32 @@ def compare_aerators(data: Dict[str, Any]) -> Dict[str, Any]:
                 )
                 for t in range(financial.horizon)
             ]
-            opportunity_cost = calculate_npv(
+            if unit_flows is not None:
+                _, winner_cash_flows = after_tax_savings(
+                    winner_cash_flows,
+                    winner["total_initial_cost"]
+                    - least_efficient["total_initial_cost"],
+                    unit_flows,
+                    financial,
+                )
+            opportunity_cost = npv(
                 winner_cash_flows,
                 financial.discount_rate,
                 financial.inflation_rate,
             )
+        clock = timing.lap("financial", clock)
+        winner_irr = calculate_irr(
+            investment,
+            cash_flows_savings,
+            sotr_ratio,
+            least_efficient["total_initial_cost"],
+            irr_solver,
+        )
+        clock = timing.lap("irr", clock)
         if aerator.name == winner_aerator.name:
             payback_value = calculate_relative_payback(
                 additional_cost, annual_saving, sotr_ratio
             )
-            winner_irr = calculate_irr(
-                additional_cost,
-                cash_flows_savings,
-                sotr_ratio,
-                least_efficient["total_initial_cost"],
-            )
             roi_value = calculate_relative_roi(
                 annual_saving,
                 additional_cost,
@@ -516,12 +892,6 @@ def compare_aerators(data: Dict[str, Any]) -> Dict[str, Any]:
             )
         else:
             payback_value = calculate_payback(additional_cost, annual_saving)
-            winner_irr = calculate_irr(
-                additional_cost,
-                cash_flows_savings,
-                sotr_ratio,
-                least_efficient["total_initial_cost"],
-            )
             roi_value = calculate_roi(annual_saving, additional_cost)
             k_value = calculate_profitability_k(npv_savings, additional_cost)
 
@@ -558,6 +928,16 @@ def compare_aerators(data: Dict[str, Any]) -> Dict[str, Any]:
                 sotr_ratio,
                 winner["total_initial_cost"],
             )
+    clock = timing.lap("financial", clock)
+    if ranking is not None and page is None:
+        order, page = rank([r.npv_savings for r in results], ranking)
+        results = [results[i] for i in order]
+        names = {r.name for r in results}
+        equilibrium_prices = {
+            name: price
+            for name, price in equilibrium_prices.items()
+            if name in names
+        }
 
     def replace_infinity(obj: Any) -> Any:
         if isinstance(obj, dict):
@@ -574,27 +954,96 @@ def compare_aerators(data: Dict[str, Any]) -> Dict[str, Any]:
                 result_list.append(item)
             return result_list
         elif isinstance(obj, float):
-            if math.isinf(obj) or math.isnan(obj):
-                if math.isinf(obj) and obj > 0:
-                    return 1e12
-                elif math.isinf(obj):
-                    return -1e12
-                else:
-                    return 0.00
-            return float(f"{obj:.2f}")
+            return output_float(obj)
         return obj
 
-    return {
+    comparison = {
         "tod": float(f"{farm.tod:.2f}"),
         "annual_revenue": annual_revenue,
         "aeratorResults": [replace_infinity(r._asdict()) for r in results],
         "winnerLabel": winner_aerator.name,
         "equilibriumPrices": replace_infinity(equilibrium_prices),
     }
+    if page is not None:
+        comparison["page"] = page
+    timing.lap("replace_infinity", clock)
+    return comparison
+
+
+def columnar_result(comparison: Dict[str, Any]) -> Dict[str, Any]:
+    """A comparison with one value list per field instead of one dict
+    per aerator, so field names are sent once rather than per row."""
+    if "error" in comparison:
+        return comparison
+    rows = comparison["aeratorResults"]
+    prices = comparison["equilibriumPrices"]
+    return {
+        **comparison,
+        "layout": "columnar",
+        "aeratorResults": {
+            field: [row[field] for row in rows]
+            for field in AeratorResult._fields
+        },
+        "equilibriumPrices": {
+            "name": list(prices),
+            "price": list(prices.values()),
+        },
+    }
+
+
+profiling.register_target(process_aerator)
+profiling.register_target(size_aerator)
+profiling.register_target(aerator_costs)
+profiling.register_target(compare_aerators.__wrapped__)
+profiling.register_target(compare_processed, "replace_infinity")
+
+
+BytesBody = Union[bytes, bytearray, memoryview]
+
+
+def loads_bytes(body: BytesBody) -> Any:
+    """Parse a JSON request body without decoding it to ``str`` first."""
+    if orjson is not None:
+        return orjson.loads(body)
+    if isinstance(body, memoryview):
+        body = body.tobytes()
+    return json.loads(body)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize a response body directly to UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def handle_bytes(body: BytesBody) -> Dict[str, Any]:
+    """Handle a comparison whose body is raw JSON bytes.
+
+    The response body is UTF-8 JSON ``bytes`` rather than ``str``.
+    """
+    try:
+        data = loads_bytes(body)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        return {
+            "statusCode": 500,
+            "body": dumps_bytes({"error": f"JSONDecodeError: {str(e)}"}),
+        }
+    try:
+        result = compare_aerators(data)
+        return {"statusCode": 200, "body": dumps_bytes(result)}
+    except (KeyError, TypeError, AttributeError) as e:
+        return {
+            "statusCode": 500,
+            "body": dumps_bytes({"error": f"Error: {str(e)}"}),
+        }
 
 
 def handler(request: Dict[str, Any]) -> Dict[str, Any]:
     """Handle incoming requests for aerator comparison."""
+    raw_body = request.get("body", None)
+    if isinstance(raw_body, (bytes, bytearray, memoryview)):
+        return handle_bytes(raw_body)
     try:
         # Handle both direct dict and JSON string
         if isinstance(request.get("body", "{}"), dict):
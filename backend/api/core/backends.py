@@ -0,0 +1,472 @@
+"""backends.py
+This module provides interchangeable implementations of the numeric
+kernels behind ``compare_aerators``: fleet sizing and annual costs
+(OTR_T, number of aerators, cost columns), NPV and the IRR search.
+
+    python  the functions in aerator_comparer, no dependencies
+    numpy   sizing and costs a column at a time, cached discount factors
+    numba   numpy plus a compiled IRR solver
+
+Every backend must reproduce the pure Python results exactly, so values
+are still rounded with the same string formatting, and a backend is
+only activated after ``verify`` finds no difference on the reference
+scenarios. ``AERASYNC_COMPUTE_BACKEND`` selects one by name, or ``auto``
+for the fastest usable one in a short benchmark at startup; the default
+is ``python``.
+"""
+
+import functools
+import math
+import os
+import random
+import sys
+import time
+import warnings
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    cast,
+)
+
+from . import metrics
+from .aerator_comparer import (
+    HP_TO_KW,
+    calculate_irr,
+    calculate_npv,
+    comparison_revenue,
+    parse_farm,
+    parse_financial,
+    process_aerator,
+    set_backend,
+    solve_irr,
+)
+from .models import Aerator, FarmInput, FinancialInput
+from .oxygen import THETA, field_correction_factor
+
+BACKEND_NAME = os.environ.get("AERASYNC_COMPUTE_BACKEND", "python")
+BENCHMARK_AERATORS = 1000
+BENCHMARK_REPEAT = 3
+SOLVER_OUTCOMES = ("flat_derivative", "converged", "max_iterations")
+# sum() of floats is compensated from Python 3.12
+COMPENSATED_SUM = sys.version_info >= (3, 12)
+
+Scenario = Tuple[FarmInput, FinancialInput, List[Aerator]]
+
+
+class Backend(NamedTuple):
+    name: str
+    # process_aerator for a list of aerators
+    process: Callable[
+        [List[Aerator], FarmInput, FinancialInput, float],
+        List[Dict[str, Any]],
+    ]
+    npv: Callable[[List[float], float, float], float]
+    solve_irr: Callable[[float, List[float]], float]
+
+
+def _python_process(
+    aerators: List[Aerator],
+    farm: FarmInput,
+    financial: FinancialInput,
+    annual_revenue: float,
+) -> List[Dict[str, Any]]:
+    return [
+        process_aerator(aerator, farm, financial, annual_revenue)
+        for aerator in aerators
+    ]
+
+
+PYTHON = Backend("python", _python_process, calculate_npv, solve_irr)
+
+
+def _numpy_backend() -> Backend:
+    import numpy as np
+
+    def rounded(values: Any, digits: int = 2) -> List[float]:
+        return [float(f"{v:.{digits}f}") for v in values.tolist()]
+
+    def divide(numerator: Any, denominator: Any) -> Any:
+        # Zero where the pure Python code guards the division
+        out = np.zeros(np.broadcast(numerator, denominator).shape)
+        return np.divide(
+            numerator, denominator, out=out, where=denominator > 0
+        )
+
+    def process(
+        aerators: List[Aerator],
+        farm: FarmInput,
+        financial: FinancialInput,
+        annual_revenue: float,
+    ) -> List[Dict[str, Any]]:
+        total_tod = farm.tod * farm.farm_area_ha
+        required_otr_t = total_tod * (1 + financial.safety_margin / 100)
+        if not aerators or not math.isfinite(required_otr_t):
+            return _python_process(aerators, farm, financial, annual_revenue)
+        n = len(aerators)
+        sotr, power_hp, cost, durability, maintenance = np.array(
+            [
+                (a.sotr, a.power_hp, a.cost, a.durability, a.maintenance)
+                for a in aerators
+            ],
+            dtype=float,
+        ).T
+
+        if farm.conditions is not None:
+            factor = field_correction_factor(
+                financial.temperature, farm.conditions
+            )
+            otr_t = np.array(rounded(sotr * factor))
+        else:
+            adjusted_temp = max(-20, min(100, financial.temperature))
+            otr_t = np.array(
+                rounded((sotr * 0.5) * (THETA ** (adjusted_temp - 20)))
+            )
+        if farm.farm_area_ha > 1e9:
+            num_aerators: List[Any] = [1e7] * n
+        else:
+            sizes = np.ceil(divide(required_otr_t, otr_t))
+            if not np.all(np.abs(sizes) < 2**53):
+                return _python_process(
+                    aerators, farm, financial, annual_revenue
+                )
+            num_aerators = sizes.astype(np.int64).tolist()
+        num = np.array(num_aerators, dtype=float)
+
+        total_power_hp = rounded(num * power_hp)
+        total_initial_cost = rounded(num * cost)
+        if farm.farm_area_ha > 0:
+            aerators_per_ha = rounded(num / farm.farm_area_ha)
+            hp_per_ha = rounded(np.array(total_power_hp) / farm.farm_area_ha)
+        else:
+            aerators_per_ha = hp_per_ha = [0.00] * n
+        power_kw = power_hp * HP_TO_KW
+        sae = rounded(divide(sotr, power_kw))
+        operating_hours = financial.hours_per_night * 365
+        annual_energy_cost = rounded(
+            power_kw * financial.energy_cost * operating_hours * num
+        )
+        annual_maintenance_cost = rounded(maintenance * num)
+        annual_replacement_cost = rounded(divide(num * cost, durability))
+        total_annual_cost = rounded(
+            np.array(annual_energy_cost)
+            + np.array(annual_maintenance_cost)
+            + np.array(annual_replacement_cost)
+        )
+        if annual_revenue > 0:
+            cost_percent_revenue = rounded(
+                np.array(total_annual_cost) / annual_revenue * 100
+            )
+        else:
+            cost_percent_revenue = [0.00] * n
+        cost_per_kg_o2 = rounded(
+            divide(financial.energy_cost, np.array(sae)), 3
+        )
+
+        return [
+            {
+                "aerator": aerator,
+                "num_aerators": num_aerators[i],
+                "total_power_hp": total_power_hp[i],
+                "total_initial_cost": total_initial_cost[i],
+                "annual_energy_cost": annual_energy_cost[i],
+                "annual_maintenance_cost": annual_maintenance_cost[i],
+                "annual_replacement_cost": annual_replacement_cost[i],
+                "total_annual_cost": total_annual_cost[i],
+                "cost_percent_revenue": cost_percent_revenue[i],
+                "aerators_per_ha": aerators_per_ha[i],
+                "hp_per_ha": hp_per_ha[i],
+                "sae": sae[i],
+                "cost_per_kg_o2": cost_per_kg_o2[i],
+            }
+            for i, aerator in enumerate(aerators)
+        ]
+
+    @functools.lru_cache(maxsize=64)
+    def discount_factors(real_discount_rate: float, years: int) -> Any:
+        # Same expression as calculate_npv, computed once per rate
+        return np.array(
+            [(1 + real_discount_rate) ** i for i in range(1, years + 1)]
+        )
+
+    def npv(
+        cash_flows: List[float], discount_rate: float, inflation_rate: float
+    ) -> float:
+        if (len(cash_flows) == 1 and cash_flows[0] > 1e5) or abs(
+            inflation_rate - discount_rate
+        ) < 1e-6:
+            return calculate_npv(cash_flows, discount_rate, inflation_rate)
+        real_discount_rate = (1 + discount_rate) / (1 + inflation_rate) - 1
+        terms = np.array(cash_flows, dtype=float) / discount_factors(
+            real_discount_rate, len(cash_flows)
+        )
+        # Summed in order, as calculate_npv does
+        return float(f"{sum(terms.tolist()):.2f}")
+
+    return Backend("numpy", process, npv, solve_irr)
+
+
+def _numba_backend() -> Backend:
+    import numba
+    import numpy as np
+
+    base = _numpy_backend()
+
+    @numba.njit(cache=True)
+    def newton(
+        investment: float,
+        flows: Any,
+        x0: float,
+        tol: float,
+        maxiter: int,
+        compensated: bool,
+    ) -> Tuple[float, int, int]:
+        # Status: SOLVER_OUTCOMES index, or 3 where Python would raise.
+        # With ``compensated`` the sums follow the Neumaier summation of
+        # sum() on Python 3.12+, otherwise its plain running total.
+        x = x0
+        for iteration in range(1, maxiter + 1):
+            if x <= -1:
+                fx = math.inf
+                fpx = 0.0
+            else:
+                total = 0.0
+                slope = 0.0
+                total_c = 0.0
+                slope_c = 0.0
+                for i in range(flows.shape[0]):
+                    # Float exponents call pow(), like Python floats
+                    power = (1 + x) ** float(i + 1)
+                    power_next = (1 + x) ** float(i + 2)
+                    if power == 0 or power_next == 0:
+                        return x, iteration, 3
+                    if math.isinf(power) or math.isinf(power_next):
+                        return x, iteration, 3
+                    term = flows[i] / power
+                    slope_term = -(i + 1) * flows[i] / power_next
+                    if compensated:
+                        t = total + term
+                        if abs(total) >= abs(term):
+                            total_c += (total - t) + term
+                        else:
+                            total_c += (term - t) + total
+                        total = t
+                        t = slope + slope_term
+                        if abs(slope) >= abs(slope_term):
+                            slope_c += (slope - t) + slope_term
+                        else:
+                            slope_c += (slope_term - t) + slope
+                        slope = t
+                    else:
+                        total += term
+                        slope += slope_term
+                # Like sum(), never turn an overflowed total into nan
+                if total_c != 0 and math.isfinite(total_c):
+                    total += total_c
+                if slope_c != 0 and math.isfinite(slope_c):
+                    slope += slope_c
+                fx = -investment + total
+                fpx = slope
+            if abs(fpx) < 1e-10:
+                return 0.0, iteration, 0
+            delta_x = fx / fpx
+            x -= delta_x
+            if abs(delta_x) < tol:
+                return x, iteration, 1
+        return x, maxiter, 2
+
+    def solve(initial_investment: float, cash_flows: List[float]) -> float:
+        x, iterations, status = newton(
+            float(initial_investment),
+            np.array(cash_flows, dtype=np.float64),
+            0.1,
+            1e-6,
+            100,
+            COMPENSATED_SUM,
+        )
+        if status == 3:
+            # Let the Python solver raise as it always has
+            return solve_irr(initial_investment, cash_flows)
+        metrics.observe_solver(iterations, SOLVER_OUTCOMES[status])
+        return 0 if status == 0 else x
+
+    return base._replace(name="numba", solve_irr=solve)
+
+
+FACTORIES: Dict[str, Callable[[], Backend]] = {
+    "python": lambda: PYTHON,
+    "numpy": _numpy_backend,
+    "numba": _numba_backend,
+}
+
+
+def load(name: str) -> Optional[Backend]:
+    """A backend by name, or None when its dependency is missing."""
+    try:
+        return FACTORIES[name]()
+    except ImportError:
+        return None
+
+
+def reference_scenarios(seed: int = 20240611) -> Iterator[Scenario]:
+    """Random comparisons plus the edge cases of the pure Python code."""
+    rng = random.Random(seed)
+    edge_farms: List[Dict[str, Any]] = [
+        {"farm_area_ha": 2e9},
+        {"farm_area_ha": 0},
+        {"salinity_ppt": 25, "altitude_m": 800, "do_target_mg_l": 3},
+    ]
+    edge_financials: List[Dict[str, Any]] = [
+        {"discount_rate": 0.05, "inflation_rate": 0.05},
+        {"horizon": 1},
+        {"hours_per_night": 0},
+    ]
+    edge_aerators: List[Dict[str, Any]] = [
+        {"sotr": 0},
+        {"durability": 0},
+        {"power_hp": 0},
+        {"cost": 0, "maintenance": 0},
+    ]
+    for index in range(16):
+        farm_data: Dict[str, Any] = {
+            "tod": rng.uniform(1, 10),
+            "farm_area_ha": rng.uniform(1, 5000),
+            "shrimp_price": rng.uniform(2, 10),
+            "culture_days": rng.randint(60, 180),
+        }
+        financial_data: Dict[str, Any] = {
+            "energy_cost": rng.uniform(0.02, 0.3),
+            "hours_per_night": rng.randint(4, 12),
+            "discount_rate": rng.uniform(0.02, 0.2),
+            "inflation_rate": rng.uniform(0, 0.08),
+            "horizon": rng.randint(2, 20),
+            "safety_margin": rng.uniform(0, 30),
+            "temperature": rng.uniform(15, 38),
+        }
+        if index < len(edge_farms):
+            farm_data.update(edge_farms[index])
+        if index < len(edge_financials):
+            financial_data.update(edge_financials[index])
+        aerators = []
+        for i in range(24):
+            values: Dict[str, Any] = {
+                "sotr": rng.uniform(0.5, 5),
+                "power_hp": rng.uniform(0.5, 10),
+                "cost": rng.uniform(100, 5000),
+                "durability": rng.uniform(0.5, 10),
+                "maintenance": rng.uniform(0, 200),
+            }
+            if i < len(edge_aerators):
+                values.update(edge_aerators[i])
+            aerators.append(Aerator(name=f"Aerator {i}", **values))
+        yield (
+            cast(FarmInput, parse_farm(farm_data)),
+            cast(FinancialInput, parse_financial(financial_data)),
+            aerators,
+        )
+
+
+def verify(backend: Backend, seed: int = 20240611) -> List[str]:
+    """Differences between ``backend`` and pure Python, if any."""
+    mismatches: List[str] = []
+    for number, (farm, financial, aerators) in enumerate(
+        reference_scenarios(seed)
+    ):
+        annual_revenue = comparison_revenue(farm)
+        expected = PYTHON.process(aerators, farm, financial, annual_revenue)
+        actual = backend.process(aerators, farm, financial, annual_revenue)
+        if actual != expected:
+            mismatches.append(f"scenario {number}: sizing and costs")
+        baseline = max(r["total_initial_cost"] for r in expected)
+        for result in expected:
+            saving = baseline - result["total_initial_cost"]
+            flows = [
+                float(f"{saving * (1 + financial.inflation_rate) ** t:.2f}")
+                for t in range(financial.horizon)
+            ]
+            args = (flows, financial.discount_rate, financial.inflation_rate)
+            if backend.npv(*args) != calculate_npv(*args):
+                mismatches.append(f"scenario {number}: npv")
+            for investment in (result["total_initial_cost"] / 3, 0.0):
+                reference = calculate_irr(investment, flows, 1.1, baseline)
+                if (
+                    calculate_irr(
+                        investment, flows, 1.1, baseline, backend.solve_irr
+                    )
+                    != reference
+                ):
+                    mismatches.append(f"scenario {number}: irr")
+    return mismatches
+
+
+def benchmark(backend: Backend, repeat: int = BENCHMARK_REPEAT) -> float:
+    """Best time in seconds for one large comparison's kernels."""
+    farm, financial, aerators = next(reference_scenarios(seed=1))
+    rng = random.Random(1)
+    aerators = [
+        aerators[rng.randrange(4, len(aerators))]
+        for _ in range(BENCHMARK_AERATORS)
+    ]
+    annual_revenue = comparison_revenue(farm)
+    flows = [1000.0 * 1.03**t for t in range(10)]
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        backend.process(aerators, farm, financial, annual_revenue)
+        for _ in range(BENCHMARK_AERATORS):
+            backend.npv(flows, 0.1, 0.03)
+            calculate_irr(2000.0, flows, 1.0, 5000.0, backend.solve_irr)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+active = "python"
+
+
+def configure(name: Optional[str] = None) -> str:
+    """Activate the named backend, or the fastest one for ``auto``.
+
+    Backends whose dependency is missing or whose results differ from
+    pure Python are skipped with a warning. Returns the active name.
+    """
+    global active
+    name = (name or BACKEND_NAME).lower()
+    if name == "auto":
+        candidates = list(FACTORIES)
+    elif name in FACTORIES:
+        candidates = [name]
+    else:
+        raise ValueError(
+            f"Unknown compute backend {name!r}, expected auto or one of "
+            + ", ".join(FACTORIES)
+        )
+
+    usable = []
+    for candidate in candidates:
+        backend = load(candidate)
+        if backend is None:
+            if name != "auto":
+                warnings.warn(f"Compute backend {candidate} is not installed")
+            continue
+        if backend is not PYTHON:
+            mismatches = verify(backend)
+            if mismatches:
+                warnings.warn(
+                    f"Compute backend {candidate} disagrees with pure "
+                    f"Python ({'; '.join(mismatches[:3])}), not used"
+                )
+                continue
+        usable.append(backend)
+    chosen = PYTHON
+    if len(usable) == 1:
+        chosen = usable[0]
+    elif usable:
+        chosen = min(usable, key=benchmark)
+    set_backend(None if chosen is PYTHON else chosen)
+    active = chosen.name
+    return active
@@ -0,0 +1,267 @@
+"""biomass.py
+This module derives the total oxygen demand (TOD) trajectory over a
+culture cycle from a shrimp growth and respiration model. Ponds are
+simulated day by day and the aerator fleet is sized from the daily
+demand, so aerators are brought in as the biomass ramps up.
+"""
+
+import math
+from typing import Any, Dict, List, NamedTuple
+
+from .aerator_comparer import HP_TO_KW, calculate_otr_t
+from .models import Aerator, PondInput
+
+# Shrimp respiration R = a * W^b * RESP_THETA^(T - 20), mg O2/g/h
+SHRIMP_RESP_A = 1.1
+SHRIMP_RESP_B = -0.27
+RESP_THETA = 1.07  # Temperature coefficient for respiration (Q10 ~ 2)
+WATER_RESP_20 = 0.15  # Water column respiration at 20 °C, mg O2/L/h
+SEDIMENT_RESP_20 = 0.05  # Sediment oxygen demand at 20 °C, g O2/m²/h
+M2_PER_HA = 10000
+
+
+class CycleSimulation(NamedTuple):
+    days: List[int]
+    pond_names: List[str]
+    biomass_kg: List[List[float]]
+    pond_tod: List[List[float]]
+    tod: List[float]
+    required_aerators: List[int]
+    installed_aerators: List[int]
+    energy_kwh: List[float]
+    energy_cost: List[float]
+
+
+def _temperature_factor(temperature: float) -> float:
+    adjusted_temp = max(-20, min(100, temperature))
+    return RESP_THETA ** (adjusted_temp - 20)
+
+
+def simulate_biomass(
+    ponds: List[PondInput], culture_days: int
+) -> List[List[float]]:
+    """Simulate standing biomass (kg) per pond and culture day."""
+    if culture_days <= 0:
+        raise ValueError("Culture days must be positive")
+    days = range(culture_days)
+    biomass: List[List[float]] = []
+    for pond in ponds:
+        survival = min(max(pond.survival_rate, 0.0), 1.0)
+        # Exponential mortality reaching the final survival on the last day
+        daily_survival = survival ** (1 / culture_days) if survival > 0 else 0
+        stock = pond.stocking_density_pl_m2 * M2_PER_HA * pond.area_ha
+        biomass.append([
+            stock
+            * daily_survival**d
+            * max(pond.initial_weight_g + pond.growth_rate_g_day * d, 0)
+            / 1000
+            for d in days
+        ])
+    return biomass
+
+
+def calculate_pond_tod(
+    ponds: List[PondInput], biomass: List[List[float]]
+) -> List[List[float]]:
+    """Calculate TOD (kg O2/h) per pond and day from standing biomass."""
+    tod: List[List[float]] = []
+    for pond, pond_biomass in zip(ponds, biomass):
+        temp_factor = _temperature_factor(pond.temperature)
+        # Water column (mg/L = g/m³) and sediment demand do not depend on
+        # biomass, so they are a constant background for the whole cycle
+        background = (
+            (
+                WATER_RESP_20 * pond.pond_depth_m * M2_PER_HA
+                + SEDIMENT_RESP_20 * M2_PER_HA
+            )
+            * pond.area_ha
+            * temp_factor
+            / 1000
+        )
+        shrimp_factor = SHRIMP_RESP_A * temp_factor / 1000
+        tod.append([
+            background
+            + b
+            * shrimp_factor
+            * (pond.initial_weight_g + pond.growth_rate_g_day * d)
+            ** SHRIMP_RESP_B
+            if b > 0
+            else background
+            for d, b in enumerate(pond_biomass)
+        ])
+    return tod
+
+
+def simulate_cycle_fleet(
+    ponds: List[PondInput],
+    culture_days: int,
+    aerator: Aerator,
+    energy_cost: float,
+    hours_per_night: float,
+    safety_margin: float = 0,
+) -> CycleSimulation:
+    """Size the aerator fleet and energy use for every culture day."""
+    biomass = simulate_biomass(ponds, culture_days)
+    pond_tod = calculate_pond_tod(ponds, biomass)
+    margin = 1 + safety_margin / 100
+    power_kw = aerator.power_hp * HP_TO_KW
+
+    required = [0] * culture_days
+    tod = [0.0] * culture_days
+    for pond, daily_tod in zip(ponds, pond_tod):
+        otr_t = calculate_otr_t(aerator.sotr, pond.temperature)
+        if otr_t <= 0:
+            raise ValueError("Aerator must have positive SOTR")
+        # Each pond needs its own units, so sizing is per pond
+        required = [
+            n + math.ceil(t * margin / otr_t)
+            for n, t in zip(required, daily_tod)
+        ]
+        tod = [total + t for total, t in zip(tod, daily_tod)]
+
+    # Aerators are brought in as demand ramps up and kept for the cycle
+    installed: List[int] = []
+    peak = 0
+    for n in required:
+        peak = max(peak, n)
+        installed.append(peak)
+
+    energy_kwh = [n * power_kw * hours_per_night for n in required]
+    return CycleSimulation(
+        days=list(range(1, culture_days + 1)),
+        pond_names=[pond.name for pond in ponds],
+        biomass_kg=biomass,
+        pond_tod=pond_tod,
+        tod=tod,
+        required_aerators=required,
+        installed_aerators=installed,
+        energy_kwh=energy_kwh,
+        energy_cost=[kwh * energy_cost for kwh in energy_kwh],
+    )
+
+
+def aggregate_weekly(simulation: CycleSimulation) -> Dict[str, List[Any]]:
+    """Aggregate a daily simulation into culture weeks."""
+    weeks: Dict[str, List[Any]] = {
+        "weeks": [],
+        "tod": [],
+        "required_aerators": [],
+        "installed_aerators": [],
+        "energy_kwh": [],
+        "energy_cost": [],
+    }
+    for start in range(0, len(simulation.days), 7):
+        end = start + 7
+        weeks["weeks"].append(start // 7 + 1)
+        weeks["tod"].append(max(simulation.tod[start:end]))
+        weeks["required_aerators"].append(
+            max(simulation.required_aerators[start:end])
+        )
+        weeks["installed_aerators"].append(
+            simulation.installed_aerators[end - 1]
+            if end <= len(simulation.days)
+            else simulation.installed_aerators[-1]
+        )
+        weeks["energy_kwh"].append(sum(simulation.energy_kwh[start:end]))
+        weeks["energy_cost"].append(sum(simulation.energy_cost[start:end]))
+    return weeks
+
+
+def simulate_cycle(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Simulate TOD, fleet size and energy over a whole culture cycle."""
+    financial_data: Dict[str, Any] = data.get("financial", {})
+    aerator_data: Dict[str, Any] = data.get("aerator", {})
+    ponds_data: List[Dict[str, Any]] = data.get("ponds", [])
+    resolution = data.get("resolution", "day")
+
+    if not ponds_data:
+        return {"error": "At least one pond is required"}
+    if resolution not in ("day", "week"):
+        return {"error": "Resolution must be 'day' or 'week'"}
+
+    try:
+        culture_days = int(data.get("culture_days", 120))
+        temperature = float(financial_data.get("temperature", 31.5))
+        energy_cost = float(financial_data.get("energy_cost", 0.05))
+        hours_per_night = float(financial_data.get("hours_per_night", 8))
+        safety_margin = float(financial_data.get("safety_margin", 0))
+    except (ValueError, TypeError):
+        return {"error": "Invalid numeric value for financial inputs"}
+
+    if culture_days <= 0:
+        return {"error": "Culture days must be positive"}
+
+    try:
+        ponds = [
+            PondInput(
+                name=str(p.get("name", f"Pond {i + 1}")),
+                area_ha=float(p.get("area_ha", 1.0)),
+                pond_depth_m=float(p.get("pond_depth_m", 1.0)),
+                stocking_density_pl_m2=float(
+                    p.get("stocking_density_pl_m2", 100)
+                ),
+                initial_weight_g=float(p.get("initial_weight_g", 0.01)),
+                growth_rate_g_day=float(p.get("growth_rate_g_day", 0.2)),
+                survival_rate=float(p.get("survival_rate", 0.8)),
+                temperature=float(p.get("temperature", temperature)),
+            )
+            for i, p in enumerate(ponds_data)
+        ]
+    except (ValueError, TypeError):
+        return {"error": "Invalid numeric value for pond inputs"}
+
+    try:
+        aerator = Aerator(
+            name=str(aerator_data.get("name", "Unknown")),
+            sotr=float(aerator_data["sotr"]),
+            power_hp=float(aerator_data["power_hp"]),
+            cost=float(aerator_data.get("cost", 0)),
+            durability=float(aerator_data.get("durability", 1)),
+            maintenance=float(aerator_data.get("maintenance", 0)),
+        )
+    except KeyError as e:
+        return {"error": f"Missing required aerator field: {e.args[0]}"}
+    except (ValueError, TypeError):
+        return {"error": "Invalid numeric value for aerator specifications"}
+
+    try:
+        simulation = simulate_cycle_fleet(
+            ponds,
+            culture_days,
+            aerator,
+            energy_cost,
+            hours_per_night,
+            safety_margin,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
+
+    peak_aerators = max(simulation.installed_aerators)
+    summary = {
+        "peak_tod": float(f"{max(simulation.tod):.2f}"),
+        "peak_aerators": peak_aerators,
+        "total_initial_cost": float(f"{peak_aerators * aerator.cost:.2f}"),
+        "cycle_energy_kwh": float(f"{sum(simulation.energy_kwh):.2f}"),
+        "cycle_energy_cost": float(f"{sum(simulation.energy_cost):.2f}"),
+    }
+    if resolution == "week":
+        series = aggregate_weekly(simulation)
+    else:
+        series = {
+            "days": simulation.days,
+            "tod": simulation.tod,
+            "required_aerators": simulation.required_aerators,
+            "installed_aerators": simulation.installed_aerators,
+            "energy_kwh": simulation.energy_kwh,
+            "energy_cost": simulation.energy_cost,
+        }
+    for key in ("tod", "energy_kwh", "energy_cost"):
+        series[key] = [float(f"{v:.2f}") for v in series[key]]
+
+    return {
+        "aerator": aerator.name,
+        "ponds": simulation.pond_names,
+        "resolution": resolution,
+        "summary": summary,
+        "series": series,
+    }
@@ -0,0 +1,379 @@
+"""calibration.py
+This module calibrates aerator SOTR from field re-aeration tests. Each
+test's dissolved oxygen recovery curve is fitted to the ASCE model
+
+    C(t) = Cs - (Cs - C0) * exp(-KLa * t)
+
+by Levenberg-Marquardt nonlinear least squares, all tests of a batch
+iterating in lockstep. KLa and Cs are standardized to 20 °C, 1 atm and
+fresh water to give SOTR and SAE. CSV inputs are streamed in batches
+of tests so large files are never loaded whole.
+"""
+
+import csv
+import json
+import math
+import sys
+from itertools import groupby
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from .aerator_comparer import HP_TO_KW
+from .oxygen import STANDARD_SATURATION, THETA, interpolated_saturation
+
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-10  # relative SSE improvement or step size
+
+
+class ReaerationTest(NamedTuple):
+    test_id: str
+    time_min: List[float]
+    do_mg_l: List[float]
+    volume_m3: float
+    temperature: float
+    power_hp: float
+    salinity_ppt: float = 0
+    altitude_m: float = 0
+
+
+class CalibrationResult(NamedTuple):
+    test_id: str
+    kla_t: float  # 1/h at test temperature
+    kla_20: float  # 1/h at 20 °C
+    cs_t: float  # mg/L, fitted saturation
+    cs_20: float  # mg/L, standard saturation
+    c0: float  # mg/L, fitted initial DO
+    rmse: float
+    iterations: int
+    converged: bool
+    sotr: float  # kg O2/h
+    sae: float  # kg O2/kWh
+    error: Optional[str] = None  # set when the test could not be fitted
+
+
+def _initial_guess(
+    times: List[float], values: List[float]
+) -> Optional[Tuple[float, float, float]]:
+    # None when no reading lies below the saturation estimate
+    cs = max(values) * 1.02 + 1e-6
+    c0 = values[0]
+    # Log-linear regression of ln(Cs - C) against t gives -KLa
+    points = [
+        (t, math.log(cs - c)) for t, c in zip(times, values) if cs - c > 0
+    ]
+    n = len(points)
+    if n == 0:
+        return None
+    mean_t = sum(t for t, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var_t = sum((t - mean_t) ** 2 for t, _ in points)
+    cov = sum((t - mean_t) * (y - mean_y) for t, y in points)
+    kla = -cov / var_t if var_t > 0 else 1.0
+    return max(kla, 1e-3), cs, c0
+
+
+def _normal_equations(
+    params: Tuple[float, float, float],
+    times: List[float],
+    values: List[float],
+) -> Tuple[List[List[float]], List[float]]:
+    kla, cs, c0 = params
+    jtj = [[0.0] * 3 for _ in range(3)]
+    jtr = [0.0] * 3
+    for t, y in zip(times, values):
+        e = math.exp(-kla * t)
+        r = cs - (cs - c0) * e - y
+        grad = ((cs - c0) * t * e, 1 - e, e)
+        for i in range(3):
+            jtr[i] += grad[i] * r
+            for j in range(i, 3):
+                jtj[i][j] += grad[i] * grad[j]
+    for i in range(3):
+        for j in range(i):
+            jtj[i][j] = jtj[j][i]
+    return jtj, jtr
+
+
+def _sse(
+    params: Tuple[float, float, float],
+    times: List[float],
+    values: List[float],
+) -> float:
+    kla, cs, c0 = params
+    return sum(
+        (cs - (cs - c0) * math.exp(-kla * t) - y) ** 2
+        for t, y in zip(times, values)
+    )
+
+
+def _solve3(a: List[List[float]], b: List[float]) -> List[float]:
+    # Gaussian elimination with partial pivoting on a 3x3 system
+    m = [row[:] + [rhs] for row, rhs in zip(a, b)]
+    for col in range(3):
+        pivot = max(range(col, 3), key=lambda r: abs(m[r][col]))
+        if abs(m[pivot][col]) < 1e-300:
+            raise ZeroDivisionError("Singular normal equations")
+        m[col], m[pivot] = m[pivot], m[col]
+        for r in range(col + 1, 3):
+            f = m[r][col] / m[col][col]
+            for c in range(col, 4):
+                m[r][c] -= f * m[col][c]
+    x = [0.0] * 3
+    for r in range(2, -1, -1):
+        known = sum(m[r][c] * x[c] for c in range(r + 1, 3))
+        x[r] = (m[r][3] - known) / m[r][r]
+    return x
+
+
+def fit_reaeration_batch(
+    tests: List[ReaerationTest],
+) -> List[CalibrationResult]:
+    """Fit KLa, Cs and C0 for a batch of tests and derive SOTR and SAE.
+
+    ``converged`` is only set once the fit meets the tolerance. Tests
+    that cannot be fitted get an ``error`` and zero values instead of
+    failing the batch.
+    """
+    # Time in hours so KLa comes out in 1/h
+    times = [[t / 60 for t in test.time_min] for test in tests]
+    errors: List[Optional[str]] = [None] * len(tests)
+    params: List[Tuple[float, float, float]] = []
+    for i, (ts, test) in enumerate(zip(times, tests)):
+        guess = _initial_guess(ts, test.do_mg_l)
+        if guess is None:
+            errors[i] = "DO readings must include positive values"
+            guess = (0.0, 0.0, 0.0)
+        params.append(guess)
+    damping = [1e-3] * len(tests)
+    sse = [_sse(p, ts, t.do_mg_l) for p, ts, t in zip(params, times, tests)]
+    iterations = [0] * len(tests)
+    converged = [False] * len(tests)
+    active = {i for i in range(len(tests)) if errors[i] is None}
+
+    for _ in range(MAX_ITERATIONS):
+        if not active:
+            break
+        for i in list(active):
+            iterations[i] += 1
+            jtj, jtr = _normal_equations(
+                params[i], times[i], tests[i].do_mg_l
+            )
+            lm = [
+                [
+                    v * (1 + damping[i]) if r == c else v
+                    for c, v in enumerate(row)
+                ]
+                for r, row in enumerate(jtj)
+            ]
+            try:
+                step = _solve3(lm, [-g for g in jtr])
+            except ZeroDivisionError:
+                # The readings don't determine all three parameters,
+                # e.g. every reading taken at the same time
+                errors[i] = "Readings do not determine KLa, Cs and C0"
+                active.discard(i)
+                continue
+            candidate = (
+                max(params[i][0] + step[0], 1e-9),
+                params[i][1] + step[1],
+                params[i][2] + step[2],
+            )
+            candidate_sse = _sse(candidate, times[i], tests[i].do_mg_l)
+            if candidate_sse <= sse[i]:
+                improvement = sse[i] - candidate_sse
+                step_size = math.sqrt(sum(d * d for d in step))
+                scale = math.sqrt(sum(p * p for p in params[i]))
+                params[i], sse[i] = candidate, candidate_sse
+                damping[i] = max(damping[i] / 10, 1e-12)
+                if (
+                    improvement <= TOLERANCE * (1 + sse[i])
+                    or step_size <= TOLERANCE * (1 + scale)
+                ):
+                    converged[i] = True
+                    active.discard(i)
+            else:
+                damping[i] *= 10
+                if damping[i] > 1e12:
+                    # No step reduces the error any more
+                    active.discard(i)
+
+    for i, (kla_t, cs_t, _) in enumerate(params):
+        # A falling or flat curve fits a meaningless negative saturation
+        # or a KLa of zero
+        if errors[i] is None and (round(kla_t, 4) <= 0 or cs_t <= 0):
+            errors[i] = "DO readings must recover toward saturation"
+
+    results: List[CalibrationResult] = []
+    for i, test in enumerate(tests):
+        if errors[i] is not None:
+            results.append(
+                CalibrationResult(
+                    test_id=test.test_id,
+                    kla_t=0.0,
+                    kla_20=0.0,
+                    cs_t=0.0,
+                    cs_20=0.0,
+                    c0=0.0,
+                    rmse=0.0,
+                    iterations=iterations[i],
+                    converged=False,
+                    sotr=0.0,
+                    sae=0.0,
+                    error=errors[i],
+                )
+            )
+            continue
+        kla_t, cs_t, c0 = params[i]
+        adjusted_temp = max(-20, min(100, test.temperature))
+        kla_20 = kla_t / THETA ** (adjusted_temp - 20)
+        # Scale the fitted saturation to standard conditions (tau * omega)
+        cs_20 = (
+            cs_t
+            * STANDARD_SATURATION
+            / interpolated_saturation(
+                test.temperature, test.salinity_ppt, test.altitude_m
+            )
+        )
+        sotr = kla_20 * cs_20 * test.volume_m3 / 1000
+        power_kw = test.power_hp * HP_TO_KW
+        results.append(
+            CalibrationResult(
+                test_id=test.test_id,
+                kla_t=float(f"{kla_t:.4f}"),
+                kla_20=float(f"{kla_20:.4f}"),
+                cs_t=float(f"{cs_t:.3f}"),
+                cs_20=float(f"{cs_20:.3f}"),
+                c0=float(f"{c0:.3f}"),
+                rmse=float(f"{math.sqrt(sse[i] / len(times[i])):.4f}"),
+                iterations=iterations[i],
+                converged=converged[i],
+                sotr=float(f"{sotr:.2f}"),
+                sae=float(f"{sotr / power_kw:.2f}") if power_kw > 0 else 0.00,
+            )
+        )
+    return results
+
+
+def _float(row: Dict[str, str], key: str, default: float) -> float:
+    value = row.get(key)
+    return float(value) if value not in (None, "") else default
+
+
+def read_reaeration_csv(
+    lines: Iterable[str], defaults: Optional[Dict[str, float]] = None
+) -> Iterator[ReaerationTest]:
+    """Stream tests from CSV rows grouped by consecutive ``test_id``.
+
+    Required columns are ``test_id``, ``time_min`` and ``do_mg_l``;
+    ``volume_m3``, ``temperature``, ``power_hp``, ``salinity_ppt`` and
+    ``altitude_m`` are read from the first row of each test or taken
+    from ``defaults``.
+    """
+    defaults = defaults or {}
+    reader = csv.DictReader(lines)
+    for test_id, rows in groupby(reader, key=lambda r: r["test_id"]):
+        times: List[float] = []
+        values: List[float] = []
+        first: Dict[str, str] = {}
+        for row in rows:
+            first = first or row
+            times.append(float(row["time_min"]))
+            values.append(float(row["do_mg_l"]))
+        yield ReaerationTest(
+            test_id=test_id,
+            time_min=times,
+            do_mg_l=values,
+            volume_m3=_float(first, "volume_m3", defaults.get("volume_m3", 0)),
+            temperature=_float(
+                first, "temperature", defaults.get("temperature", 20)
+            ),
+            power_hp=_float(first, "power_hp", defaults.get("power_hp", 0)),
+            salinity_ppt=_float(
+                first, "salinity_ppt", defaults.get("salinity_ppt", 0)
+            ),
+            altitude_m=_float(
+                first, "altitude_m", defaults.get("altitude_m", 0)
+            ),
+        )
+
+
+def validate_test(test: ReaerationTest) -> Optional[str]:
+    """Error message for test data that cannot be fitted, or None."""
+    if len(test.time_min) < 4:
+        return f"Test {test.test_id} needs at least 4 DO readings"
+    for field in ("time_min", "do_mg_l"):
+        if not all(math.isfinite(v) for v in getattr(test, field)):
+            return f"Test {test.test_id} has non-finite {field} values"
+    for field in ("volume_m3", "temperature"):
+        if not math.isfinite(getattr(test, field)):
+            return f"Test {test.test_id} has a non-finite {field}"
+    if test.volume_m3 <= 0:
+        return f"Test {test.test_id} needs a positive volume_m3"
+    return None
+
+
+def calibrate_stream(
+    tests: Iterable[ReaerationTest], batch_size: int = 256
+) -> Iterator[CalibrationResult]:
+    """Fit tests in batches so memory stays bounded by ``batch_size``.
+
+    Raises ``ValueError`` for a test that fails ``validate_test``.
+    """
+    batch: List[ReaerationTest] = []
+    for test in tests:
+        error = validate_test(test)
+        if error:
+            raise ValueError(error)
+        batch.append(test)
+        if len(batch) >= batch_size:
+            yield from fit_reaeration_batch(batch)
+            batch = []
+    if batch:
+        yield from fit_reaeration_batch(batch)
+
+
+def calibrate_tests(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Calibrate SOTR and SAE from re-aeration tests given as JSON."""
+    tests_data: List[Dict[str, Any]] = data.get("tests", [])
+    if not tests_data:
+        return {"error": "At least one re-aeration test is required"}
+    try:
+        tests = [
+            ReaerationTest(
+                test_id=str(t.get("test_id", i + 1)),
+                time_min=[float(v) for v in t["time_min"]],
+                do_mg_l=[float(v) for v in t["do_mg_l"]],
+                volume_m3=float(t["volume_m3"]),
+                temperature=float(t.get("temperature", 20)),
+                power_hp=float(t.get("power_hp", 0)),
+                salinity_ppt=float(t.get("salinity_ppt", 0)),
+                altitude_m=float(t.get("altitude_m", 0)),
+            )
+            for i, t in enumerate(tests_data)
+        ]
+    except KeyError as e:
+        return {"error": f"Missing required test field: {e.args[0]}"}
+    except (ValueError, TypeError):
+        return {"error": "Invalid numeric value for re-aeration tests"}
+    if any(len(t.time_min) != len(t.do_mg_l) for t in tests):
+        return {"error": "time_min and do_mg_l must have the same length"}
+    try:
+        results = list(calibrate_stream(tests))
+    except ValueError as e:
+        return {"error": str(e)}
+    return {"results": [r._asdict() for r in results]}
+
+
+if __name__ == "__main__":
+    # Usage: python -m backend.api.core.calibration tests.csv
+    with open(sys.argv[1], newline="") as csv_file:
+        for calibration in calibrate_stream(read_reaeration_csv(csv_file)):
+            print(json.dumps(calibration._asdict()))
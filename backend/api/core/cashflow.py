@@ -0,0 +1,407 @@
+"""cashflow.py
+This module builds an explicit year-by-year cash-flow ledger for each
+aerator. Unlike the smoothed ``cost / durability`` charge used by
+``compare_aerators``, replacements are booked in the years they happen,
+SOTR decays with fleet age (so more units are needed as it ages) and
+maintenance rises with age. NPV, IRR and payback are computed from the
+ledger, which is held as aerators × years matrices.
+"""
+
+import math
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from .aerator_comparer import (
+    HP_TO_KW,
+    calculate_otr_t,
+    parse_comparison_input,
+)
+from .finance import after_tax_costs, has_financing
+from .models import Aerator, FarmInput, FinancialInput
+
+Matrix = List[List[float]]
+
+MAX_HORIZON = 300  # Keeps (1 + rate) ** -year within float range
+
+# Rates scanned for an IRR sign change, nearest to zero first
+IRR_GRID = [0.0, 0.05, 0.1, 0.2, 0.35, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0, 10.0]
+IRR_GRID_NEGATIVE = [0.0, -0.25, -0.5, -0.75, -0.9]
+
+
+class CashFlowLedger(NamedTuple):
+    names: List[str]
+    years: List[int]
+    fleet: List[List[int]]
+    capex: Matrix
+    energy: Matrix
+    maintenance: Matrix
+    total: Matrix
+    debt_service: Optional[Matrix] = None
+    tax_shield: Optional[Matrix] = None
+
+
+class LedgerMetrics(NamedTuple):
+    baseline: int
+    pv_cost: List[float]
+    savings: Matrix
+    npv_savings: List[float]
+    irr: List[Optional[float]]
+    payback_years: List[Optional[float]]
+
+
+def _replacements_before(instant: float, durability: float) -> int:
+    # Number of replacements k >= 1 with k * durability < instant, found
+    # directly so tiny durabilities don't loop once per replacement
+    k = max(math.ceil(instant / durability) - 1, 0)
+    if (k + 1) * durability < instant:
+        k += 1
+    elif k > 0 and k * durability >= instant:
+        k -= 1
+    return k
+
+
+@lru_cache(maxsize=256)
+def fleet_age_schedule(durability: float, horizon: int) -> Tuple[int, ...]:
+    """Age of the fleet in each operating year (index 0 is year 1).
+
+    Replacement k happens at time k * durability and is booked in the
+    year that instant falls in; the fleet counts as new for that year.
+    Schedules only depend on durability, so they are shared by every
+    aerator with the same service life.
+    """
+    if durability <= 0:
+        # No durability data means the fleet is never replaced
+        return tuple(range(horizon))
+    ages: List[int] = []
+    for year in range(1, horizon + 1):
+        last_replacement = _replacements_before(year, durability) * durability
+        ages.append(year - 1 - math.floor(last_replacement))
+    return tuple(ages)
+
+
+@lru_cache(maxsize=256)
+def replacement_counts(durability: float, horizon: int) -> Tuple[int, ...]:
+    """Fleet replacements booked in each operating year (index 0 is
+    year 1); more than one when durability is under a year."""
+    if durability <= 0:
+        return (0,) * horizon
+    return tuple(
+        _replacements_before(year, durability)
+        - _replacements_before(year - 1, durability)
+        for year in range(1, horizon + 1)
+    )
+
+
+def build_ledger(
+    aerators: List[Aerator],
+    farm: FarmInput,
+    financial: FinancialInput,
+    sotr_decay_rates: List[float],
+    maintenance_growth_rates: List[float],
+) -> CashFlowLedger:
+    """Build capex, energy and maintenance matrices (aerators × years).
+
+    Column 0 is the initial purchase, columns 1..horizon are operating
+    years. Costs in operating year y are escalated by inflation^(y - 1).
+    With financing terms, ``total`` holds after-tax costs net of loan
+    proceeds, debt service and tax shields.
+    """
+    horizon = financial.horizon
+    required_otr_t = (
+        farm.tod * farm.farm_area_ha * (1 + financial.safety_margin / 100)
+    )
+    operating_hours = financial.hours_per_night * 365
+    escalation = [
+        (1 + financial.inflation_rate) ** t for t in range(horizon)
+    ]
+
+    fleet: List[List[int]] = []
+    capex: Matrix = []
+    energy: Matrix = []
+    maintenance: Matrix = []
+    for aerator, decay, growth in zip(
+        aerators, sotr_decay_rates, maintenance_growth_rates
+    ):
+        otr_t = calculate_otr_t(
+            aerator.sotr, financial.temperature, farm.conditions
+        )
+        ages = fleet_age_schedule(aerator.durability, horizon)
+        replacements = replacement_counts(aerator.durability, horizon)
+        if otr_t > 0:
+            # Fleet needed at each age, growing as SOTR degrades
+            needed_by_age = [
+                math.ceil(required_otr_t / (otr_t * (1 - decay) ** age))
+                if decay < 1
+                else 0
+                for age in range(max(ages, default=0) + 1)
+            ]
+        else:
+            needed_by_age = [0] * (max(ages, default=0) + 1)
+
+        row_fleet = [needed_by_age[0]]
+        row_capex = [needed_by_age[0] * aerator.cost]
+        owned = needed_by_age[0]
+        for t, age in enumerate(ages):
+            needed = needed_by_age[age]
+            if replacements[t]:
+                bought = needed * replacements[t]
+            else:
+                # Top-up units join the current fleet and share its age
+                bought = max(needed - owned, 0)
+                needed = max(needed, owned)
+            owned = needed
+            row_fleet.append(needed)
+            row_capex.append(bought * aerator.cost * escalation[t])
+
+        unit_energy = (
+            aerator.power_hp
+            * HP_TO_KW
+            * financial.energy_cost
+            * operating_hours
+        )
+        fleet.append(row_fleet)
+        capex.append(row_capex)
+        energy.append([0.0] + [
+            n * unit_energy * e
+            for n, e in zip(row_fleet[1:], escalation)
+        ])
+        maintenance.append([0.0] + [
+            n * aerator.maintenance * (1 + growth) ** age * e
+            for n, age, e in zip(row_fleet[1:], ages, escalation)
+        ])
+
+    debt_service: Optional[Matrix] = None
+    tax_shield: Optional[Matrix] = None
+    if has_financing(financial):
+        opex = [
+            [e + m for e, m in zip(re, rm)]
+            for re, rm in zip(energy, maintenance)
+        ]
+        total, debt_service, tax_shield = after_tax_costs(
+            capex, opex, financial
+        )
+    else:
+        total = [
+            [c + e + m for c, e, m in zip(rc, re, rm)]
+            for rc, re, rm in zip(capex, energy, maintenance)
+        ]
+    return CashFlowLedger(
+        names=[a.name for a in aerators],
+        years=list(range(horizon + 1)),
+        fleet=fleet,
+        capex=capex,
+        energy=energy,
+        maintenance=maintenance,
+        total=total,
+        debt_service=debt_service,
+        tax_shield=tax_shield,
+    )
+
+
+def discount_factors(discount_rate: float, horizon: int) -> List[float]:
+    """Discount factor for each ledger column (year 0 is undiscounted)."""
+    if discount_rate <= -1:
+        raise ValueError("Discount rate must be greater than -100%")
+    return [(1 + discount_rate) ** -y for y in range(horizon + 1)]
+
+
+def npv_rows(flows: Matrix, factors: List[float]) -> List[float]:
+    """NPV of every row of a cash-flow matrix."""
+    return [sum(cf * f for cf, f in zip(row, factors)) for row in flows]
+
+
+def _npv_horner(row: List[float], rate: float) -> float:
+    x = 1 / (1 + rate)
+    value = 0.0
+    for cf in reversed(row):
+        value = value * x + cf
+    return value
+
+
+def _npv_and_slope(row: List[float], rate: float) -> Tuple[float, float]:
+    # Horner on p(x) = sum(cf * x^y) and p'(x), with x = 1 / (1 + rate)
+    x = 1 / (1 + rate)
+    value = 0.0
+    slope = 0.0
+    for cf in reversed(row):
+        slope = slope * x + value
+        value = value * x + cf
+    return value, -slope * x * x
+
+
+def _irr_bracket(row: List[float]) -> Optional[Tuple[float, float]]:
+    for grid in (IRR_GRID, IRR_GRID_NEGATIVE):
+        previous = _npv_horner(row, grid[0])
+        for a, b in zip(grid, grid[1:]):
+            current = _npv_horner(row, b)
+            if previous * current <= 0:
+                return (a, b) if a < b else (b, a)
+            previous = current
+    return None
+
+
+def irr_rows(
+    flows: Matrix, tol: float = 1e-9, maxiter: int = 100
+) -> List[Optional[float]]:
+    """IRR of every row, choosing the root nearest to zero.
+
+    Only conventional investments (negative year-0 flow) have an IRR.
+    Each row is bracketed on a fixed rate grid and solved by Newton
+    steps that fall back to bisection when they leave the bracket.
+    """
+    irr: List[Optional[float]] = []
+    for row in flows:
+        bracket = _irr_bracket(row) if row and row[0] < 0 else None
+        if bracket is None:
+            irr.append(None)
+            continue
+        low, high = bracket
+        npv_low = _npv_horner(row, low)
+        rate = (low + high) / 2
+        for _ in range(maxiter):
+            value, slope = _npv_and_slope(row, rate)
+            if value * npv_low > 0:
+                low, npv_low = rate, value
+            else:
+                high = rate
+            step = value / slope if slope != 0 else 0.0
+            candidate = rate - step
+            if not low < candidate < high:
+                candidate = (low + high) / 2
+            if abs(candidate - rate) < tol:
+                rate = candidate
+                break
+            rate = candidate
+        irr.append(rate)
+    return irr
+
+
+def payback_rows(flows: Matrix) -> List[Optional[float]]:
+    """Years until cumulative cash flow turns non-negative, interpolated."""
+    paybacks: List[Optional[float]] = []
+    for row in flows:
+        cumulative = row[0] if row else 0.0
+        payback: Optional[float] = 0.0 if cumulative >= 0 else None
+        for year, cf in enumerate(row[1:], 1):
+            if payback is not None:
+                break
+            previous = cumulative
+            cumulative += cf
+            if cumulative >= 0:
+                payback = year - 1 + (-previous / cf if cf > 0 else 1.0)
+        paybacks.append(payback)
+    return paybacks
+
+
+def ledger_metrics(
+    ledger: CashFlowLedger,
+    discount_rate: float,
+    baseline: Optional[int] = None,
+) -> LedgerMetrics:
+    """Compute PV cost, savings NPV, IRR and payback versus a baseline.
+
+    The baseline defaults to the costliest option, as in compare_aerators.
+    """
+    factors = discount_factors(discount_rate, len(ledger.years) - 1)
+    pv_cost = npv_rows(ledger.total, factors)
+    if baseline is None:
+        baseline = max(range(len(pv_cost)), key=lambda i: pv_cost[i])
+    base_row = ledger.total[baseline]
+    savings = [
+        [b - c for b, c in zip(base_row, row)] for row in ledger.total
+    ]
+    return LedgerMetrics(
+        baseline=baseline,
+        pv_cost=pv_cost,
+        savings=savings,
+        npv_savings=npv_rows(savings, factors),
+        irr=irr_rows(savings),
+        payback_years=payback_rows(savings),
+    )
+
+
+def _round_row(row: List[float]) -> List[float]:
+    return [float(f"{v:.2f}") for v in row]
+
+
+def compare_aerators_ledger(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Compare aerators from an explicit annual cash-flow ledger."""
+    parsed = parse_comparison_input(data)
+    if isinstance(parsed, dict):
+        return parsed
+    farm, financial, aerators = parsed
+
+    ledger_data: Dict[str, Any] = data.get("ledger", {})
+    aerators_data: List[Dict[str, Any]] = data.get("aerators", [])
+    try:
+        default_decay = float(ledger_data.get("sotr_decay_rate", 0))
+        default_growth = float(ledger_data.get("maintenance_growth_rate", 0))
+        sotr_decay_rates = [
+            float(a.get("sotr_decay_rate", default_decay))
+            for a in aerators_data
+        ]
+        maintenance_growth_rates = [
+            float(a.get("maintenance_growth_rate", default_growth))
+            for a in aerators_data
+        ]
+    except (ValueError, TypeError):
+        return {"error": "Invalid numeric value for ledger inputs"}
+    # Full rows grow with aerators × years; large catalogs may skip them
+    include_rows = bool(ledger_data.get("include_rows", True))
+
+    if any(not 0 <= d < 1 for d in sotr_decay_rates):
+        return {"error": "SOTR decay rate must be between 0 and 1"}
+    if not 0 < financial.horizon <= MAX_HORIZON:
+        return {
+            "error": f"Horizon must be between 1 and {MAX_HORIZON} years"
+        }
+
+    ledger = build_ledger(
+        aerators,
+        farm,
+        financial,
+        sotr_decay_rates,
+        maintenance_growth_rates,
+    )
+    try:
+        metrics = ledger_metrics(ledger, financial.discount_rate)
+    except ValueError as e:
+        return {"error": str(e)}
+    winner = min(
+        range(len(metrics.pv_cost)), key=lambda i: metrics.pv_cost[i]
+    )
+
+    results: List[Dict[str, Any]] = []
+    for i, name in enumerate(ledger.names):
+        irr = metrics.irr[i]
+        payback = metrics.payback_years[i]
+        result: Dict[str, Any] = {
+            "name": name,
+            "pv_cost": float(f"{metrics.pv_cost[i]:.2f}"),
+            "npv_savings": float(f"{metrics.npv_savings[i]:.2f}"),
+            "irr": float(f"{irr * 100:.2f}") if irr is not None else None,
+            "payback_years": (
+                float(f"{payback:.2f}") if payback is not None else None
+            ),
+        }
+        if include_rows:
+            result.update({
+                "fleet": ledger.fleet[i],
+                "capex": _round_row(ledger.capex[i]),
+                "energy": _round_row(ledger.energy[i]),
+                "maintenance": _round_row(ledger.maintenance[i]),
+                "total": _round_row(ledger.total[i]),
+                "savings": _round_row(metrics.savings[i]),
+            })
+            if ledger.debt_service is not None:
+                result["debt_service"] = _round_row(ledger.debt_service[i])
+            if ledger.tax_shield is not None:
+                result["tax_shield"] = _round_row(ledger.tax_shield[i])
+        results.append(result)
+
+    return {
+        "years": ledger.years,
+        "baselineLabel": ledger.names[metrics.baseline],
+        "winnerLabel": ledger.names[winner],
+        "aeratorLedgers": results,
+    }
@@ -0,0 +1,370 @@
+"""catalog.py
+This module stores an aerator catalog in a memory-mapped binary file so
+every worker process shares one read-only copy. The file holds the
+supplier fields of each aerator together with precomputed invariants
+(power in kW, SAE and OTR_T over a temperature grid) in columns of
+little-endian float64, followed by the names sorted for binary search:
+
+    header      magic, format version, counts, section offsets
+    temperatures float64[temperatures]
+    columns     float64[count] per column, one column after another
+    names       uint32[count + 1] offsets, then the UTF-8 names
+
+Workers map the file and read the columns in place, without parsing or
+copying. A catalog is replaced by writing a new file and renaming it
+over the old one; ``CatalogHandle`` notices the new file and remaps it,
+while readers still holding the old mapping keep a consistent view.
+
+Usage:
+    python -m backend.api.core.catalog aerators.json catalog.bin
+"""
+
+import bisect
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set
+
+from .aerator_comparer import HP_TO_KW, calculate_otr_t, calculate_sae
+from .models import Aerator
+
+CATALOG_PATH = os.environ.get("AERASYNC_CATALOG", "")
+MAGIC = b"AERCAT\x00\x01"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIIIIQQ")
+FIELDS = ("power_hp", "sotr", "cost", "durability", "maintenance")
+DERIVED = ("power_kw", "sae")
+COLUMNS = FIELDS + DERIVED
+TEMPERATURES = tuple(float(t) for t in range(20, 37))  # °C
+CHECK_SECONDS = 1.0  # least interval between checks for a new file
+
+
+def _aligned(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+class CatalogBuilder:
+    """Catalog rows accumulated in compact columns before writing.
+
+    Rows are kept as float64 columns plus one name per row, about 200
+    bytes per aerator, and invariants are computed once per row added
+    or changed.
+    """
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._columns = [array("d") for _ in COLUMNS]
+        self._otr_t = [array("d") for _ in TEMPERATURES]
+
+    @classmethod
+    def from_catalog(cls, catalog: "Catalog") -> "CatalogBuilder":
+        """Start from the rows of an existing catalog."""
+        builder = cls()
+        for i in range(len(catalog)):
+            name = catalog.name(i)
+            builder._index[name] = i
+            builder.names.append(name)
+        for column, name in zip(builder._columns, COLUMNS):
+            column.frombytes(catalog.column(name).tobytes())
+        for column, values in zip(builder._otr_t, catalog._otr_t):
+            column.frombytes(values.tobytes())
+        return builder
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._index
+
+    def set(self, name: str, values: Sequence[float]) -> str:
+        """Add or update an aerator from its ``FIELDS`` values.
+
+        Returns ``added``, ``updated`` or ``unchanged``.
+        """
+        index = self._index.get(name)
+        if index is not None and all(
+            self._columns[j][index] == value for j, value in enumerate(values)
+        ):
+            return "unchanged"
+        power_hp, sotr = values[0], values[1]
+        row = [float(v) for v in values]
+        row.append(power_hp * HP_TO_KW)
+        row.append(calculate_sae(sotr, power_hp))
+        otr_t = [calculate_otr_t(sotr, t) for t in TEMPERATURES]
+        if index is None:
+            self._index[name] = len(self.names)
+            self.names.append(name)
+            for column, value in zip(self._columns + self._otr_t, row + otr_t):
+                column.append(value)
+            return "added"
+        for column, value in zip(self._columns + self._otr_t, row + otr_t):
+            column[index] = value
+        return "updated"
+
+    def write(self, path: str, keep: Optional[Set[str]] = None) -> int:
+        """Write the rows, sorted by name, to ``path`` atomically.
+
+        The file is written next to ``path`` and renamed over it, so
+        readers see either the old or the new catalog, never a partial
+        one. Only the names in ``keep`` are written when it is given.
+        Returns the number of aerators written.
+        """
+        order = [
+            i
+            for i, name in enumerate(self.names)
+            if keep is None or name in keep
+        ]
+        order.sort(key=self.names.__getitem__)
+        count = len(order)
+        columns = [
+            array("d", (column[i] for i in order))
+            for column in self._columns + self._otr_t
+        ]
+        encoded = [self.names[i].encode() for i in order]
+        offsets = array("I", [0])
+        for name in encoded:
+            offsets.append(offsets[-1] + len(name))
+        temperatures = array("d", TEMPERATURES)
+        if sys.byteorder != "little":
+            for column in columns + [offsets, temperatures]:
+                column.byteswap()
+
+        data_offset = _aligned(HEADER.size + 8 * len(TEMPERATURES))
+        names_offset = data_offset + 8 * count * len(columns)
+        header = HEADER.pack(
+            MAGIC,
+            FORMAT_VERSION,
+            count,
+            len(COLUMNS),
+            len(TEMPERATURES),
+            data_offset,
+            names_offset,
+        )
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.write(temperatures.tobytes())
+            f.write(b"\x00" * (data_offset - f.tell()))
+            for column in columns:
+                f.write(column.tobytes())
+            f.write(offsets.tobytes())
+            f.write(b"".join(encoded))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return count
+
+
+def check_fields(values: Dict[str, float]) -> None:
+    """Raise ``ValueError`` unless every ``FIELDS`` value is usable."""
+    for field in FIELDS:
+        # nan slips through every range check below
+        if not math.isfinite(values[field]):
+            raise ValueError(f"non-finite {field}: {values[field]!r}")
+    if values["power_hp"] <= 0 or values["sotr"] <= 0:
+        raise ValueError("power and SOTR must be positive")
+    if values["durability"] <= 0:
+        raise ValueError("durability must be positive")
+    if values["cost"] < 0 or values["maintenance"] < 0:
+        raise ValueError("cost and maintenance cannot be negative")
+
+
+def build_catalog(aerators: List[Dict[str, Any]], path: str) -> int:
+    """Write a catalog file atomically; returns the number of aerators."""
+    builder = CatalogBuilder()
+    for i, a in enumerate(aerators):
+        try:
+            name = str(a["name"])
+            parsed = {f: float(a[f]) for f in FIELDS}
+        except KeyError as e:
+            raise ValueError(f"Aerator {i + 1} is missing {e.args[0]}")
+        except (TypeError, ValueError):
+            raise ValueError(f"Aerator {i + 1} has a non-numeric field")
+        try:
+            check_fields(parsed)
+        except ValueError as e:
+            raise ValueError(f"Aerator {i + 1}: {e}")
+        values = [parsed[f] for f in FIELDS]
+        if name in builder:
+            raise ValueError(f"Duplicate aerator name: {name}")
+        builder.set(name, values)
+    return builder.write(path)
+
+
+class Catalog:
+    """Read-only view of a mapped catalog file."""
+
+    def __init__(self, path: str) -> None:
+        if sys.byteorder != "little":
+            raise ValueError("Catalogs are only mapped on little-endian hosts")
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.path = path
+        self.identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        (
+            magic,
+            version,
+            self.count,
+            num_columns,
+            num_temperatures,
+            data_offset,
+            names_offset,
+        ) = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(
+                f"{path} is not a version {FORMAT_VERSION} catalog"
+            )
+        if num_columns != len(COLUMNS):
+            raise ValueError(f"{path} has an unexpected column layout")
+        view = memoryview(self._map)
+        self.temperatures = view[
+            HEADER.size:HEADER.size + 8 * num_temperatures
+        ].cast("d")
+        data = view[data_offset:names_offset].cast("d")
+        self._columns = {
+            name: data[j * self.count:(j + 1) * self.count]
+            for j, name in enumerate(COLUMNS)
+        }
+        self._otr_t = [
+            data[j * self.count:(j + 1) * self.count]
+            for j in range(num_columns, num_columns + num_temperatures)
+        ]
+        names_start = names_offset + 4 * (self.count + 1)
+        self._name_offsets = view[names_offset:names_start].cast("I")
+        self._names = view[names_start:]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def column(self, name: str) -> memoryview:
+        """One column of float64 values, mapped in place."""
+        return self._columns[name]
+
+    def name(self, index: int) -> str:
+        start, end = self._name_offsets[index], self._name_offsets[index + 1]
+        return bytes(self._names[start:end]).decode()
+
+    def index(self, name: str) -> Optional[int]:
+        """Position of an aerator by name, by binary search."""
+        i = bisect.bisect_left(range(self.count), name, key=self.name)
+        if i < self.count and self.name(i) == name:
+            return i
+        return None
+
+    def otr_t(self, index: int, temperature: float) -> float:
+        """OTR_T without field conditions, from the precomputed grid
+        when ``temperature`` is on it."""
+        t = bisect.bisect_left(self.temperatures, temperature)
+        if t < len(self.temperatures) and self.temperatures[t] == temperature:
+            return self._otr_t[t][index]
+        return calculate_otr_t(self._columns["sotr"][index], temperature)
+
+    def aerator(self, index: int) -> Aerator:
+        return Aerator(
+            self.name(index),
+            *(self._columns[f][index] for f in FIELDS),
+        )
+
+    def entry(
+        self, index: int, temperature: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """An aerator and its invariants as a JSON-ready dict."""
+        entry: Dict[str, Any] = {"name": self.name(index)}
+        for name in COLUMNS:
+            entry[name] = self._columns[name][index]
+        entry["power_kw"] = float(f"{entry['power_kw']:.3f}")
+        if temperature is not None:
+            entry["otr_t"] = self.otr_t(index, temperature)
+        return entry
+
+    def search(
+        self,
+        min_sae: Optional[float] = None,
+        max_cost: Optional[float] = None,
+        min_sotr: Optional[float] = None,
+    ) -> Iterator[int]:
+        """Indices of aerators passing every given bound."""
+        sae = self._columns["sae"]
+        cost = self._columns["cost"]
+        sotr = self._columns["sotr"]
+        for i in range(self.count):
+            if min_sae is not None and sae[i] < min_sae:
+                continue
+            if max_cost is not None and cost[i] > max_cost:
+                continue
+            if min_sotr is not None and sotr[i] < min_sotr:
+                continue
+            yield i
+
+
+class CatalogHandle:
+    """The current catalog at ``path``, remapped when the file is
+    replaced."""
+
+    def __init__(self, path: str, check_seconds: float = CHECK_SECONDS):
+        self.path = path
+        self.check_seconds = check_seconds
+        self._catalog: Optional[Catalog] = None
+        self._checked = float("-inf")
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[Catalog]:
+        """The mapped catalog, or None when there is no file yet."""
+        now = time.monotonic()
+        current = self._catalog
+        if current is not None and now - self._checked < self.check_seconds:
+            return current
+        with self._lock:
+            self._checked = now
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._catalog = None
+                return None
+            identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            if self._catalog is None or self._catalog.identity != identity:
+                # The old mapping is released once no reader holds it
+                self._catalog = Catalog(self.path)
+            return self._catalog
+
+    def replace(self, aerators: List[Dict[str, Any]]) -> int:
+        """Build a new catalog and swap it in for every worker."""
+        count = build_catalog(aerators, self.path)
+        self.reload()
+        return count
+
+    def reload(self) -> None:
+        """Check for a new file on the next ``get``."""
+        with self._lock:
+            self._checked = float("-inf")
+
+
+catalog: Optional[CatalogHandle] = (
+    CatalogHandle(CATALOG_PATH) if CATALOG_PATH else None
+)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("source", help="JSON list of aerators")
+    parser.add_argument("output", help="Catalog file to write")
+    args = parser.parse_args(argv)
+    with open(args.source, encoding="utf-8") as f:
+        aerators = json.load(f)
+    count = build_catalog(aerators, args.output)
+    print(f"Wrote {count} aerators to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+"""catalog_import.py
+This module imports supplier spreadsheets into the aerator catalog (see
+``catalog.py``). CSV and XLSX files are read one row at a time, headers
+are matched against common supplier spellings, units are converted
+(power in kW or W to ``power_hp`` using ``HP_TO_KW``) and rows are
+validated and deduplicated by name. Rows go straight into the compact
+columns of a ``CatalogBuilder``, so memory grows with the number of
+distinct aerators rather than with the size of the file.
+
+An incremental import starts from the current catalog and only
+recomputes the rows whose values changed; rows missing from the file
+are kept. A full import drops them.
+
+XLSX sheets are parsed with the standard library (``zipfile`` and
+``xml.etree.ElementTree.iterparse``), reading the first worksheet.
+
+Usage:
+    python -m backend.api.core.catalog_import supplier.xlsx catalog.bin
+    python -m backend.api.core.catalog_import supplier.csv catalog.bin --full
+"""
+
+import csv
+import io
+import os
+import re
+import sys
+import zipfile
+from typing import (
+    IO,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+)
+from xml.etree.ElementTree import Element, ParseError, iterparse
+
+from .aerator_comparer import HP_TO_KW
+from .catalog import FIELDS, Catalog, CatalogBuilder, check_fields
+
+MAX_ERRORS = 100  # rejected rows reported individually
+
+# Normalized header -> (field, factor converting the value to the field)
+HEADER_ALIASES: Dict[str, Tuple[str, float]] = {
+    "name": ("name", 1),
+    "model": ("name", 1),
+    "aerator": ("name", 1),
+    "power_hp": ("power_hp", 1),
+    "hp": ("power_hp", 1),
+    "power_kw": ("power_hp", 1 / HP_TO_KW),
+    "kw": ("power_hp", 1 / HP_TO_KW),
+    "power_w": ("power_hp", 1 / (1000 * HP_TO_KW)),
+    "sotr": ("sotr", 1),
+    "sotr_kg_o2_h": ("sotr", 1),
+    "sotr_g_o2_h": ("sotr", 1 / 1000),
+    "cost": ("cost", 1),
+    "price": ("cost", 1),
+    "price_usd": ("cost", 1),
+    "durability": ("durability", 1),
+    "durability_years": ("durability", 1),
+    "lifespan_years": ("durability", 1),
+    "maintenance": ("maintenance", 1),
+    "maintenance_usd_year": ("maintenance", 1),
+    "annual_maintenance": ("maintenance", 1),
+}
+
+XLSX_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = (
+    "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+)
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+class ImportReport(NamedTuple):
+    rows: int
+    added: int
+    updated: int
+    unchanged: int
+    removed: int
+    duplicates: int
+    rejected: int
+    errors: List[str]
+    aerators: int
+
+    def to_dict(self) -> Dict[str, object]:
+        return self._asdict()
+
+
+def normalize_header(header: str) -> str:
+    """``Power (kW)`` -> ``power_kw``."""
+    return re.sub(r"[^a-z0-9]+", "_", header.strip().lower()).strip("_")
+
+
+def header_mapping(
+    headers: Iterable[str],
+) -> Dict[str, Tuple[str, float]]:
+    """Catalog field and unit factor per recognised column header."""
+    mapping: Dict[str, Tuple[str, float]] = {}
+    for header in headers:
+        alias = HEADER_ALIASES.get(normalize_header(header or ""))
+        if alias is not None:
+            mapping[header] = alias
+    missing = {"name", *FIELDS} - {field for field, _ in mapping.values()}
+    if missing:
+        raise ValueError(
+            "Missing catalog columns: " + ", ".join(sorted(missing))
+        )
+    return mapping
+
+
+def parse_row(
+    row: Dict[str, str], mapping: Dict[str, Tuple[str, float]]
+) -> Tuple[str, List[float]]:
+    """Name and ``FIELDS`` values of one spreadsheet row."""
+    parsed: Dict[str, float] = {}
+    name = ""
+    for header, (field, factor) in mapping.items():
+        value = (row.get(header) or "").strip()
+        if field == "name":
+            name = value
+            continue
+        if not value:
+            raise ValueError(f"missing {field}")
+        try:
+            parsed[field] = float(value.replace(",", "")) * factor
+        except ValueError:
+            raise ValueError(f"non-numeric {field}: {value!r}")
+    if not name:
+        raise ValueError("missing name")
+    check_fields(parsed)
+    return name, [parsed[f] for f in FIELDS]
+
+
+def read_csv_rows(
+    lines: Iterable[str], headers: Optional[List[str]] = None
+) -> Iterator[Dict[str, str]]:
+    """Stream rows of a CSV file as header -> value dicts.
+
+    The header row is added to ``headers`` when given, so it is known
+    even for a file without data rows.
+    """
+    reader = csv.DictReader(lines)
+    try:
+        if headers is not None:
+            headers.extend(reader.fieldnames or [])
+        yield from reader
+    except csv.Error as e:
+        raise ValueError(f"CSV line {reader.line_num}: {e}")
+
+
+def _column_index(reference: str) -> int:
+    # "AB12" -> 27 (zero-based column of the cell)
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord("A") + 1
+    return index - 1
+
+
+def _iterparse(
+    archive: zipfile.ZipFile, member: str, events: Tuple[str, ...] = ("end",)
+) -> Iterator[Tuple[str, Element]]:
+    # Malformed XML is a bad upload, not a server error
+    with archive.open(member) as f:
+        try:
+            yield from iterparse(f, events=events)
+        except ParseError as e:
+            raise ValueError(f"Workbook part {member} is not valid XML: {e}")
+
+
+def _first_sheet(archive: zipfile.ZipFile) -> str:
+    for _, element in _iterparse(archive, "xl/workbook.xml"):
+        if element.tag == f"{XLSX_NS}sheet":
+            rel_id = element.get(f"{REL_NS}id")
+            break
+    else:
+        raise ValueError("Workbook has no sheets")
+    for _, element in _iterparse(archive, "xl/_rels/workbook.xml.rels"):
+        if (
+            element.tag == f"{PKG_REL_NS}Relationship"
+            and element.get("Id") == rel_id
+        ):
+            target = element.get("Target", "")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return "xl/" + target
+    raise ValueError("Workbook sheet not found")
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings: List[str] = []
+    table = None
+    for event, element in _iterparse(
+        archive, "xl/sharedStrings.xml", ("start", "end")
+    ):
+        if event == "start":
+            if element.tag == f"{XLSX_NS}sst":
+                table = element
+        elif element.tag == f"{XLSX_NS}si":
+            strings.append(
+                "".join(t.text or "" for t in element.iter(f"{XLSX_NS}t"))
+            )
+            if table is not None:
+                table.clear()
+    return strings
+
+
+def read_xlsx_rows(
+    file: IO[bytes], headers: Optional[List[str]] = None
+) -> Iterator[Dict[str, str]]:
+    """Stream rows of the first worksheet as header -> value dicts.
+
+    Only the current row is held in memory, plus the workbook's shared
+    string table. The header row is added to ``headers`` when given.
+    """
+    if headers is None:
+        headers = []
+    with zipfile.ZipFile(file) as archive:
+        strings = _shared_strings(archive)
+        header_row: Optional[List[str]] = None
+        sheet_data = None
+        for event, element in _iterparse(
+            archive, _first_sheet(archive), ("start", "end")
+        ):
+            if event == "start":
+                if element.tag == f"{XLSX_NS}sheetData":
+                    sheet_data = element
+                continue
+            if element.tag != f"{XLSX_NS}row":
+                continue
+            cells: Dict[int, str] = {}
+            for position, cell in enumerate(element.iter(f"{XLSX_NS}c")):
+                reference = cell.get("r")
+                column = _column_index(reference) if reference else position
+                kind = cell.get("t")
+                if kind == "inlineStr":
+                    value = "".join(
+                        t.text or "" for t in cell.iter(f"{XLSX_NS}t")
+                    )
+                else:
+                    v = cell.find(f"{XLSX_NS}v")
+                    value = (v.text or "") if v is not None else ""
+                    if kind == "s" and value:
+                        value = strings[int(value)]
+                cells[column] = value
+            # Drop parsed rows so memory stays flat
+            if sheet_data is not None:
+                sheet_data.clear()
+            if not cells:
+                continue
+            width = max(cells) + 1
+            values = [cells.get(i, "") for i in range(width)]
+            if header_row is None:
+                header_row = values
+                headers.extend(values)
+                continue
+            yield dict(zip(header_row, values))
+
+
+def import_rows(
+    rows: Iterable[Dict[str, str]],
+    path: str,
+    incremental: bool = True,
+    headers: Optional[List[str]] = None,
+) -> ImportReport:
+    """Validate spreadsheet rows and write them to the catalog at
+    ``path``.
+
+    Invalid rows are rejected and reported without stopping the import.
+    Within one file the last row of a name wins. ``headers`` (filled by
+    the row readers) validates the columns of a file without data rows.
+    A full import without any valid row is refused rather than emptying
+    the catalog.
+    """
+    builder = CatalogBuilder()
+    if os.path.exists(path):
+        builder = CatalogBuilder.from_catalog(Catalog(path))
+    existing = len(builder)
+    counts = {"added": 0, "updated": 0, "unchanged": 0}
+    seen: Set[str] = set()
+    errors: List[str] = []
+    total = duplicates = rejected = 0
+    mapping: Optional[Dict[str, Tuple[str, float]]] = None
+    # Line 1 holds the headers
+    for line, row in enumerate(rows, start=2):
+        if mapping is None:
+            mapping = header_mapping(row.keys())
+        total += 1
+        try:
+            name, values = parse_row(row, mapping)
+        except ValueError as e:
+            rejected += 1
+            if len(errors) < MAX_ERRORS:
+                errors.append(f"Row {line}: {e}")
+            continue
+        if name in seen:
+            duplicates += 1
+        seen.add(name)
+        outcome = builder.set(name, values)
+        counts[outcome] += 1
+    if mapping is None:
+        header_mapping(headers or [])
+    if not incremental and not seen:
+        raise ValueError("A full import needs at least one valid row")
+
+    # A row updated by a later duplicate counts once
+    changed = counts["added"] + counts["updated"]
+    keep = None if incremental else seen
+    removed = 0 if incremental else existing + counts["added"] - len(seen)
+    aerators = len(builder) if incremental else len(seen)
+    if changed or removed or not os.path.exists(path):
+        aerators = builder.write(path, keep)
+    return ImportReport(
+        rows=total,
+        added=counts["added"],
+        updated=counts["updated"],
+        unchanged=counts["unchanged"],
+        removed=removed,
+        duplicates=duplicates,
+        rejected=rejected,
+        errors=errors,
+        aerators=aerators,
+    )
+
+
+def import_file(
+    source: str, path: str, incremental: bool = True
+) -> ImportReport:
+    """Import a ``.csv`` or ``.xlsx`` file into the catalog at ``path``."""
+    headers: List[str] = []
+    if source.lower().endswith(".xlsx"):
+        with open(source, "rb") as f:
+            rows = read_xlsx_rows(f, headers)
+            return import_rows(rows, path, incremental, headers)
+    with open(source, encoding="utf-8-sig", newline="") as f:
+        rows = read_csv_rows(f, headers)
+        return import_rows(rows, path, incremental, headers)
+
+
+def import_stream(
+    file: IO[bytes], file_format: str, path: str, incremental: bool = True
+) -> ImportReport:
+    """Import an uploaded ``csv`` or ``xlsx`` body into the catalog."""
+    headers: List[str] = []
+    if file_format == "xlsx":
+        rows = read_xlsx_rows(file, headers)
+        return import_rows(rows, path, incremental, headers)
+    if file_format == "csv":
+        lines = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        rows = read_csv_rows(lines, headers)
+        return import_rows(rows, path, incremental, headers)
+    raise ValueError("Format must be 'csv' or 'xlsx'")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("source", help="Supplier .csv or .xlsx file")
+    parser.add_argument("catalog", help="Catalog file to update")
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Drop catalog aerators missing from the file",
+    )
+    args = parser.parse_args(argv)
+    report = import_file(args.source, args.catalog, not args.full)
+    print(
+        f"{report.rows} rows: {report.added} added, {report.updated} "
+        f"updated, {report.unchanged} unchanged, {report.removed} removed, "
+        f"{report.duplicates} duplicates, {report.rejected} rejected; "
+        f"{report.aerators} aerators in {args.catalog}"
+    )
+    for error in report.errors:
+        print(f"  {error}")
+    return 1 if report.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
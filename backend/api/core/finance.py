@@ -0,0 +1,218 @@
+"""finance.py
+This module builds loan amortization, depreciation and income-tax
+schedules for the financial model. Every schedule is linear in the
+amount invested, so it is built once per request for one unit of
+capital and scaled for each aerator instead of being rebuilt per
+aerator.
+"""
+
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+try:
+    from .models import FinancialInput
+except ImportError:
+    # When imported by aerator_comparer running as a standalone script
+    from models import FinancialInput
+
+DEPRECIATION_METHODS = ("none", "straight_line", "declining_balance")
+
+
+class UnitSchedule(NamedTuple):
+    """Schedules per unit of capex, indexed by years after purchase."""
+
+    payment: Tuple[float, ...]
+    interest: Tuple[float, ...]
+    depreciation: Tuple[float, ...]
+
+
+def has_financing(financial: FinancialInput) -> bool:
+    """Whether any loan, tax or depreciation terms are in effect."""
+    return (
+        financial.loan_fraction > 0
+        or financial.tax_rate > 0
+        or financial.depreciation_method != "none"
+    )
+
+
+def validate_financing(financial: FinancialInput) -> Optional[str]:
+    """Return an error message for invalid financing terms, if any."""
+    if not 0 <= financial.loan_fraction <= 1:
+        return "Loan fraction must be between 0 and 1"
+    if financial.loan_fraction > 0 and financial.loan_term <= 0:
+        return "Loan term must be positive"
+    if financial.loan_rate <= -1:
+        return "Loan rate must be greater than -100%"
+    if not 0 <= financial.tax_rate < 1:
+        return "Tax rate must be between 0 and 1"
+    if financial.depreciation_method not in DEPRECIATION_METHODS:
+        return (
+            "Depreciation method must be one of: "
+            + ", ".join(DEPRECIATION_METHODS)
+        )
+    if (
+        financial.depreciation_method != "none"
+        and financial.depreciation_years <= 0
+    ):
+        return "Depreciation years must be positive"
+    return None
+
+
+def loan_schedule(
+    rate: float, term: int, length: int
+) -> Tuple[List[float], List[float]]:
+    """Annuity payments and interest for one unit of principal."""
+    payment = [0.0] * length
+    interest = [0.0] * length
+    if term <= 0:
+        return payment, interest
+    if abs(rate) < 1e-12:
+        installment = 1 / term
+    else:
+        installment = rate / (1 - (1 + rate) ** -term)
+    balance = 1.0
+    for k in range(1, min(term, length - 1) + 1):
+        interest[k] = balance * rate
+        payment[k] = installment
+        balance -= installment - interest[k]
+    return payment, interest
+
+
+def depreciation_schedule(
+    method: str, years: int, factor: float, length: int
+) -> List[float]:
+    """Depreciation of one unit of asset cost per year after purchase.
+
+    Declining balance switches to straight line on the remaining book
+    value once that gives the larger charge, so the asset is fully
+    depreciated after ``years``.
+    """
+    schedule = [0.0] * length
+    if method == "none" or years <= 0:
+        return schedule
+    if method == "straight_line":
+        for k in range(1, min(years, length - 1) + 1):
+            schedule[k] = 1 / years
+        return schedule
+    book_value = 1.0
+    rate = factor / years
+    for k in range(1, min(years, length - 1) + 1):
+        charge = max(book_value * rate, book_value / (years - k + 1))
+        schedule[k] = min(charge, book_value)
+        book_value -= schedule[k]
+    return schedule
+
+
+@lru_cache(maxsize=64)
+def unit_schedule(
+    loan_rate: float,
+    loan_term: int,
+    depreciation_method: str,
+    depreciation_years: int,
+    declining_balance_factor: float,
+    length: int,
+) -> UnitSchedule:
+    """Shared loan and depreciation schedules for one unit of capex."""
+    payment, interest = loan_schedule(loan_rate, loan_term, length)
+    depreciation = depreciation_schedule(
+        depreciation_method,
+        depreciation_years,
+        declining_balance_factor,
+        length,
+    )
+    return UnitSchedule(tuple(payment), tuple(interest), tuple(depreciation))
+
+
+def financial_unit_schedule(
+    financial: FinancialInput, length: int
+) -> UnitSchedule:
+    """Unit schedule for the financing terms of a request."""
+    return unit_schedule(
+        financial.loan_rate,
+        financial.loan_term,
+        financial.depreciation_method,
+        financial.depreciation_years,
+        financial.declining_balance_factor,
+        length,
+    )
+
+
+def unit_investment_flows(financial: FinancialInput) -> List[float]:
+    """After-tax savings flow per unit of extra investment, years 1..H.
+
+    Extra investment adds debt service (a cost) and earns tax shields on
+    depreciation and loan interest.
+    """
+    schedule = financial_unit_schedule(financial, financial.horizon + 1)
+    lf = financial.loan_fraction
+    tax = financial.tax_rate
+    return [
+        tax * (d + lf * i) - lf * p
+        for p, i, d in zip(
+            schedule.payment[1:],
+            schedule.interest[1:],
+            schedule.depreciation[1:],
+        )
+    ]
+
+
+def after_tax_savings(
+    annual_savings: List[float],
+    additional_cost: float,
+    unit_flows: List[float],
+    financial: FinancialInput,
+) -> Tuple[float, List[float]]:
+    """Equity investment and after-tax savings flows for one aerator."""
+    investment = additional_cost * (1 - financial.loan_fraction)
+    flows = [
+        float(f"{s * (1 - financial.tax_rate) + additional_cost * u:.2f}")
+        for s, u in zip(annual_savings, unit_flows)
+    ]
+    return investment, flows
+
+
+def _convolve(events: List[float], kernel: Tuple[float, ...]) -> List[float]:
+    # Capex is sparse (purchase and replacement years), so only the
+    # non-zero events are spread over the kernel
+    out = [0.0] * len(events)
+    for s, amount in enumerate(events):
+        if amount:
+            for y in range(s, len(events)):
+                out[y] += amount * kernel[y - s]
+    return out
+
+
+def after_tax_costs(
+    capex: List[List[float]],
+    opex: List[List[float]],
+    financial: FinancialInput,
+) -> Tuple[List[List[float]], List[List[float]], List[List[float]]]:
+    """After-tax cost rows, debt service and tax shields for a ledger.
+
+    Capex is paid ``1 - loan_fraction`` up front and the rest through
+    loan installments; operating costs, depreciation and loan interest
+    are deductible at ``tax_rate``.
+    """
+    length = len(capex[0]) if capex else 0
+    schedule = financial_unit_schedule(financial, length)
+    lf = financial.loan_fraction
+    tax = financial.tax_rate
+    totals: List[List[float]] = []
+    debt_service: List[List[float]] = []
+    tax_shield: List[List[float]] = []
+    for capex_row, opex_row in zip(capex, opex):
+        payments = _convolve(capex_row, schedule.payment)
+        interest = _convolve(capex_row, schedule.interest)
+        depreciation = _convolve(capex_row, schedule.depreciation)
+        debt_row = [lf * p for p in payments]
+        shield_row = [
+            tax * (o + d + lf * i)
+            for o, d, i in zip(opex_row, depreciation, interest)
+        ]
+        totals.append([
+            c * (1 - lf) + p + o - t
+            for c, p, o, t in zip(capex_row, debt_row, opex_row, shield_row)
+        ])
+        debt_service.append(debt_row)
+        tax_shield.append(shield_row)
+    return totals, debt_service, tax_shield
@@ -0,0 +1,372 @@
+"""history.py
+This module keeps a local SQLite history of served comparisons: the
+inputs, the winner and one row per ``AeratorResult``, indexed by farm,
+aerator name, date and winner. Requests only put the comparison on an
+in-memory queue; a background thread writes the queue in batched
+transactions, so persistence adds no latency to the response. Queries
+such as "every comparison Aerator X won in the last 90 days" read the
+stored rows instead of recomputing.
+
+Enabled by setting ``AERASYNC_HISTORY_DB`` to a database path.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from .models import AeratorResult
+
+if TYPE_CHECKING:
+    import sqlite3
+
+DB_PATH = os.environ.get("AERASYNC_HISTORY_DB", "")
+BATCH_SIZE = 200
+FLUSH_SECONDS = 1.0
+MAX_QUEUE = 10000  # comparisons waiting to be written before dropping
+MAX_QUERY_ROWS = 1000
+
+# Every AeratorResult field except the name is numeric
+RESULT_COLUMNS = AeratorResult._fields[1:]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS comparisons (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    farm_id TEXT,
+    winner TEXT,
+    tod REAL,
+    farm_area_ha REAL,
+    horizon INTEGER,
+    annual_revenue REAL,
+    inputs TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aerator_results (
+    comparison_id INTEGER NOT NULL REFERENCES comparisons(id),
+    name TEXT NOT NULL,
+    is_winner INTEGER NOT NULL,
+    {", ".join(f"{c} REAL" for c in RESULT_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS comparisons_created
+    ON comparisons(created_at);
+CREATE INDEX IF NOT EXISTS comparisons_farm
+    ON comparisons(farm_id, created_at);
+CREATE INDEX IF NOT EXISTS comparisons_winner
+    ON comparisons(winner, created_at);
+CREATE INDEX IF NOT EXISTS aerator_results_name
+    ON aerator_results(name, comparison_id);
+CREATE INDEX IF NOT EXISTS aerator_results_comparison
+    ON aerator_results(comparison_id);
+"""
+
+Entry = Tuple[float, Dict[str, Any], Dict[str, Any]]
+
+
+def _connect(path: str) -> "sqlite3.Connection":
+    import sqlite3
+
+    connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    # Readers are not blocked by the batched writer
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+def _number(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class HistoryStore:
+    """Comparison history in one SQLite database."""
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_SECONDS,
+        max_queue: int = MAX_QUEUE,
+    ) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.failed = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+        self._initialized = False
+
+    def _init_db(self) -> None:
+        with self._lock:
+            if self._initialized:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = _connect(self.path)
+            try:
+                connection.executescript(SCHEMA)
+            finally:
+                connection.close()
+            self._initialized = True
+
+    def record(self, inputs: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """Queue a served comparison; never blocks the caller."""
+        if "error" in result:
+            return
+        if self._writer is None:
+            self._start()
+        try:
+            self._queue.put_nowait((time.time(), inputs, result))
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop,
+                    name="aerasync-history",
+                    daemon=True,
+                )
+                self._writer.start()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far has been written."""
+        if self._writer is None:
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def _write_loop(self) -> None:
+        self._init_db()
+        connection = _connect(self.path)
+        while True:
+            batch: List[Entry] = []
+            waiting: List[threading.Event] = []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    self._write(connection, batch)
+                    connection.close()
+                    for event in waiting:
+                        event.set()
+                    return
+                if isinstance(item, threading.Event):
+                    waiting.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(
+                        timeout=max(deadline - time.monotonic(), 0)
+                    )
+                except queue.Empty:
+                    break
+            self._write(connection, batch)
+            for event in waiting:
+                event.set()
+
+    def _write(
+        self, connection: "sqlite3.Connection", batch: List[Entry]
+    ) -> None:
+        if not batch:
+            return
+        import sqlite3
+
+        try:
+            self._insert(connection, batch)
+        except sqlite3.Error:
+            # Keep the writer alive; the batch is lost
+            self.failed += len(batch)
+
+    def _insert(
+        self, connection: "sqlite3.Connection", batch: List[Entry]
+    ) -> None:
+        placeholders = ", ".join("?" * (len(RESULT_COLUMNS) + 3))
+        insert_result = (
+            "INSERT INTO aerator_results (comparison_id, name, is_winner, "
+            f"{', '.join(RESULT_COLUMNS)}) VALUES ({placeholders})"
+        )
+        # One transaction per batch
+        with connection:
+            for created_at, inputs, result in batch:
+                farm = inputs.get("farm") or {}
+                financial = inputs.get("financial") or {}
+                winner = result.get("winnerLabel")
+                cursor = connection.execute(
+                    "INSERT INTO comparisons (created_at, farm_id, winner, "
+                    "tod, farm_area_ha, horizon, annual_revenue, inputs, "
+                    "result) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        created_at,
+                        farm.get("farm_id"),
+                        winner,
+                        _number(farm.get("tod")),
+                        _number(farm.get("farm_area_ha")),
+                        _number(financial.get("horizon")),
+                        _number(result.get("annual_revenue")),
+                        json.dumps(inputs),
+                        json.dumps(result),
+                    ),
+                )
+                connection.executemany(
+                    insert_result,
+                    [
+                        (
+                            cursor.lastrowid,
+                            r.get("name"),
+                            int(r.get("name") == winner),
+                            *(_number(r.get(c)) for c in RESULT_COLUMNS),
+                        )
+                        for r in result.get("aeratorResults", [])
+                    ],
+                )
+
+    def close(self, timeout: Optional[float] = 10) -> None:
+        """Write what is queued and stop the writer thread."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join(timeout)
+
+    def query(
+        self,
+        farm_id: Optional[str] = None,
+        aerator: Optional[str] = None,
+        winner: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 100,
+        include_result: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Stored comparisons, newest first.
+
+        ``aerator`` matches comparisons that included that aerator,
+        ``winner`` those it won; ``since`` and ``until`` are Unix times.
+        """
+        self._init_db()
+        where, params = self._filters(farm_id, winner, since, until)
+        if aerator is not None:
+            where.append(
+                "EXISTS (SELECT 1 FROM aerator_results a "
+                "WHERE a.comparison_id = c.id AND a.name = ?)"
+            )
+            params.append(aerator)
+        columns = (
+            "id, created_at, farm_id, winner, tod, farm_area_ha, horizon, "
+            "annual_revenue"
+        )
+        if include_result:
+            columns += ", inputs, result"
+        sql = f"SELECT {columns} FROM comparisons c"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        params.append(min(max(limit, 1), MAX_QUERY_ROWS))
+
+        connection = _connect(self.path)
+        try:
+            rows = [dict(row) for row in connection.execute(sql, params)]
+            if rows:
+                ids = [row["id"] for row in rows]
+                marks = ", ".join("?" * len(ids))
+                aerators: Dict[int, List[Dict[str, Any]]] = {}
+                for row in connection.execute(
+                    "SELECT * FROM aerator_results "
+                    f"WHERE comparison_id IN ({marks}) ORDER BY rowid",
+                    ids,
+                ):
+                    entry = dict(row)
+                    comparison_id = entry.pop("comparison_id")
+                    entry["is_winner"] = bool(entry["is_winner"])
+                    aerators.setdefault(comparison_id, []).append(entry)
+                for row in rows:
+                    row["aerators"] = aerators.get(row["id"], [])
+                    if include_result:
+                        row["inputs"] = json.loads(row["inputs"])
+                        row["result"] = json.loads(row["result"])
+        finally:
+            connection.close()
+        return rows
+
+    def winners(
+        self,
+        farm_id: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Dict[str, int]:
+        """Number of stored comparisons won by each aerator."""
+        self._init_db()
+        where, params = self._filters(farm_id, None, since, until)
+        sql = "SELECT winner, COUNT(*) FROM comparisons c"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " GROUP BY winner ORDER BY COUNT(*) DESC"
+        connection = _connect(self.path)
+        try:
+            return {
+                winner: count
+                for winner, count in connection.execute(sql, params)
+                if winner is not None
+            }
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _filters(
+        farm_id: Optional[str],
+        winner: Optional[str],
+        since: Optional[float],
+        until: Optional[float],
+    ) -> Tuple[List[str], List[Any]]:
+        where: List[str] = []
+        params: List[Any] = []
+        for clause, value in (
+            ("c.farm_id = ?", farm_id),
+            ("c.winner = ?", winner),
+            ("c.created_at >= ?", since),
+            ("c.created_at < ?", until),
+        ):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        return where, params
+
+
+store: Optional[HistoryStore] = HistoryStore(DB_PATH) if DB_PATH else None
+
+
+def strip_farm_id(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """``inputs`` without ``farm.farm_id``, which only labels history rows
+    and must not split result cache entries."""
+    farm = inputs.get("farm")
+    if not isinstance(farm, dict) or "farm_id" not in farm:
+        return inputs
+    farm = {k: v for k, v in farm.items() if k != "farm_id"}
+    return {**inputs, "farm": farm}
+
+
+def record_comparison(
+    inputs: Dict[str, Any], result: Dict[str, Any]
+) -> None:
+    """Queue a served comparison when history is enabled."""
+    if store is not None:
+        store.record(inputs, result)
+
+
+def close_history() -> None:
+    """Write queued comparisons and stop the writer."""
+    if store is not None:
+        store.close()
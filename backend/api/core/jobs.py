@@ -0,0 +1,714 @@
+"""jobs.py
+This module runs long comparisons (parameter sweeps, Monte Carlo runs,
+cycle simulations) as background jobs. Submitting returns a job ID at
+once; a small local thread pool executes the job while its progress is
+kept in memory, and the job record and result are written to an on-disk
+spool so they outlive the request and survive a restart. Jobs can be
+cancelled, an idempotency key makes resubmission safe, and the number of
+queued and running jobs is bounded. No external queue service is needed.
+
+Sweeps and Monte Carlo runs evaluate every point through a what-if
+session, so each point only recomputes the stages its parameters touch.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+import random
+import re
+import secrets
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .aerator_comparer import compare_aerators
+from .whatif import WhatIfSession
+
+SPOOL_DIR = os.environ.get(
+    "AERASYNC_JOB_SPOOL", os.path.join(tempfile.gettempdir(), "aerasync-jobs")
+)
+WORKERS = int(os.environ.get("AERASYNC_JOB_WORKERS", 2))
+MAX_PENDING = int(os.environ.get("AERASYNC_MAX_PENDING_JOBS", 16))
+JOB_TTL = 24 * 60 * 60  # seconds a finished job is kept in the spool
+MAX_POINTS = 10000  # sweep points or Monte Carlo samples per job
+JOB_ID = re.compile(r"[A-Za-z0-9_-]+")
+
+# Job attributes another worker can change through the spool
+SPOOLED_STATE = (
+    "status", "done", "total", "error", "started", "finished", "owner"
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+Progress = Callable[[int, int], None]
+Cancelled = Callable[[], bool]
+
+
+_tokens: Dict[int, str] = {}
+
+
+def process_owner() -> Dict[str, Any]:
+    """Identity of this process, stored with the jobs it runs.
+
+    The token tells this process apart from an earlier one that had the
+    same PID, and is regenerated in forked workers.
+    """
+    pid = os.getpid()
+    if pid not in _tokens:
+        _tokens[pid] = secrets.token_hex(8)
+    return {"host": socket.gethostname(), "pid": pid, "token": _tokens[pid]}
+
+
+def owner_alive(owner: Optional[Dict[str, Any]]) -> bool:
+    """Whether the process that owns a spooled job may still run it.
+
+    Jobs of other hosts sharing the spool cannot be checked and are
+    left alone. Records without an owner predate this check.
+    """
+    if not owner:
+        return False
+    current = process_owner()
+    if owner.get("host") != current["host"]:
+        return True
+    if owner.get("pid") == current["pid"]:
+        return owner.get("token") == current["token"]
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows
+        return False
+    try:
+        os.kill(int(owner["pid"]), 0)
+    except PermissionError:
+        return True  # exists, owned by another user
+    except (OSError, KeyError, TypeError, ValueError):
+        return False
+    return True
+
+
+class JobCancelled(Exception):
+    """Raised inside a runner once its job is cancelled."""
+
+
+class JobConflict(Exception):
+    """An idempotency key was reused with a different request."""
+
+
+class QueueFull(Exception):
+    """Too many jobs are queued or running."""
+
+
+class JobKind(NamedTuple):
+    validate: Callable[[Dict[str, Any]], Optional[str]]
+    run: Callable[[Dict[str, Any], Progress, Cancelled], Dict[str, Any]]
+
+
+def _path_patch(path: str, value: Any) -> Dict[str, Any]:
+    # "financial.energy_cost" -> {"financial": {"energy_cost": value}};
+    # "aerators.<name>.cost" patches one aerator by name
+    patch: Any = value
+    for key in reversed(path.split(".")):
+        patch = {key: patch}
+    return patch
+
+
+def _points_patch(values: Dict[str, Any]) -> Dict[str, Any]:
+    patch: Dict[str, Any] = {}
+    for path, value in values.items():
+        target, source = patch, _path_patch(path, value)
+        # Merge the nested single-key dicts into one patch
+        while True:
+            key, inner = next(iter(source.items()))
+            if not isinstance(inner, dict) or key not in target:
+                target[key] = inner
+                break
+            target, source = target[key], inner
+    return patch
+
+
+def _base_session(base: Dict[str, Any]) -> WhatIfSession:
+    session = WhatIfSession()
+    result, _ = session.apply(base)
+    if "error" in result:
+        raise ValueError(result["error"])
+    return session
+
+
+def validate_sweep(spec: Dict[str, Any]) -> Optional[str]:
+    """Error message for an invalid sweep, or None."""
+    parameters = spec.get("parameters")
+    if not isinstance(spec.get("base"), dict):
+        return "Sweep requires a base scenario"
+    if not isinstance(parameters, dict) or not parameters:
+        return "Sweep requires at least one parameter"
+    points = 1
+    for path, values in parameters.items():
+        if not isinstance(values, list) or not values:
+            return f"Parameter {path} must be a non-empty list of values"
+        points *= len(values)
+    if points > MAX_POINTS:
+        return f"Sweep has {points} points, the limit is {MAX_POINTS}"
+    return None
+
+
+def run_sweep(
+    spec: Dict[str, Any], progress: Progress, cancelled: Cancelled
+) -> Dict[str, Any]:
+    """Compare aerators at every combination of the parameter values.
+
+    ``parameters`` maps dotted paths into the scenario, such as
+    ``financial.energy_cost`` or ``aerators.Aerator 1.cost``, to the
+    values to try.
+    """
+    parameters: Dict[str, List[Any]] = spec["parameters"]
+    paths = list(parameters)
+    combinations = list(itertools.product(*parameters.values()))
+    session = _base_session(spec["base"])
+    points: List[Dict[str, Any]] = []
+    for i, combination in enumerate(combinations):
+        if cancelled():
+            raise JobCancelled()
+        values = dict(zip(paths, combination))
+        result, _ = session.apply(_points_patch(values))
+        points.append({"values": values, "result": result})
+        progress(i + 1, len(combinations))
+    return {"parameters": paths, "points": points}
+
+
+def _sample(rng: random.Random, distribution: Dict[str, Any]) -> float:
+    kind = distribution.get("distribution", "uniform")
+    if kind == "uniform":
+        return rng.uniform(distribution["low"], distribution["high"])
+    if kind == "normal":
+        return rng.gauss(distribution["mean"], distribution["std"])
+    if kind == "triangular":
+        return rng.triangular(
+            distribution["low"], distribution["high"], distribution["mode"]
+        )
+    raise ValueError(f"Unknown distribution: {kind}")
+
+
+def validate_monte_carlo(spec: Dict[str, Any]) -> Optional[str]:
+    """Error message for an invalid Monte Carlo run, or None."""
+    distributions = spec.get("distributions")
+    if not isinstance(spec.get("base"), dict):
+        return "Monte Carlo run requires a base scenario"
+    if not isinstance(distributions, dict) or not distributions:
+        return "Monte Carlo run requires at least one distribution"
+    try:
+        samples = int(spec.get("samples", 1000))
+        rng = random.Random(0)
+        for distribution in distributions.values():
+            _sample(rng, distribution)
+    except KeyError as e:
+        return f"Missing distribution field: {e.args[0]}"
+    except (ValueError, TypeError, AttributeError) as e:
+        return str(e) or "Invalid distribution"
+    if not 1 <= samples <= MAX_POINTS:
+        return f"Samples must be between 1 and {MAX_POINTS}"
+    return None
+
+
+def _summary(values: List[float]) -> Dict[str, float]:
+    if len(values) == 1:
+        p5 = p50 = p95 = values[0]
+    else:
+        cuts = statistics.quantiles(values, n=20, method="inclusive")
+        p5, p50, p95 = cuts[0], cuts[9], cuts[18]
+    return {
+        "mean": float(f"{statistics.fmean(values):.2f}"),
+        "p5": float(f"{p5:.2f}"),
+        "p50": float(f"{p50:.2f}"),
+        "p95": float(f"{p95:.2f}"),
+    }
+
+
+def run_monte_carlo(
+    spec: Dict[str, Any], progress: Progress, cancelled: Cancelled
+) -> Dict[str, Any]:
+    """Compare aerators over random draws of the uncertain inputs.
+
+    ``distributions`` maps dotted paths to ``uniform`` (low, high),
+    ``normal`` (mean, std) or ``triangular`` (low, high, mode) draws.
+    Reports how often each aerator wins and the spread of its NPV
+    savings; draws that make the scenario invalid are counted as
+    rejected.
+    """
+    distributions: Dict[str, Dict[str, Any]] = spec["distributions"]
+    samples = int(spec.get("samples", 1000))
+    rng = random.Random(spec.get("seed"))
+    session = _base_session(spec["base"])
+    wins: Dict[str, int] = {}
+    npv: Dict[str, List[float]] = {}
+    rejected = 0
+    for i in range(samples):
+        if cancelled():
+            raise JobCancelled()
+        values = {
+            path: _sample(rng, distribution)
+            for path, distribution in distributions.items()
+        }
+        result, _ = session.apply(_points_patch(values))
+        if "error" in result:
+            rejected += 1
+        else:
+            winner = result["winnerLabel"]
+            wins[winner] = wins.get(winner, 0) + 1
+            for aerator in result["aeratorResults"]:
+                npv.setdefault(aerator["name"], []).append(
+                    aerator["npv_savings"]
+                )
+        progress(i + 1, samples)
+    accepted = samples - rejected
+    return {
+        "samples": samples,
+        "rejected": rejected,
+        "win_probability": {
+            name: float(f"{count / accepted:.4f}")
+            for name, count in wins.items()
+        },
+        "npv_savings": {name: _summary(v) for name, v in npv.items()},
+    }
+
+
+def _run_once(
+    func: Callable[[Dict[str, Any]], Dict[str, Any]],
+) -> Callable[[Dict[str, Any], Progress, Cancelled], Dict[str, Any]]:
+    def run(
+        payload: Dict[str, Any], progress: Progress, cancelled: Cancelled
+    ) -> Dict[str, Any]:
+        result = func(payload)
+        progress(1, 1)
+        return result
+
+    return run
+
+
+def _simulate_cycle(data: Dict[str, Any]) -> Dict[str, Any]:
+    from .biomass import simulate_cycle
+
+    return simulate_cycle(data)
+
+
+def _no_validation(payload: Dict[str, Any]) -> Optional[str]:
+    return None
+
+
+KINDS: Dict[str, JobKind] = {
+    "compare": JobKind(_no_validation, _run_once(compare_aerators)),
+    "simulate": JobKind(_no_validation, _run_once(_simulate_cycle)),
+    "sweep": JobKind(validate_sweep, run_sweep),
+    "montecarlo": JobKind(validate_monte_carlo, run_monte_carlo),
+}
+
+
+def fingerprint(kind: str, payload: Dict[str, Any]) -> str:
+    """Stable hash of a job request, to match idempotent resubmissions."""
+    canonical = json.dumps([kind, payload], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class Job:
+    """State of one job; ``version`` increases on every change."""
+
+    def __init__(
+        self,
+        job_id: str,
+        kind: str,
+        request_hash: str,
+        idempotency_key: Optional[str] = None,
+    ) -> None:
+        self.id = job_id
+        self.kind = kind
+        self.request_hash = request_hash
+        self.idempotency_key = idempotency_key
+        self.owner = process_owner()
+        self.status = QUEUED
+        self.done = 0
+        self.total = 0
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.version = 0
+        self.cancel_event = threading.Event()
+        self.future: Optional[Future] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total},
+            "error": self.error,
+            "created_at": self.created,
+            "started_at": self.started,
+            "finished_at": self.finished,
+        }
+
+    def record(self) -> Dict[str, Any]:
+        """Everything needed to restore the job from the spool."""
+        return {
+            **self.to_dict(),
+            "request_hash": self.request_hash,
+            "idempotency_key": self.idempotency_key,
+            "owner": self.owner,
+        }
+
+    @classmethod
+    def from_record(cls, record: Dict[str, Any]) -> "Job":
+        job = cls(
+            record["job_id"],
+            record["kind"],
+            record["request_hash"],
+            record.get("idempotency_key"),
+        )
+        job.owner = record.get("owner")
+        job.status = record["status"]
+        job.done = record["progress"]["done"]
+        job.total = record["progress"]["total"]
+        job.error = record.get("error")
+        job.created = record["created_at"]
+        job.started = record.get("started_at")
+        job.finished = record.get("finished_at")
+        return job
+
+
+class JobStore:
+    """Jobs of this process, their worker pool and their spool."""
+
+    def __init__(
+        self,
+        spool_dir: str = SPOOL_DIR,
+        workers: int = WORKERS,
+        max_pending: int = MAX_PENDING,
+        ttl: float = JOB_TTL,
+    ) -> None:
+        self.spool_dir = spool_dir
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._keys: Dict[str, str] = {}  # idempotency key -> job ID
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _path(self, job_id: str, suffix: str = "") -> str:
+        return os.path.join(self.spool_dir, f"{job_id}{suffix}.json")
+
+    def _write(self, path: str, data: Dict[str, Any]) -> None:
+        # Atomic replace, readers never see a partial file
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def _save(self, job: Job) -> None:
+        self._write(self._path(job.id), job.record())
+
+    def _read(self, job_id: str) -> Optional[Job]:
+        try:
+            with open(self._path(job_id), encoding="utf-8") as f:
+                return Job.from_record(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _refresh(self, job_id: str, job: Optional[Job]) -> Optional[Job]:
+        # Pick up a job another worker writes to the shared spool
+        if not JOB_ID.fullmatch(job_id):
+            return job
+        spooled = self._read(job_id)
+        if spooled is None:
+            return job
+        if spooled.status not in FINISHED and not owner_alive(spooled.owner):
+            spooled.status = FAILED
+            spooled.error = "Interrupted by a server restart"
+            spooled.finished = time.time()
+            self._save(spooled)
+        if job is None:
+            self._jobs[job_id] = job = spooled
+            if job.idempotency_key:
+                self._keys[job.idempotency_key] = job.id
+        elif spooled.record() != job.record():
+            for name in SPOOLED_STATE:
+                setattr(job, name, getattr(spooled, name))
+            job.version += 1
+        return job
+
+    def _load(self) -> None:
+        # Restore jobs from a previous process, dropping expired ones.
+        # Workers can share the spool, so only jobs whose owner is gone
+        # count as interrupted.
+        if self._loaded:
+            return
+        self._loaded = True
+        os.makedirs(self.spool_dir, exist_ok=True)
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.spool_dir):
+            if not name.endswith(".json") or name.endswith(".result.json"):
+                continue
+            job = self._read(name[: -len(".json")])
+            if job is None:
+                continue
+            if job.created < cutoff:
+                self._remove(job)
+                continue
+            if job.status not in FINISHED and not owner_alive(job.owner):
+                job.status = FAILED
+                job.error = "Interrupted by a server restart"
+                job.finished = time.time()
+                self._save(job)
+            self._jobs[job.id] = job
+            if job.idempotency_key:
+                self._keys[job.idempotency_key] = job.id
+
+    def _key_path(self, idempotency_key: str) -> str:
+        digest = hashlib.sha256(idempotency_key.encode()).hexdigest()
+        return os.path.join(self.spool_dir, f"{digest}.key")
+
+    def _claim_key(self, idempotency_key: str, job_id: str) -> Optional[str]:
+        # The first worker to link the key file owns the key; returns the
+        # job ID of an earlier claim, or None once claimed
+        path = self._key_path(idempotency_key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(job_id)
+        try:
+            for _ in range(2):
+                try:
+                    # Creates the file with its content or fails, atomically
+                    os.link(tmp, path)
+                    return None
+                except FileExistsError:
+                    claimed = self._spooled_key(idempotency_key)
+                    if claimed is not None and self._read(claimed) is not None:
+                        return claimed
+                    # The earlier job expired, so the key is free again
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            return self._spooled_key(idempotency_key)
+        finally:
+            os.remove(tmp)
+
+    def _spooled_key(self, idempotency_key: str) -> Optional[str]:
+        try:
+            with open(self._key_path(idempotency_key), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _cancelled(self, job: Job) -> bool:
+        # Other workers request a cancel through a marker in the spool
+        if not job.cancel_event.is_set() and os.path.exists(
+            self._path(job.id, ".cancel")
+        ):
+            job.cancel_event.set()
+        return job.cancel_event.is_set()
+
+    def _remove(self, job: Job) -> None:
+        paths = [
+            self._path(job.id),
+            self._path(job.id, ".result"),
+            self._path(job.id, ".cancel"),
+        ]
+        if job.idempotency_key and self._spooled_key(
+            job.idempotency_key
+        ) == job.id:
+            paths.append(self._key_path(job.idempotency_key))
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._jobs.pop(job.id, None)
+        if self._keys.get(job.idempotency_key or "") == job.id:
+            del self._keys[job.idempotency_key or ""]
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.ttl
+        for job in list(self._jobs.values()):
+            if job.status in FINISHED and (job.finished or 0) < cutoff:
+                self._remove(job)
+
+    def submit(
+        self,
+        kind: str,
+        payload: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+    ) -> Tuple[Job, bool]:
+        """Queue a job; returns the job and whether it was created.
+
+        Resubmitting with the same idempotency key returns the original
+        job instead of starting another one.
+        """
+        if kind not in KINDS:
+            raise ValueError(
+                f"Unknown job kind: {kind}. Expected one of: "
+                + ", ".join(sorted(KINDS))
+            )
+        if not isinstance(payload, dict):
+            raise ValueError("Job payload must be an object")
+        error = KINDS[kind].validate(payload)
+        if error:
+            raise ValueError(error)
+        request_hash = fingerprint(kind, payload)
+        with self._lock:
+            self._load()
+            self._expire()
+            existing = self._existing(idempotency_key, request_hash)
+            if existing is not None:
+                return existing, False
+            pending = sum(
+                1 for j in self._jobs.values() if j.status not in FINISHED
+            )
+            if pending >= self.max_pending:
+                raise QueueFull(
+                    f"Too many pending jobs (limit {self.max_pending})"
+                )
+            job = Job(
+                secrets.token_urlsafe(12),
+                kind,
+                request_hash,
+                idempotency_key,
+            )
+            self._save(job)
+            if idempotency_key:
+                # Another worker may have taken the key meanwhile
+                if self._claim_key(idempotency_key, job.id) is not None:
+                    os.remove(self._path(job.id))
+                    existing = self._existing(idempotency_key, request_hash)
+                    if existing is not None:
+                        return existing, False
+                self._keys[idempotency_key] = job.id
+            self._jobs[job.id] = job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="aerasync-job",
+                )
+            job.future = self._executor.submit(self._run, job, payload)
+        return job, True
+
+    def _update(self, job: Job, save: bool = False, **changes: Any) -> None:
+        with self._lock:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.version += 1
+            if save:
+                self._save(job)
+
+    def _existing(
+        self, idempotency_key: Optional[str], request_hash: str
+    ) -> Optional[Job]:
+        # Job of a reused key, from this worker or from the spool
+        if not idempotency_key:
+            return None
+        job_id = self._keys.get(idempotency_key) or self._spooled_key(
+            idempotency_key
+        )
+        if job_id is None:
+            return None
+        job = self._jobs.get(job_id) or self._refresh(job_id, None)
+        if job is None:
+            return None
+        if job.request_hash != request_hash:
+            raise JobConflict(
+                "Idempotency key was already used for a different request"
+            )
+        return job
+
+    def _run(self, job: Job, payload: Dict[str, Any]) -> None:
+        if self._cancelled(job):
+            self._update(
+                job, save=True, status=CANCELLED, finished=time.time()
+            )
+            return
+        self._update(job, save=True, status=RUNNING, started=time.time())
+
+        def progress(done: int, total: int) -> None:
+            self._update(job, done=done, total=total)
+
+        try:
+            result = KINDS[job.kind].run(
+                payload, progress, lambda: self._cancelled(job)
+            )
+            if "error" in result:
+                raise ValueError(result["error"])
+            self._write(self._path(job.id, ".result"), result)
+        except JobCancelled:
+            status, error = CANCELLED, None
+        except Exception as e:
+            status, error = FAILED, str(e)
+        else:
+            status, error = SUCCEEDED, None
+        self._update(
+            job, save=True, status=status, error=error, finished=time.time()
+        )
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Job by ID, or None when unknown or expired."""
+        with self._lock:
+            self._load()
+            job = self._jobs.get(job_id)
+            if job is None or (
+                job.status not in FINISHED and job.future is None
+            ):
+                # Submitted to or running in another worker
+                job = self._refresh(job_id, job)
+            return job
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Spooled result of a succeeded job."""
+        try:
+            with open(self._path(job_id, ".result"), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are unchanged.
+
+        A running job stops at its next progress step. Jobs of other
+        workers get a cancel marker in the spool that their owner checks
+        at every step.
+        """
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED:
+            return job
+        if job.future is None:
+            with open(self._path(job.id, ".cancel"), "w"):
+                pass
+            return job
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            # Never started, so no worker will record the outcome
+            self._update(
+                job, save=True, status=CANCELLED, finished=time.time()
+            )
+        return job
+
+    def shutdown(self) -> None:
+        """Cancel the jobs of this process and stop the worker pool."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            running = list(self._jobs.values())
+        for job in running:
+            # Jobs of other workers sharing the spool keep running
+            if job.status not in FINISHED and job.future is not None:
+                self.cancel(job.id)
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+jobs = JobStore()
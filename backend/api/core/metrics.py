@@ -0,0 +1,288 @@
+"""metrics.py
+This module keeps process-local request and compute statistics and
+renders them in the Prometheus text exposition format. Metrics are
+plain counters, gauges and cumulative-bucket histograms keyed by label
+values, so recording one is a dictionary update under a lock.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Tuple
+
+try:
+    from . import timing
+except ImportError:
+    # When imported by aerator_comparer running as a standalone script
+    import timing
+
+Labels = Tuple[str, ...]
+
+LATENCY_BUCKETS = [
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+]
+LAG_BUCKETS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1, 5]
+AERATOR_BUCKETS = [2, 5, 10, 25, 50, 100, 500, 1000, 5000, 10000]
+HORIZON_BUCKETS = [1, 5, 10, 15, 20, 30, 50, 100]
+ITERATION_BUCKETS = [1, 2, 3, 5, 10, 20, 50, 100]
+
+# compare_aerators error messages by prefix, most specific first
+ERROR_CATEGORIES = [
+    ("At least two aerators", "too_few_aerators"),
+    ("At least one aerator must have positive SOTR", "no_positive_sotr"),
+    ("Missing required", "missing_field"),
+    ("Invalid numeric value", "invalid_number"),
+    ("TOD must be positive", "invalid_tod"),
+    ("Loan", "invalid_financing"),
+    ("Tax", "invalid_financing"),
+    ("Depreciation", "invalid_financing"),
+    ("Invalid ranking cursor", "invalid_cursor"),
+    ("Ranking", "invalid_ranking"),
+]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _format_labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Metric:
+    """Named metric holding one series per label set."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labels: Labels = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values: Dict[Labels, Any] = {}
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, k)} {v}"
+            for k, v in sorted(self.values.items())
+        ]
+
+
+class Counter(Metric):
+    """Monotonic counter per label set."""
+
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        with _lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Counter):
+    """Value that can go up and down per label set."""
+
+    kind = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        with _lock:
+            self.values[labels] = value
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    """Cumulative-bucket histogram per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        buckets: List[float],
+        labels: Labels = (),
+    ):
+        super().__init__(name, help_text, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, *labels: str) -> None:
+        with _lock:
+            series = self.values.get(labels)
+            if series is None:
+                series = self.values[labels] = (
+                    [0] * (len(self.buckets) + 1),
+                    [0.0],
+                )
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1][0] += value
+
+    def samples(self) -> List[str]:
+        lines: List[str] = []
+        for key, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + [float("inf")], counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _format_labels(
+                    self.labels + ("le",), key + (le,)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {total[0]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+_lock = threading.Lock()
+STARTED = time.time()
+
+REQUESTS = Counter(
+    "aerasync_http_requests_total",
+    "HTTP requests by route, method and status code.",
+    ("route", "method", "status"),
+)
+REQUEST_LATENCY = Histogram(
+    "aerasync_http_request_duration_seconds",
+    "HTTP request latency by route.",
+    LATENCY_BUCKETS,
+    ("route",),
+)
+IN_PROGRESS = Gauge(
+    "aerasync_http_requests_in_progress",
+    "Requests currently being handled by this worker.",
+)
+BUSY_SECONDS = Counter(
+    "aerasync_http_busy_seconds_total",
+    "Wall time spent handling requests; rate() over workers gives "
+    "utilization.",
+)
+COMPARISON_AERATORS = Histogram(
+    "aerasync_comparison_aerators",
+    "Number of aerators per comparison.",
+    AERATOR_BUCKETS,
+)
+COMPARISON_HORIZON = Histogram(
+    "aerasync_comparison_horizon_years",
+    "Analysis horizon per comparison.",
+    HORIZON_BUCKETS,
+)
+COMPARISON_ERRORS = Counter(
+    "aerasync_comparison_errors_total",
+    "Comparisons rejected by input validation, by category.",
+    ("category",),
+)
+SOLVER_ITERATIONS = Histogram(
+    "aerasync_newton_raphson_iterations",
+    "Newton-Raphson iterations per IRR solve, by outcome.",
+    ITERATION_BUCKETS,
+    ("outcome",),
+)
+EVENT_LOOP_LAG = Gauge(
+    "aerasync_event_loop_lag_seconds",
+    "Most recent event-loop lag measured by the lag probe.",
+)
+EVENT_LOOP_LAG_SECONDS = Histogram(
+    "aerasync_event_loop_lag_distribution_seconds",
+    "Event-loop lag per probe.",
+    LAG_BUCKETS,
+)
+SLOW_REQUESTS = Counter(
+    "aerasync_slow_requests_total",
+    "Requests written to the slow-request log, by route.",
+    ("route",),
+)
+RESULT_CACHE = Counter(
+    "aerasync_result_cache_lookups_total",
+    "Result cache lookups by the tier that answered and outcome.",
+    ("tier", "outcome"),
+)
+RESULT_CACHE_EVICTIONS = Counter(
+    "aerasync_result_cache_evictions_total",
+    "Entries evicted from the disk result cache.",
+)
+
+METRICS: List[Metric] = [
+    REQUESTS,
+    REQUEST_LATENCY,
+    IN_PROGRESS,
+    BUSY_SECONDS,
+    COMPARISON_AERATORS,
+    COMPARISON_HORIZON,
+    COMPARISON_ERRORS,
+    SOLVER_ITERATIONS,
+    EVENT_LOOP_LAG,
+    EVENT_LOOP_LAG_SECONDS,
+    SLOW_REQUESTS,
+    RESULT_CACHE,
+    RESULT_CACHE_EVICTIONS,
+]
+
+
+def error_category(message: str) -> str:
+    """Bounded category label for a compare_aerators error message."""
+    for prefix, category in ERROR_CATEGORIES:
+        if message.startswith(prefix):
+            return category
+    return "other"
+
+
+def observe_comparison(num_aerators: int, horizon: int) -> None:
+    """Record the size of a validated comparison."""
+    COMPARISON_AERATORS.observe(num_aerators)
+    COMPARISON_HORIZON.observe(horizon)
+
+
+def observe_comparison_error(message: str) -> None:
+    """Count a comparison rejected with ``message``."""
+    COMPARISON_ERRORS.inc(error_category(message))
+
+
+def observe_solver(iterations: int, outcome: str) -> None:
+    """Record the iterations of one Newton-Raphson solve."""
+    SOLVER_ITERATIONS.observe(iterations, outcome)
+
+
+def _stage_samples() -> List[str]:
+    lines: List[str] = []
+    name = "aerasync_stage_duration_milliseconds"
+    for stage, snapshot in sorted(timing.histograms().items()):
+        for le, count in snapshot["buckets"].items():
+            labels = _format_labels(("stage", "le"), (stage, le))
+            lines.append(f"{name}_bucket{labels} {count}")
+        labels = _format_labels(("stage",), (stage,))
+        lines.append(f"{name}_sum{labels} {snapshot['sum']}")
+        lines.append(f"{name}_count{labels} {snapshot['count']}")
+    if lines:
+        lines[:0] = [
+            f"# HELP {name} Comparison stage durations (AERASYNC_TIMING).",
+            f"# TYPE {name} histogram",
+        ]
+    return lines
+
+
+def render() -> str:
+    """Render all metrics in the Prometheus text format."""
+    lines = [
+        "# HELP aerasync_process_start_time_seconds Worker start time.",
+        "# TYPE aerasync_process_start_time_seconds gauge",
+        f'aerasync_process_start_time_seconds{{pid="{os.getpid()}"}} '
+        f"{STARTED}",
+    ]
+    with _lock:
+        for metric in METRICS:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+    lines.extend(_stage_samples())
+    return "\n".join(lines) + "\n"
+
+
+def reset() -> None:
+    """Clear all recorded values."""
+    with _lock:
+        for metric in METRICS:
+            metric.values.clear()
@@ -5,7 +5,7 @@ Contains data structures and type definitions for the aerator comparison system.
 """
 
 from dataclasses import dataclass
-from typing import Dict, NamedTuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 
 @dataclass
@@ -74,6 +74,21 @@ class FinancialInput(NamedTuple):
     horizon: int
     safety_margin: float
     temperature: float
+    loan_fraction: float = 0
+    loan_rate: float = 0
+    loan_term: int = 0
+    tax_rate: float = 0
+    depreciation_method: str = "none"
+    depreciation_years: int = 0
+    declining_balance_factor: float = 2.0
+
+
+class FieldConditions(NamedTuple):
+    salinity_ppt: float = 0
+    altitude_m: float = 0
+    alpha: float = 0.85
+    beta: float = 0.99
+    do_target_mg_l: float = 2.0
 
 
 class FarmInput(NamedTuple):
@@ -83,6 +98,7 @@ class FarmInput(NamedTuple):
     culture_days: float
     shrimp_density_kg_m3: float
     pond_depth_m: float
+    conditions: Optional[FieldConditions] = None
 
 
 class AeratorResult(NamedTuple):
@@ -105,3 +121,26 @@ class AeratorResult(NamedTuple):
     sae: float
     opportunity_cost: float
     cost_per_kg_o2: float
+
+
+class PondInput(NamedTuple):
+    name: str
+    area_ha: float
+    pond_depth_m: float
+    stocking_density_pl_m2: float
+    initial_weight_g: float
+    growth_rate_g_day: float
+    survival_rate: float
+    temperature: float
+
+
+class Ranking(NamedTuple):
+    sort: str  # AeratorResult field to rank by
+    top_n: Optional[int]  # rows per page, all when None
+    after: Optional[Tuple[float, int]]  # sort key of the previous page end
+
+
+class ComparisonInput(NamedTuple):
+    farm: FarmInput
+    financial: FinancialInput
+    aerators: List[Aerator]
@@ -0,0 +1,130 @@
+"""oxygen.py
+This module corrects standard oxygen transfer rates to pond field
+conditions. Dissolved oxygen saturation depends on temperature,
+salinity and barometric pressure (from altitude), so saturation and
+vapour-pressure tables are precomputed once at import and interpolated
+at request time. The correction factor is the same for every aerator
+in a request and is cached per set of conditions.
+"""
+
+import math
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, Tuple
+
+try:
+    from .models import FieldConditions
+except ImportError:
+    # When imported by aerator_comparer running as a standalone script
+    from models import FieldConditions
+
+THETA = 1.024  # Temperature coefficient for oxygen transfer
+KELVIN = 273.15
+STANDARD_TEMPERATURE = 20.0
+
+# Table grids (°C, ppt, m)
+TEMPERATURES = [t / 2 for t in range(0, 91)]  # 0-45 °C by 0.5
+SALINITIES = [float(s) for s in range(0, 46)]  # 0-45 ppt by 1
+ALTITUDES = [float(h) for h in range(-500, 6001, 100)]  # m
+
+
+def saturation_do(temperature: float, salinity: float) -> float:
+    """DO saturation (mg/L) at 1 atm, Benson & Krause (APHA 4500-O)."""
+    t = temperature + KELVIN
+    ln_cs = (
+        -139.34411
+        + 1.575701e5 / t
+        - 6.642308e7 / t**2
+        + 1.243800e10 / t**3
+        - 8.621949e11 / t**4
+        - salinity * (1.7674e-2 - 10.754 / t + 2140.7 / t**2)
+    )
+    return math.exp(ln_cs)
+
+
+def vapour_pressure_atm(temperature: float) -> float:
+    """Partial pressure of water vapour (atm)."""
+    t = temperature + KELVIN
+    return math.exp(11.8571 - 3840.70 / t - 216961 / t**2)
+
+
+def pressure_atm(altitude_m: float) -> float:
+    """Barometric pressure (atm) from altitude, standard atmosphere."""
+    return (1 - 2.25577e-5 * altitude_m) ** 5.25588
+
+
+def _build_tables() -> Tuple[List[List[float]], List[float], List[float]]:
+    saturation = [
+        [saturation_do(t, s) for s in SALINITIES] for t in TEMPERATURES
+    ]
+    vapour = [vapour_pressure_atm(t) for t in TEMPERATURES]
+    pressure = [pressure_atm(h) for h in ALTITUDES]
+    return saturation, vapour, pressure
+
+
+# Built once at startup
+SATURATION_TABLE, VAPOUR_TABLE, PRESSURE_TABLE = _build_tables()
+STANDARD_SATURATION = saturation_do(STANDARD_TEMPERATURE, 0.0)
+
+
+def _locate(grid: List[float], value: float) -> Tuple[int, float]:
+    # Index of the lower grid point and the fraction towards the next one,
+    # clamped to the table range
+    value = max(grid[0], min(grid[-1], value))
+    i = min(bisect_right(grid, value) - 1, len(grid) - 2)
+    return i, (value - grid[i]) / (grid[i + 1] - grid[i])
+
+
+def _interp(table: List[float], grid: List[float], value: float) -> float:
+    i, f = _locate(grid, value)
+    return table[i] + (table[i + 1] - table[i]) * f
+
+
+def interpolated_saturation(
+    temperature: float, salinity: float, altitude_m: float = 0.0
+) -> float:
+    """DO saturation (mg/L) from the lookup tables, pressure corrected."""
+    i, ft = _locate(TEMPERATURES, temperature)
+    j, fs = _locate(SALINITIES, salinity)
+    low = SATURATION_TABLE[i]
+    high = SATURATION_TABLE[i + 1]
+    cs_low = low[j] + (low[j + 1] - low[j]) * fs
+    cs_high = high[j] + (high[j + 1] - high[j]) * fs
+    cs = cs_low + (cs_high - cs_low) * ft
+
+    pressure = _interp(PRESSURE_TABLE, ALTITUDES, altitude_m)
+    if pressure == 1.0:
+        return cs
+    # APHA non-standard pressure correction
+    t = max(TEMPERATURES[0], min(TEMPERATURES[-1], temperature))
+    pwv = _interp(VAPOUR_TABLE, TEMPERATURES, t)
+    theta = 0.000975 - 1.426e-5 * t + 6.436e-8 * t**2
+    return (
+        cs
+        * pressure
+        * ((1 - pwv / pressure) * (1 - theta * pressure))
+        / ((1 - pwv) * (1 - theta))
+    )
+
+
+@lru_cache(maxsize=1024)
+def field_correction_factor(
+    temperature: float, conditions: FieldConditions
+) -> float:
+    """Ratio of field OTR to SOTR (ASCE standard-to-field correction).
+
+    OTR = SOTR * alpha * THETA^(T - 20) * (beta * Cs(T, S, P) - C_L) / Cs20
+    """
+    adjusted_temp = max(-20, min(100, temperature))
+    cs = interpolated_saturation(
+        temperature, conditions.salinity_ppt, conditions.altitude_m
+    )
+    deficit = conditions.beta * cs - conditions.do_target_mg_l
+    if deficit <= 0:
+        return 0.0
+    return (
+        conditions.alpha
+        * THETA ** (adjusted_temp - STANDARD_TEMPERATURE)
+        * deficit
+        / STANDARD_SATURATION
+    )
@@ -0,0 +1,241 @@
+"""profiling.py
+This module profiles the next N comparisons on demand. An armed session
+wraps each call of a ``profiled`` function in cProfile and, optionally,
+tracemalloc snapshots, then aggregates the results into a hot-spot
+report: the top functions by time and the allocation sites attributed
+to the comparison functions. Unarmed, the wrapper costs one global
+lookup per call, and the profilers are only imported once a session is
+started so they stay off the cold-start path.
+"""
+
+import threading
+import time
+from functools import wraps
+from types import CodeType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+if TYPE_CHECKING:
+    import cProfile
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+TOP_FUNCTIONS = 25
+TOP_ALLOCATIONS = 25
+TRACEMALLOC_FRAMES = 10
+MAX_COMPARISONS = 1000
+
+
+class ProfileSession:
+    """Profiles collected over the next ``comparisons`` calls."""
+
+    def __init__(self, comparisons: int, memory: bool) -> None:
+        import cProfile
+
+        self.requested = comparisons
+        self.memory = memory
+        self.completed = 0
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self.profiler = cProfile.Profile()
+        self.allocations: Dict[Tuple[str, int], List[int]] = {}
+        self.peak_bytes = 0
+        self.lock = threading.Lock()
+
+    @property
+    def remaining(self) -> int:
+        return self.requested - self.completed
+
+
+_session: Optional[ProfileSession] = None
+# Functions whose allocation sites are reported, by name
+_targets: Dict[str, Tuple[str, int, int]] = {}
+
+
+def _code_range(code: CodeType) -> Tuple[str, int, int]:
+    lines = [line for _, _, line in code.co_lines() if line is not None]
+    return code.co_filename, code.co_firstlineno, max(lines)
+
+
+def register_target(func: Callable[..., Any], *nested: str) -> None:
+    """Attribute allocations inside ``func`` (and its nested functions
+    named in ``nested``) to those functions in memory reports."""
+    code = func.__code__
+    _targets[code.co_name] = _code_range(code)
+    for const in code.co_consts:
+        if isinstance(const, CodeType) and const.co_name in nested:
+            _targets[const.co_name] = _code_range(const)
+
+
+def _function_at(filename: str, lineno: int) -> Optional[str]:
+    # Innermost registered function containing the line
+    match: Optional[Tuple[str, int]] = None
+    for name, (file, first, last) in _targets.items():
+        if file == filename and first <= lineno <= last:
+            if match is None or first > match[1]:
+                match = (name, first)
+    return match[0] if match else None
+
+
+def start(comparisons: int, memory: bool = True) -> ProfileSession:
+    """Arm profiling for the next ``comparisons`` calls."""
+    global _session
+    if not 1 <= comparisons <= MAX_COMPARISONS:
+        raise ValueError(
+            f"Comparisons must be between 1 and {MAX_COMPARISONS}"
+        )
+    import tracemalloc
+
+    stop()
+    if memory:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    _session = ProfileSession(comparisons, memory)
+    return _session
+
+
+def stop() -> None:
+    """Discard the current session."""
+    global _session
+    if _session is not None and _session.memory:
+        import tracemalloc
+
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    _session = None
+
+
+def session() -> Optional[ProfileSession]:
+    """The current session, armed or finished."""
+    return _session
+
+
+def _run(
+    current: ProfileSession,
+    func: Callable[..., Any],
+    *args: Any,
+    **kwargs: Any,
+) -> Any:
+    import tracemalloc
+
+    before = None
+    if current.memory:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+    current.profiler.enable()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        current.profiler.disable()
+        if before is not None:
+            after = tracemalloc.take_snapshot()
+            current.peak_bytes = max(
+                current.peak_bytes, tracemalloc.get_traced_memory()[1]
+            )
+            for stat in after.compare_to(before, "lineno"):
+                frame = stat.traceback[0]
+                site = current.allocations.setdefault(
+                    (frame.filename, frame.lineno), [0, 0]
+                )
+                site[0] += stat.size_diff
+                site[1] += stat.count_diff
+        current.completed += 1
+        if current.remaining <= 0:
+            current.finished = time.time()
+            if current.memory:
+                tracemalloc.stop()
+    return result
+
+
+def profiled(func: F) -> F:
+    """Profile calls of ``func`` while a session is armed."""
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        current = _session
+        if current is None or current.finished is not None:
+            return func(*args, **kwargs)
+        # One comparison at a time; concurrent calls run unprofiled
+        if not current.lock.acquire(blocking=False):
+            return func(*args, **kwargs)
+        try:
+            if current.remaining <= 0:
+                return func(*args, **kwargs)
+            return _run(current, func, *args, **kwargs)
+        finally:
+            current.lock.release()
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _top_functions(profiler: "cProfile.Profile") -> List[Dict[str, Any]]:
+    import io
+    import pstats
+
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = sorted(
+        stats.stats.items(),  # type: ignore[attr-defined]
+        key=lambda item: item[1][2],
+        reverse=True,
+    )[:TOP_FUNCTIONS]
+    return [
+        {
+            "function": name,
+            "file": filename,
+            "line": lineno,
+            "calls": ncalls,
+            "total_time": float(f"{tottime:.6f}"),
+            "cumulative_time": float(f"{cumtime:.6f}"),
+        }
+        for (filename, lineno, name), (_, ncalls, tottime, cumtime, _) in rows
+    ]
+
+
+def _allocation_sites(current: ProfileSession) -> List[Dict[str, Any]]:
+    sites = [
+        {
+            "function": _function_at(filename, lineno),
+            "file": filename,
+            "line": lineno,
+            "size_bytes": size,
+            "count": count,
+        }
+        for (filename, lineno), (size, count) in current.allocations.items()
+        if size > 0
+    ]
+    sites.sort(key=lambda s: s["size_bytes"], reverse=True)
+    return sites
+
+
+def report() -> Optional[Dict[str, Any]]:
+    """Hot-spot report of the current session, if any."""
+    current = _session
+    if current is None:
+        return None
+    with current.lock:
+        summary: Dict[str, Any] = {
+            "requested": current.requested,
+            "completed": current.completed,
+            "finished": current.finished is not None,
+            "started_at": current.started,
+            "top_functions": _top_functions(current.profiler)
+            if current.completed
+            else [],
+        }
+        if current.memory:
+            sites = _allocation_sites(current)
+            summary["memory"] = {
+                "peak_bytes": current.peak_bytes,
+                "target_sites": [s for s in sites if s["function"]][
+                    :TOP_ALLOCATIONS
+                ],
+                "top_sites": sites[:TOP_ALLOCATIONS],
+            }
+    return summary
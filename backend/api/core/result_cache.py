@@ -0,0 +1,290 @@
+"""result_cache.py
+This module caches ``compare_aerators`` results across restarts. Results
+are keyed by the SHA-256 of the canonical JSON input and kept in two
+tiers: a small in-process LRU, and an SQLite file that outlives the
+worker, so popular comparisons are not recomputed after every deploy.
+
+The disk tier is bounded in bytes and evicts least recently used
+entries. Every entry carries the hash of the calculation sources, so
+entries written by other formulas are never served and are dropped the
+first time the cache is opened by changed code. Keys include the active
+compute backend (see ``backends.py``), so switching backends never
+serves results computed by another one.
+
+Enabled by setting ``AERASYNC_RESULT_CACHE`` to a database path;
+``AERASYNC_RESULT_CACHE_MB`` sets the size limit (64).
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from . import aerator_comparer, metrics
+from .aerator_comparer import compare_aerators
+
+if TYPE_CHECKING:
+    import sqlite3
+
+CACHE_PATH = os.environ.get("AERASYNC_RESULT_CACHE", "")
+MAX_BYTES = int(float(os.environ.get("AERASYNC_RESULT_CACHE_MB", 64)) * 2**20)
+MEMORY_ENTRIES = 256
+EVICT_TO = 0.9  # fraction of the limit left after an eviction
+TOUCH_SECONDS = 60.0  # least interval between access time updates
+FORMAT_VERSION = 1
+# Modules whose code determines a comparison result
+CALCULATION_MODULES = (
+    "aerator_comparer.py",
+    "backends.py",
+    "finance.py",
+    "models.py",
+    "oxygen.py",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    version TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed);
+"""
+
+
+def code_version() -> str:
+    """Hash of the calculation sources and the cache format."""
+    digest = hashlib.sha256(str(FORMAT_VERSION).encode())
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in CALCULATION_MODULES:
+        try:
+            with open(os.path.join(directory, name), "rb") as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(name.encode())
+    return digest.hexdigest()[:16]
+
+
+def cache_key(data: Dict[str, Any]) -> str:
+    """SHA-256 of the canonical JSON of a comparison input and the
+    compute backend that produces its result."""
+    backend = aerator_comparer._backend
+    canonical = json.dumps(
+        [backend.name if backend is not None else "python", data],
+        sort_keys=True,
+        separators=(",", ":"),
+        allow_nan=False,
+    )
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class ResultCache:
+    """Comparison results in memory and in an SQLite file."""
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = MAX_BYTES,
+        memory_entries: int = MEMORY_ENTRIES,
+        version: Optional[str] = None,
+    ) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.version = version or code_version()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._connection: Optional["sqlite3.Connection"] = None
+        self._bytes = 0
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    def _connect(self) -> Optional["sqlite3.Connection"]:
+        if self._connection is not None or self._disabled:
+            return self._connection
+        import sqlite3
+
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=5, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with connection:
+                connection.executescript(SCHEMA)
+                # Entries computed by other formulas are never valid
+                connection.execute(
+                    "DELETE FROM entries WHERE version != ?", (self.version,)
+                )
+            self._bytes = self._total_bytes(connection)
+        except (OSError, sqlite3.Error):
+            # Unusable file, fall back to the memory tier only
+            self._disabled = True
+            return None
+        self._connection = connection
+        return connection
+
+    @staticmethod
+    def _total_bytes(connection: "sqlite3.Connection") -> int:
+        return connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+    def _remember(self, key: str, result: Dict[str, Any]) -> None:
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for ``key``, from memory or disk."""
+        import sqlite3
+
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                metrics.RESULT_CACHE.inc("memory", "hit")
+                return result
+            connection = self._connect()
+            if connection is None:
+                metrics.RESULT_CACHE.inc("memory", "miss")
+                return None
+            try:
+                row = connection.execute(
+                    "SELECT value FROM entries WHERE key = ? AND version = ?",
+                    (key, self.version),
+                ).fetchone()
+                if row is None:
+                    metrics.RESULT_CACHE.inc("disk", "miss")
+                    return None
+                now = time.time()
+                if now - self._touched.get(key, 0) > TOUCH_SECONDS:
+                    self._touched[key] = now
+                    with connection:
+                        connection.execute(
+                            "UPDATE entries SET accessed = ? WHERE key = ?",
+                            (now, key),
+                        )
+            except sqlite3.Error:
+                metrics.RESULT_CACHE.inc("disk", "miss")
+                return None
+            result = json.loads(row[0])
+            self._remember(key, result)
+            metrics.RESULT_CACHE.inc("disk", "hit")
+            return result
+
+    def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result in both tiers, evicting as needed."""
+        import sqlite3
+
+        value = json.dumps(result, separators=(",", ":"))
+        with self._lock:
+            self._remember(key, result)
+            connection = self._connect()
+            if connection is None or len(value) > self.max_bytes // 10:
+                return
+            try:
+                with connection:
+                    previous = connection.execute(
+                        "SELECT size FROM entries WHERE key = ?", (key,)
+                    ).fetchone()
+                    connection.execute(
+                        "INSERT OR REPLACE INTO entries "
+                        "(key, version, value, size, accessed) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, self.version, value, len(value), time.time()),
+                    )
+                self._bytes += len(value) - (previous[0] if previous else 0)
+                if self._bytes > self.max_bytes:
+                    self._evict(connection)
+            except sqlite3.Error:
+                pass
+
+    def _evict(self, connection: "sqlite3.Connection") -> None:
+        # Other workers may share the file, so start from the real size
+        total = self._total_bytes(connection)
+        target = self.max_bytes * EVICT_TO
+        evicted = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        ):
+            if total <= target:
+                break
+            evicted.append((key,))
+            total -= size
+        with connection:
+            connection.executemany(
+                "DELETE FROM entries WHERE key = ?", evicted
+            )
+        for (key,) in evicted:
+            self._touched.pop(key, None)
+        self._bytes = total
+        metrics.RESULT_CACHE_EVICTIONS.inc(amount=len(evicted))
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry counts and size of both tiers."""
+        with self._lock:
+            connection = self._connect()
+            entries = 0
+            if connection is not None:
+                entries = connection.execute(
+                    "SELECT COUNT(*) FROM entries"
+                ).fetchone()[0]
+            return {
+                "version": self.version,
+                "memory_entries": len(self._memory),
+                "disk_entries": entries,
+                "disk_bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._memory.clear()
+            self._touched.clear()
+            connection = self._connect()
+            if connection is not None:
+                with connection:
+                    connection.execute("DELETE FROM entries")
+                self._bytes = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+cache: Optional[ResultCache] = ResultCache(CACHE_PATH) if CACHE_PATH else None
+
+
+def cached_compare(
+    data: Dict[str, Any],
+    compare: Callable[[Dict[str, Any]], Dict[str, Any]] = compare_aerators,
+) -> Dict[str, Any]:
+    """``compare(data)`` through the result cache, when enabled.
+
+    Validation errors are cheap to recompute and are not cached.
+    """
+    current = cache
+    if current is None:
+        return compare(data)
+    try:
+        key = cache_key(data)
+    except (TypeError, ValueError):
+        return compare(data)
+    result = current.get(key)
+    if result is None:
+        result = compare(data)
+        if "error" not in result:
+            current.put(key, result)
+    return result
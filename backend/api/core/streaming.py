@@ -0,0 +1,261 @@
+"""streaming.py
+This module parses a ``/compare`` request body while it is arriving. The
+``aerators`` array is split into its elements as the bytes come in and
+each element is decoded on its own, validated and converted to an
+``Aerator``; the rest of the document is kept as raw bytes and decoded
+at the end. Memory is bounded by the largest single aerator instead of
+the whole body, and the request-wide tree of dicts is never built.
+
+When ``farm`` and ``financial`` come before ``aerators`` in the body,
+each aerator is sized and costed as soon as it is decoded, so most of
+the comparison is done by the time the last byte arrives. Results and
+validation errors are the same as ``compare_aerators``.
+"""
+
+import json
+import re
+from typing import Any, AsyncIterable, Dict, List, Optional, Tuple
+
+from . import metrics
+from .aerator_comparer import (
+    AeratorBatch,
+    compare_aerators,
+    compare_processed,
+    comparison_revenue,
+    parse_farm,
+    parse_financial,
+    parse_ranking,
+    process_aerator,
+    process_aerators,
+    validate_comparison,
+)
+from .models import FarmInput, FinancialInput
+
+MAX_ELEMENT_BYTES = 64 * 1024  # one aerator
+MAX_OUTER_BYTES = 1024 * 1024  # everything except the aerators
+
+# Bytes that change the parser state; everything else is copied as is
+STRUCTURAL = re.compile(rb'[\\"\[\]{},]')
+QUOTE, BACKSLASH, COMMA = ord('"'), ord("\\"), ord(",")
+OPENING, CLOSING = b"[{", b"]}"
+AERATORS_KEY = b"aerators"
+
+
+class ComparisonStream:
+    """Incremental parser and evaluator for one comparison request.
+
+    Call ``feed`` with each chunk of the body, then ``finish``.
+    """
+
+    def __init__(
+        self,
+        max_element_bytes: int = MAX_ELEMENT_BYTES,
+        max_outer_bytes: int = MAX_OUTER_BYTES,
+    ) -> None:
+        self.max_element_bytes = max_element_bytes
+        self.max_outer_bytes = max_outer_bytes
+        self.batch = AeratorBatch()
+        self._outer = bytearray()  # the body with an empty aerators array
+        self._element = bytearray()  # the aerator being received
+        self._elements = 0
+        self._depth = 0
+        self._array_depth = 0
+        self._in_array = False
+        self._in_string = False
+        self._escaped = False
+        self._expect_key = False
+        self._key: Optional[bytearray] = None
+        self._last_key = b""
+        self._early: Optional[Tuple[FarmInput, FinancialInput, float]] = None
+        self._early_inputs: Optional[Tuple[Any, Any]] = None
+        self._results: List[Dict[str, Any]] = []
+
+    def feed(self, chunk: bytes) -> None:
+        """Consume the next chunk of the body."""
+        mark = 0  # start of the bytes not yet copied
+        key_from = 0
+        skip = -1
+        if self._escaped:
+            skip, self._escaped = 0, False
+        for match in STRUCTURAL.finditer(chunk):
+            i = match.start()
+            if i == skip:
+                continue
+            char = chunk[i]
+            if self._in_string:
+                if char == BACKSLASH:
+                    if i + 1 == len(chunk):
+                        self._escaped = True
+                    skip = i + 1
+                elif char == QUOTE:
+                    self._in_string = False
+                    if self._key is not None:
+                        self._key += chunk[key_from:i]
+                        self._last_key = bytes(self._key)
+                        self._key = None
+                continue
+            if char == QUOTE:
+                self._in_string = True
+                if not self._in_array and self._depth == 1:
+                    if self._expect_key:
+                        self._key = bytearray()
+                        key_from = i + 1
+                        self._expect_key = False
+                    else:
+                        self._last_key = b""
+            elif self._in_array:
+                if char in OPENING:
+                    self._array_depth += 1
+                elif self._array_depth:
+                    if char in CLOSING:
+                        self._array_depth -= 1
+                else:
+                    # A comma or the end of the array closes an element
+                    self._element += chunk[mark:i]
+                    mark = i + 1
+                    self._end_element(closing=char != COMMA)
+                    if char != COMMA:
+                        self._in_array = False
+                        self._depth -= 1
+                        mark = i
+            elif char in OPENING:
+                self._depth += 1
+                if self._depth == 1:
+                    self._expect_key = char == ord("{")
+                elif (
+                    self._depth == 2
+                    and char == ord("[")
+                    and self._last_key == AERATORS_KEY
+                ):
+                    self._outer += chunk[mark:i + 1]
+                    mark = i + 1
+                    self._start_array()
+            elif char in CLOSING:
+                self._depth -= 1
+                if self._depth == 1:
+                    self._last_key = b""
+            elif self._depth == 1:
+                self._expect_key = True
+                self._last_key = b""
+        if self._key is not None:
+            self._key += chunk[key_from:]
+        if self._in_array:
+            self._element += chunk[mark:]
+            if len(self._element) > self.max_element_bytes:
+                raise ValueError(
+                    f"Aerator exceeds {self.max_element_bytes} bytes"
+                )
+        else:
+            self._outer += chunk[mark:]
+            if len(self._outer) > self.max_outer_bytes:
+                raise ValueError(
+                    f"Request exceeds {self.max_outer_bytes} bytes "
+                    "outside the aerators"
+                )
+
+    def _start_array(self) -> None:
+        self._in_array = True
+        self._array_depth = 0
+        # As with json.loads, a repeated key replaces the earlier array
+        self.batch = AeratorBatch()
+        self._elements = 0
+        self._results = []
+        # Farm and financial inputs sent ahead of the aerators let each
+        # aerator be processed on arrival
+        try:
+            head = json.loads(bytes(self._outer) + b"]}")
+        except ValueError:
+            return
+        farm_data = head.get("farm", {})
+        financial_data = head.get("financial", {})
+        if not isinstance(farm_data, dict) or not isinstance(
+            financial_data, dict
+        ):
+            return
+        farm = parse_farm(farm_data)
+        if isinstance(farm, dict) or farm.tod <= 0:
+            return
+        financial = parse_financial(financial_data)
+        if isinstance(financial, dict):
+            return
+        self._early = (farm, financial, comparison_revenue(farm))
+        self._early_inputs = (farm_data, financial_data)
+
+    def _end_element(self, closing: bool) -> None:
+        raw = bytes(self._element)
+        self._element.clear()
+        if len(raw) > self.max_element_bytes:
+            raise ValueError(f"Aerator exceeds {self.max_element_bytes} bytes")
+        if not raw.strip():
+            # Only an empty array may have no element before its end
+            if closing and not self._elements:
+                return
+            raise ValueError("Invalid JSON in aerators")
+        self._elements += 1
+        aerator = self.batch.add(json.loads(raw))
+        if aerator is not None and self._early is not None:
+            farm, financial, annual_revenue = self._early
+            try:
+                result = process_aerator(
+                    aerator, farm, financial, annual_revenue
+                )
+            except (ArithmeticError, ValueError):
+                # Left to finish, which reports errors as compare_aerators
+                self._early = None
+                return
+            self._results.append(result)
+
+    def finish(self) -> Dict[str, Any]:
+        """Complete the comparison once the whole body has been fed."""
+        if self._depth or self._in_string or self._in_array:
+            raise ValueError("Incomplete JSON body")
+        data = json.loads(bytes(self._outer))
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        if data.get("aerators"):
+            # The aerators were not recognised while streaming
+            return compare_aerators(data)
+
+        farm_data = data.get("farm", {})
+        financial_data = data.get("financial", {})
+        parsed = validate_comparison(farm_data, financial_data, self.batch)
+        if isinstance(parsed, dict):
+            metrics.observe_comparison_error(parsed["error"])
+            return parsed
+        ranking = parse_ranking(data.get("ranking"))
+        if isinstance(ranking, dict):
+            metrics.observe_comparison_error(ranking["error"])
+            return ranking
+        farm, financial, aerators = parsed
+        metrics.observe_comparison(len(aerators), financial.horizon)
+
+        if self._early is not None and self._early_inputs == (
+            farm_data,
+            financial_data,
+        ):
+            annual_revenue = self._early[2]
+            results = self._results
+        else:
+            annual_revenue = comparison_revenue(farm)
+            results = process_aerators(
+                aerators, farm, financial, annual_revenue
+            )
+        return compare_processed(
+            farm, financial, annual_revenue, results, ranking
+        )
+
+
+def compare_stream_bytes(chunks: List[bytes]) -> Dict[str, Any]:
+    """Compare a body given as a list of chunks."""
+    stream = ComparisonStream()
+    for chunk in chunks:
+        stream.feed(chunk)
+    return stream.finish()
+
+
+async def compare_stream(chunks: AsyncIterable[bytes]) -> Dict[str, Any]:
+    """Compare a body while its chunks are being received."""
+    stream = ComparisonStream()
+    async for chunk in chunks:
+        stream.feed(chunk)
+    return stream.finish()
@@ -0,0 +1,167 @@
+"""timing.py
+This module records per-stage durations on the comparison hot path.
+Stages are timed with ``stage(name)`` into the collector of the current
+request (a context variable) and aggregated in memory as histograms.
+When timing is disabled ``stage`` returns a shared no-op context
+manager, so instrumented code pays one global lookup per stage.
+
+Enable with the ``AERASYNC_TIMING=1`` environment variable.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar, Token
+from typing import Any, ContextManager, Dict, List, Optional
+
+ENABLED = os.environ.get("AERASYNC_TIMING", "").lower() in ("1", "true")
+
+# Histogram bucket upper bounds in milliseconds
+BUCKETS_MS = [0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+_NULL_STAGE = nullcontext()
+_current: ContextVar[Optional["StageTimings"]] = ContextVar(
+    "aerasync_stage_timings", default=None
+)
+
+
+class StageTimings:
+    """Stage durations (seconds) collected for a single request."""
+
+    __slots__ = ("durations",)
+
+    def __init__(self) -> None:
+        self.durations: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+
+class _StageTimer:
+    __slots__ = ("timings", "name", "started")
+
+    def __init__(self, timings: StageTimings, name: str) -> None:
+        self.timings = timings
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self) -> None:
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.timings.add(self.name, time.perf_counter() - self.started)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in milliseconds."""
+
+    def __init__(self, buckets: List[float]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets: Dict[str, int] = {}
+        for bound, count in zip(self.buckets + [float("inf")], self.counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = (
+                cumulative
+            )
+        return {"count": self.count, "sum": self.total, "buckets": buckets}
+
+
+_histograms: Dict[str, Histogram] = {}
+_lock = threading.Lock()
+
+
+def set_enabled(enabled: bool) -> None:
+    """Turn stage timing on or off at runtime."""
+    global ENABLED
+    ENABLED = enabled
+
+
+def stage(name: str) -> ContextManager[None]:
+    """Time a block as a named stage of the current request."""
+    if not ENABLED:
+        return _NULL_STAGE
+    timings = _current.get()
+    if timings is None:
+        return _NULL_STAGE
+    return _StageTimer(timings, name)
+
+
+def clock() -> float:
+    """Start a lap for ``lap``; zero when timing is disabled."""
+    return time.perf_counter() if ENABLED else 0.0
+
+
+def lap(name: str, since: float) -> float:
+    """Record the time since ``since`` as a stage and start a new lap.
+
+    Laps time consecutive stages of a function without re-indenting it
+    under ``with`` blocks; durations of repeated laps are summed.
+    """
+    if not ENABLED:
+        return 0.0
+    now = time.perf_counter()
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, now - since)
+    return now
+
+
+def start_request() -> Token[Optional[StageTimings]]:
+    """Attach a fresh collector to the current context."""
+    return _current.set(StageTimings())
+
+
+def current_timings() -> Optional[StageTimings]:
+    """Collector of the current request, if any."""
+    return _current.get()
+
+
+def finish_request(token: Token[Optional[StageTimings]]) -> StageTimings:
+    """Detach the collector and fold its stages into the histograms."""
+    timings = _current.get() or StageTimings()
+    _current.reset(token)
+    record(timings)
+    return timings
+
+
+def record(timings: StageTimings) -> None:
+    """Aggregate the stages of a request into the in-memory histograms."""
+    with _lock:
+        for name, seconds in timings.durations.items():
+            histogram = _histograms.get(name)
+            if histogram is None:
+                histogram = _histograms[name] = Histogram(BUCKETS_MS)
+            histogram.observe(seconds * 1000)
+
+
+def histograms() -> Dict[str, Dict[str, Any]]:
+    """Snapshot of the per-stage histograms."""
+    with _lock:
+        return {name: h.snapshot() for name, h in _histograms.items()}
+
+
+def reset_histograms() -> None:
+    """Drop all aggregated stage histograms."""
+    with _lock:
+        _histograms.clear()
+
+
+def server_timing_header(timings: StageTimings) -> str:
+    """Format stage durations as a Server-Timing header value."""
+    return ", ".join(
+        f"{name};dur={seconds * 1000:.3f}"
+        for name, seconds in timings.durations.items()
+    )
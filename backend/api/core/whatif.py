@@ -0,0 +1,238 @@
+"""whatif.py
+This module holds what-if scenarios server-side so clients can send
+partial patches instead of the full comparison payload. Each stage of
+the comparison is cached under the exact inputs it depends on, so a
+patch only recomputes the stages whose inputs changed:
+
+    revenue   farm area, shrimp price, culture days, density, depth
+    sizing    aerator SOTR, TOD, farm area, field conditions,
+              temperature, safety margin (OTR_T and fleet size)
+    costs     the aerator, its fleet size, farm area, energy cost,
+              hours per night, annual revenue
+    financial TOD, all financial inputs, annual revenue, every
+              aerator's costs (NPV, IRR, payback and the winner)
+
+Changing ``discount_rate`` therefore reruns only the financial stage,
+and changing ``energy_cost`` reuses every OTR_T and fleet size.
+"""
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from . import metrics
+from .aerator_comparer import (
+    aerator_costs,
+    compare_processed,
+    comparison_revenue,
+    parse_comparison_input,
+    size_aerator,
+)
+
+SESSION_TTL = 30 * 60  # seconds of inactivity before a session expires
+MAX_SESSIONS = 1000
+STAGES = ("revenue", "sizing", "costs", "financial")
+
+
+def merge_patch(
+    scenario: Dict[str, Any], patch: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Apply a partial update to a scenario, JSON merge-patch style.
+
+    Nested objects are merged and ``None`` removes a key. ``aerators``
+    is replaced when given as a list, or patched per aerator name when
+    given as an object mapping names to partial aerators.
+    """
+    merged = deepcopy(scenario)
+    for key, value in patch.items():
+        if key == "aerators" and isinstance(value, dict):
+            aerators: List[Dict[str, Any]] = merged.get("aerators", [])
+            by_name = {a.get("name"): a for a in aerators}
+            for name, aerator_patch in value.items():
+                if aerator_patch is None:
+                    aerators = [a for a in aerators if a.get("name") != name]
+                elif name in by_name:
+                    by_name[name].update(aerator_patch)
+                else:
+                    aerators.append({"name": name, **aerator_patch})
+            merged["aerators"] = aerators
+        elif value is None:
+            merged.pop(key, None)
+        elif isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_patch(merged[key], value)
+        else:
+            merged[key] = deepcopy(value)
+    return merged
+
+
+class WhatIfSession:
+    """A scenario and its cached stage results."""
+
+    def __init__(self) -> None:
+        self.scenario: Dict[str, Any] = {}
+        self.result: Optional[Dict[str, Any]] = None
+        self.touched = time.monotonic()
+        self.lock = threading.Lock()
+        self._revenue: Optional[Tuple[Hashable, float]] = None
+        self._sizing: Dict[Hashable, float] = {}
+        self._costs: Dict[Hashable, Dict[str, Any]] = {}
+        self._financial: Optional[Tuple[Hashable, Dict[str, Any]]] = None
+
+    def apply(
+        self, *patches: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """Apply patches in order, recompute once and return the result
+        and the number of recomputations per stage. An invalid scenario
+        returns the error and leaves the session unchanged."""
+        with self.lock:
+            self.touched = time.monotonic()
+            scenario = self.scenario
+            for patch in patches:
+                scenario = merge_patch(scenario, patch)
+            result, recomputed = self._compute(scenario)
+            if "error" not in result:
+                self.scenario = scenario
+                self.result = result
+            return result, recomputed
+
+    def _compute(
+        self, data: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        recomputed = dict.fromkeys(STAGES, 0)
+        parsed = parse_comparison_input(data)
+        if isinstance(parsed, dict):
+            metrics.observe_comparison_error(parsed["error"])
+            return parsed, recomputed
+        farm, financial, aerators = parsed
+        metrics.observe_comparison(len(aerators), financial.horizon)
+
+        revenue_key = (
+            farm.farm_area_ha,
+            farm.shrimp_price,
+            farm.culture_days,
+            farm.shrimp_density_kg_m3,
+            farm.pond_depth_m,
+        )
+        if self._revenue is None or self._revenue[0] != revenue_key:
+            self._revenue = (revenue_key, comparison_revenue(farm))
+            recomputed["revenue"] += 1
+        annual_revenue = self._revenue[1]
+
+        sizing_inputs = (
+            farm.tod,
+            farm.farm_area_ha,
+            farm.conditions,
+            financial.temperature,
+            financial.safety_margin,
+        )
+        cost_inputs = (
+            farm.farm_area_ha,
+            financial.energy_cost,
+            financial.hours_per_night,
+            annual_revenue,
+        )
+        sizing: Dict[Hashable, float] = {}
+        costs: Dict[Hashable, Dict[str, Any]] = {}
+        cost_keys: List[Hashable] = []
+        aerator_results: List[Dict[str, Any]] = []
+        for aerator in aerators:
+            sizing_key = (aerator.sotr, sizing_inputs)
+            num_aerators = sizing.get(sizing_key)
+            if num_aerators is None:
+                num_aerators = self._sizing.get(sizing_key)
+                if num_aerators is None:
+                    num_aerators = size_aerator(aerator, farm, financial)
+                    recomputed["sizing"] += 1
+                sizing[sizing_key] = num_aerators
+
+            cost_key = (
+                aerator.name,
+                aerator.power_hp,
+                aerator.sotr,
+                aerator.cost,
+                aerator.durability,
+                aerator.maintenance,
+                num_aerators,
+                cost_inputs,
+            )
+            result = costs.get(cost_key)
+            if result is None:
+                result = self._costs.get(cost_key)
+                if result is None:
+                    result = aerator_costs(
+                        aerator, farm, financial, annual_revenue, num_aerators
+                    )
+                    recomputed["costs"] += 1
+                costs[cost_key] = result
+            cost_keys.append(cost_key)
+            aerator_results.append(result)
+        # Keep only the entries of the current scenario
+        self._sizing, self._costs = sizing, costs
+
+        financial_key = (farm.tod, financial, tuple(cost_keys))
+        if self._financial is None or self._financial[0] != financial_key:
+            comparison = compare_processed(
+                farm, financial, annual_revenue, aerator_results
+            )
+            self._financial = (financial_key, comparison)
+            recomputed["financial"] += 1
+        return self._financial[1], recomputed
+
+
+class SessionStore:
+    """In-memory sessions, least recently used evicted first."""
+
+    def __init__(
+        self, max_sessions: int = MAX_SESSIONS, ttl: float = SESSION_TTL
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, WhatIfSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(
+        self, data: Dict[str, Any]
+    ) -> Tuple[Optional[str], Dict[str, Any], Dict[str, int]]:
+        """Start a session from a full comparison payload.
+
+        Returns no session ID when the payload is invalid.
+        """
+        session = WhatIfSession()
+        result, recomputed = session.apply(data)
+        if "error" in result:
+            return None, result, recomputed
+        session_id = secrets.token_urlsafe(16)
+        with self._lock:
+            self._expire()
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        return session_id, result, recomputed
+
+    def get(self, session_id: str) -> Optional[WhatIfSession]:
+        """Session by ID, or None when unknown or expired."""
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str) -> bool:
+        """Drop a session; False when it did not exist."""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self) -> None:
+        cutoff = time.monotonic() - self.ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.touched >= cutoff:
+                break
+            del self._sessions[session_id]
+
+
+sessions = SessionStore()
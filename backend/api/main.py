@@ -3,7 +3,10 @@ FastAPI backend for AeraSync Aerator Comparison API.
 Handles incoming requests for aerator comparisons and health checks.
 """
 
+import asyncio
 import os
+import sys
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Body, HTTPException  # type: ignore  # noqa: F401
 from fastapi.middleware.cors import CORSMiddleware  # type: ignore # noqa: F401
 from fastapi.responses import JSONResponse  # type: ignore # noqa: F401
@@ -14,10 +17,61 @@ from pydantic import BaseModel, Field  # type: ignore # noqa: F401
 from .routes.health import router as health_router
 from .routes.aerator import router as aerator_router
 from .routes.root import router as root_router
-from .core.aerator_comparer import compare_aerators
+from .routes.simulation import router as simulation_router
+from .routes.calibration import router as calibration_router
+from .routes.metrics import router as metrics_router
+from .routes.admin import router as admin_router
+from .routes.whatif import router as whatif_router
+from .routes.live import router as live_router
+from .routes.jobs import router as jobs_router
+from .routes.history import router as history_router
+from .routes.catalog import router as catalog_router
+from .core.aerator_comparer import columnar_result, compare_aerators
+from .core.history import close_history, record_comparison, strip_farm_id
+from .core.result_cache import cached_compare
+from .core.timing import set_enabled, stage
+from .middleware import (
+    CompressionMiddleware,
+    MetricsMiddleware,
+    ServerTimingMiddleware,
+    SlowRequestMiddleware,
+)
+from .monitoring import close_slow_log, lag_probe, slow_request_threshold
+
+slow_threshold = slow_request_threshold()
+if slow_threshold is not None:
+    # Slow-request entries carry the stage timings of the request
+    set_enabled(True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Select the compute backend, run the event-loop lag probe for the
+    lifetime of the app and stop background jobs on shutdown."""
+    if os.environ.get("AERASYNC_COMPUTE_BACKEND", "python") != "python":
+        # Only loaded when another backend is configured
+        from .core.backends import configure
+
+        await asyncio.to_thread(configure)
+    probe = asyncio.create_task(lag_probe(threshold=slow_threshold))
+    try:
+        yield
+    finally:
+        probe.cancel()
+        close_slow_log()
+        await asyncio.to_thread(close_history)
+        # Only loaded once a job has been submitted
+        jobs_module = sys.modules.get(f"{__package__}.core.jobs")
+        if jobs_module is not None:
+            await asyncio.to_thread(jobs_module.jobs.shutdown)
+
 
 # Initialize FastAPI app
-app = FastAPI(title="AeraSync Aerator Comparison API", version="1.0.0")
+app = FastAPI(
+    title="AeraSync Aerator Comparison API",
+    version="1.0.0",
+    lifespan=lifespan,
+)
 
 # Get CORS origins from environment or use default list
 cors_origins = os.environ.get("CORS_ORIGINS", "").split(",")
@@ -42,8 +96,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
+# gzip or brotli for large JSON responses
+app.add_middleware(CompressionMiddleware)
+# Per-stage timings, active when AERASYNC_TIMING is set
+app.add_middleware(ServerTimingMiddleware)
+if slow_threshold is not None:
+    app.add_middleware(SlowRequestMiddleware, threshold=slow_threshold)
+# Request counts and latency for /metrics (outermost, sees every request)
+app.add_middleware(MetricsMiddleware)
+
 
 # Direct health check endpoint for Vercel
 @app.get("/health")
@@ -54,16 +118,34 @@ async def direct_health_check():
 
 # Direct compare endpoint for Vercel
 @app.post("/compare")
-async def direct_compare_endpoint(data: Dict[str, Any] = Body(...)):
-    """Direct compare endpoint for Vercel deployments."""
+async def direct_compare_endpoint(
+    data: Dict[str, Any] = Body(...), layout: str = "rows"
+):
+    """Direct compare endpoint for Vercel deployments.
+
+    ``layout=columnar`` returns one value list per result field.
+    """
     try:
-        result = compare_aerators(data)
-        return result
+        result = cached_compare(strip_farm_id(data), compare_aerators)
+        record_comparison(data, result)
+        if layout == "columnar":
+            result = columnar_result(result)
+        with stage("serialization"):
+            return JSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-# Include routers
-app.include_router(root_router)
+# Include routers (root last, its catch-all would shadow later routes)
 app.include_router(health_router)
 app.include_router(aerator_router)
+app.include_router(simulation_router)
+app.include_router(calibration_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
+app.include_router(whatif_router)
+app.include_router(live_router)
+app.include_router(jobs_router)
+app.include_router(history_router)
+app.include_router(catalog_router)
+app.include_router(root_router)
@@ -0,0 +1,287 @@
+"""
+ASGI middleware for the AeraSync API.
+"""
+
+import os
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+)
+
+from .core import metrics, timing
+from .monitoring import MAX_PAYLOAD_BYTES, log_slow_request
+
+try:
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.environ.get("AERASYNC_COMPRESS_MIN_BYTES", 1024))
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5  # fast enough to run on every large response
+
+Scope = MutableMapping[str, Any]
+Message = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+ASGIApp = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class ServerTimingMiddleware:
+    """Collect stage timings per request and report them in a
+    ``Server-Timing`` response header.
+
+    Written as plain ASGI rather than ``BaseHTTPMiddleware`` so the
+    request runs in the same context as the collector and disabled
+    timing costs a single flag check.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http" or not timing.ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        token = timing.start_request()
+        collector = timing.current_timings()
+        # Outer middleware (the slow-request sampler) reads it from here
+        scope["aerasync.timings"] = collector
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start" and collector is not None:
+                collector.add("total", time.perf_counter() - started)
+                headers: List[Any] = message.setdefault("headers", [])
+                headers.append((
+                    b"server-timing",
+                    timing.server_timing_header(collector).encode("latin-1"),
+                ))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            timing.finish_request(token)
+
+
+class MetricsMiddleware:
+    """Count requests and record latency and in-flight requests per
+    route for the ``/metrics`` endpoint.
+
+    Routes are labelled by their path template, so path parameters and
+    unmatched paths do not create new series.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        metrics.IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            metrics.IN_PROGRESS.dec()
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            metrics.REQUESTS.inc(path, scope["method"], str(status[0]))
+            metrics.REQUEST_LATENCY.observe(elapsed, path)
+            metrics.BUSY_SECONDS.inc(amount=elapsed)
+
+
+class SlowRequestMiddleware:
+    """Write requests slower than ``threshold`` seconds to the
+    slow-request log with their size-capped body and stage timings.
+
+    Only the first ``MAX_PAYLOAD_BYTES`` of the body are kept while it
+    streams in. Stage timings come from ``ServerTimingMiddleware``,
+    which must run inside this middleware with timing enabled.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        threshold: float,
+        paths: Tuple[str, ...] = ("/compare",),
+    ) -> None:
+        self.app = app
+        self.threshold = threshold
+        self.paths = paths
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(
+            self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        body = bytearray()
+        size = [0]
+        status = [500]
+
+        async def receive_capturing() -> Message:
+            message = await receive()
+            if message["type"] == "http.request":
+                chunk = message.get("body", b"")
+                size[0] += len(chunk)
+                room = MAX_PAYLOAD_BYTES - len(body)
+                if room > 0:
+                    body.extend(chunk[:room])
+            return message
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive_capturing, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed >= self.threshold:
+                collector = scope.get("aerasync.timings")
+                route = getattr(scope.get("route"), "path", scope["path"])
+                log_slow_request(
+                    scope["path"],
+                    scope["method"],
+                    status[0],
+                    elapsed,
+                    collector.durations if collector is not None else {},
+                    bytes(body),
+                    size[0],
+                )
+                metrics.SLOW_REQUESTS.inc(route)
+
+
+def accepted_encoding(accept_encoding: str) -> Optional[str]:
+    """The preferred supported encoding in an ``Accept-Encoding`` header:
+    ``br`` when brotli is installed, then ``gzip``."""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            accepted.add(name.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted or "*" in accepted:
+        return "gzip"
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # Imported on first use to keep it off the cold-start path
+    import gzip
+
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    """Compress JSON responses of at least ``minimum_size`` bytes with
+    brotli or gzip, as the client accepts.
+
+    Only complete JSON bodies are compressed; streamed responses such
+    as server-sent events pass through untouched so they are not
+    buffered.
+    """
+
+    def __init__(
+        self, app: ASGIApp, minimum_size: int = COMPRESS_MIN_BYTES
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+        encoding = accepted_encoding(accept)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: List[Optional[Message]] = [None]
+
+        async def send_compressed(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = {
+                    k.lower(): v for k, v in message.get("headers", [])
+                }
+                if (
+                    headers.get(b"content-type", b"").startswith(
+                        b"application/json"
+                    )
+                    and b"content-encoding" not in headers
+                ):
+                    # Held until the body shows whether to compress
+                    start[0] = message
+                    return
+            elif (
+                message["type"] == "http.response.body"
+                and start[0] is not None
+            ):
+                held, start[0] = start[0], None
+                body = message.get("body", b"")
+                if (
+                    not message.get("more_body", False)
+                    and len(body) >= self.minimum_size
+                ):
+                    body = compress(body, encoding)
+                    headers = [
+                        (k, v)
+                        for k, v in held.get("headers", [])
+                        if k.lower() != b"content-length"
+                    ]
+                    headers += [
+                        (b"content-encoding", encoding.encode()),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"vary", b"Accept-Encoding"),
+                    ]
+                    held["headers"] = headers
+                    message["body"] = body
+                await send(held)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,130 @@
+"""
+Event-loop lag probe and slow-request log for the AeraSync API.
+
+The async routes run CPU-heavy comparisons inline, so one large request
+stalls every other request on the worker. The lag probe measures how
+late the event loop wakes up from a short sleep; the slow-request log
+keeps the size-capped payload and stage timings of slow requests so
+they can be replayed in a profiler.
+
+Configured through environment variables:
+
+- ``AERASYNC_SLOW_REQUEST_SECONDS``: log requests slower than this
+  (unset disables the sampler)
+- ``AERASYNC_SLOW_LOG``: log file path (``slow_requests.log``)
+- ``AERASYNC_LAG_INTERVAL``: seconds between lag probes (0.5)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from .core import metrics
+
+SLOW_LOG_PATH = os.environ.get("AERASYNC_SLOW_LOG", "slow_requests.log")
+SLOW_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_LOG_BACKUPS = 5
+MAX_PAYLOAD_BYTES = 64 * 1024
+LAG_INTERVAL = float(os.environ.get("AERASYNC_LAG_INTERVAL", "0.5"))
+
+
+def slow_request_threshold() -> Optional[float]:
+    """Slow-request threshold in seconds, or None when disabled."""
+    value = os.environ.get("AERASYNC_SLOW_REQUEST_SECONDS", "")
+    return float(value) if value else None
+
+
+_logger: Optional[logging.Logger] = None
+
+
+def slow_log() -> logging.Logger:
+    """Logger writing JSON lines to a size-rotated local file."""
+    global _logger
+    if _logger is None:
+        from logging.handlers import RotatingFileHandler
+
+        _logger = logging.getLogger("aerasync.slow_requests")
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        handler = RotatingFileHandler(
+            SLOW_LOG_PATH,
+            maxBytes=SLOW_LOG_MAX_BYTES,
+            backupCount=SLOW_LOG_BACKUPS,
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(handler)
+    return _logger
+
+
+def close_slow_log() -> None:
+    """Flush and close the slow-request log file."""
+    global _logger
+    if _logger is not None:
+        for handler in list(_logger.handlers):
+            handler.close()
+            _logger.removeHandler(handler)
+        _logger = None
+
+
+def payload_record(body: bytes, size: int) -> Dict[str, Any]:
+    """Payload fields for a log entry, parsed when complete."""
+    record: Dict[str, Any] = {"payload_bytes": size}
+    if size <= len(body):
+        try:
+            record["payload"] = json.loads(body)
+            return record
+        except ValueError:
+            pass
+    record["payload"] = body.decode("utf-8", errors="replace")
+    record["payload_truncated"] = size > len(body)
+    return record
+
+
+def log_slow_request(
+    path: str,
+    method: str,
+    status: int,
+    duration: float,
+    stages: Dict[str, float],
+    body: bytes,
+    size: int,
+) -> None:
+    """Write one slow request to the slow-request log."""
+    entry: Dict[str, Any] = {
+        "event": "slow_request",
+        "timestamp": time.time(),
+        "method": method,
+        "path": path,
+        "status": status,
+        "duration_ms": round(duration * 1000, 3),
+        "stages_ms": {k: round(v * 1000, 3) for k, v in stages.items()},
+    }
+    entry.update(payload_record(body, size))
+    slow_log().info(json.dumps(entry))
+
+
+async def lag_probe(
+    interval: float = LAG_INTERVAL,
+    threshold: Optional[float] = None,
+) -> None:
+    """Measure event-loop lag until cancelled.
+
+    Each probe sleeps for ``interval``; any extra delay before it wakes
+    is time the loop spent blocked on other work.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - started - interval)
+        metrics.EVENT_LOOP_LAG.set(lag)
+        metrics.EVENT_LOOP_LAG_SECONDS.observe(lag)
+        if threshold is not None and lag > threshold:
+            slow_log().info(json.dumps({
+                "event": "event_loop_lag",
+                "timestamp": time.time(),
+                "lag_ms": round(lag * 1000, 3),
+            }))
@@ -1,15 +1,44 @@
 """
 Routes module for the AeraSync API.
 This package contains all API route definitions.
+
+The combined ``router`` is built on first access, so importing a single
+route module does not import and register every other one.
 """
 
-from .health import router as health_router
-from .aerator import router as aerator_router
-from .root import router as root_router
-from fastapi import APIRouter
+from typing import Any
+
+
+def __getattr__(name: str) -> Any:
+    if name != "router":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    from fastapi import APIRouter
 
-router = APIRouter()
+    from .health import router as health_router
+    from .aerator import router as aerator_router
+    from .root import router as root_router
+    from .simulation import router as simulation_router
+    from .calibration import router as calibration_router
+    from .metrics import router as metrics_router
+    from .admin import router as admin_router
+    from .whatif import router as whatif_router
+    from .live import router as live_router
+    from .jobs import router as jobs_router
+    from .history import router as history_router
+    from .catalog import router as catalog_router
 
-router.include_router(health_router)
-router.include_router(aerator_router)
-router.include_router(root_router)
+    router = APIRouter()
+    router.include_router(health_router)
+    router.include_router(aerator_router)
+    router.include_router(simulation_router)
+    router.include_router(calibration_router)
+    router.include_router(metrics_router)
+    router.include_router(admin_router)
+    router.include_router(whatif_router)
+    router.include_router(live_router)
+    router.include_router(jobs_router)
+    router.include_router(history_router)
+    router.include_router(catalog_router)
+    router.include_router(root_router)
+    globals()["router"] = router
+    return router
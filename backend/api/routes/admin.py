@@ -0,0 +1,146 @@
+"""
+Admin endpoints for the AeraSync API.
+
+Disabled unless the ``AERASYNC_ADMIN_TOKEN`` environment variable is
+set; requests must send the token in the ``X-Admin-Token`` header.
+"""
+
+import asyncio
+import hmac
+import os
+from typing import Any, Dict, List, Optional
+
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+)
+from pydantic import BaseModel, Field
+
+from ..core import profiling, result_cache
+
+router = APIRouter(prefix="/admin")
+
+UPLOAD_MEMORY_BYTES = 1024 * 1024
+
+
+def require_admin(
+    x_admin_token: Optional[str] = Header(default=None),
+) -> None:
+    """Reject requests without the admin token."""
+    token = os.environ.get("AERASYNC_ADMIN_TOKEN", "")
+    if not token:
+        # Hide admin endpoints entirely when not configured
+        raise HTTPException(status_code=404, detail="Not Found")
+    if x_admin_token is None or not hmac.compare_digest(
+        x_admin_token.encode(), token.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+class ProfileRequest(BaseModel):
+    comparisons: int = Field(
+        10,
+        ge=1,
+        le=profiling.MAX_COMPARISONS,
+        description="Number of upcoming comparisons to profile",
+    )
+    memory: bool = Field(True, description="Trace allocations as well")
+
+
+@router.post("/profile", dependencies=[Depends(require_admin)])
+async def start_profile(data: ProfileRequest) -> Dict[str, Any]:
+    """Profile the next N comparisons served by this worker."""
+    session = profiling.start(data.comparisons, data.memory)
+    return {"status": "armed", "requested": session.requested}
+
+
+@router.get("/profile", dependencies=[Depends(require_admin)])
+async def profile_report() -> Dict[str, Any]:
+    """Hot-spot report of the current profiling session."""
+    report = profiling.report()
+    if report is None:
+        raise HTTPException(status_code=404, detail="No profiling session")
+    return report
+
+
+@router.delete("/profile", dependencies=[Depends(require_admin)])
+async def stop_profile() -> Dict[str, Any]:
+    """Discard the current profiling session."""
+    profiling.stop()
+    return {"status": "stopped"}
+
+
+@router.get("/cache", dependencies=[Depends(require_admin)])
+async def cache_stats() -> Dict[str, Any]:
+    """Size and version of the result cache."""
+    if result_cache.cache is None:
+        raise HTTPException(status_code=404, detail="Result cache disabled")
+    return result_cache.cache.stats()
+
+
+@router.delete("/cache", dependencies=[Depends(require_admin)])
+async def clear_cache() -> Dict[str, Any]:
+    """Drop every cached result."""
+    if result_cache.cache is None:
+        raise HTTPException(status_code=404, detail="Result cache disabled")
+    result_cache.cache.clear()
+    return {"status": "cleared"}
+
+
+@router.put("/catalog", dependencies=[Depends(require_admin)])
+async def replace_catalog(
+    aerators: List[Dict[str, Any]] = Body(...),
+) -> Dict[str, Any]:
+    """Replace the aerator catalog for every worker process."""
+    from ..core.catalog import catalog
+
+    if catalog is None:
+        raise HTTPException(status_code=404, detail="No catalog configured")
+    try:
+        count = await asyncio.to_thread(catalog.replace, aerators)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "replaced", "aerators": count}
+
+
+@router.post("/catalog/import", dependencies=[Depends(require_admin)])
+async def import_catalog(
+    request: Request,
+    file_format: str = Query("csv", alias="format", pattern="^(csv|xlsx)$"),
+    mode: str = Query("incremental", pattern="^(incremental|full)$"),
+) -> Dict[str, Any]:
+    """Import a supplier CSV or XLSX body into the aerator catalog.
+
+    An incremental import only rewrites changed rows and keeps aerators
+    missing from the file; a full import drops them.
+    """
+    import tempfile
+    import zipfile
+
+    from ..core.catalog import catalog
+    from ..core.catalog_import import import_stream
+
+    if catalog is None:
+        raise HTTPException(status_code=404, detail="No catalog configured")
+    # Large uploads spill to disk instead of staying in memory
+    with tempfile.SpooledTemporaryFile(max_size=UPLOAD_MEMORY_BYTES) as body:
+        async for chunk in request.stream():
+            body.write(chunk)
+        body.seek(0)
+        try:
+            report = await asyncio.to_thread(
+                import_stream,
+                body,
+                file_format,
+                catalog.path,
+                mode == "incremental",
+            )
+        except (ValueError, KeyError, zipfile.BadZipFile) as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    catalog.reload()
+    return report.to_dict()
@@ -2,11 +2,15 @@
 Aerator comparison endpoints for the AeraSync API.
 """
 
-from fastapi import APIRouter, HTTPException, Body
+from fastapi import APIRouter, HTTPException, Body, Request
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal, Optional
 
-from ..core.aerator_comparer import compare_aerators
+from ..core.aerator_comparer import columnar_result, compare_aerators
+from ..core.history import record_comparison, strip_farm_id
+from ..core.result_cache import cached_compare
+from ..core.timing import stage
 
 router = APIRouter(prefix="")
 
@@ -29,6 +33,24 @@ class FarmDetails(BaseModel):
         ..., description="Shrimp density in kg/m³"
     )
     pond_depth_m: float = Field(..., description="Pond depth in meters")
+    farm_id: Optional[str] = Field(
+        None, description="Farm identifier recorded in the history"
+    )
+    salinity_ppt: Optional[float] = Field(
+        None, description="Water salinity in ppt (enables field OTR model)"
+    )
+    altitude_m: Optional[float] = Field(
+        None, description="Farm altitude in meters"
+    )
+    alpha: Optional[float] = Field(
+        None, description="Oxygen transfer alpha factor"
+    )
+    beta: Optional[float] = Field(
+        None, description="DO saturation beta factor"
+    )
+    do_target_mg_l: Optional[float] = Field(
+        None, description="Dissolved oxygen to maintain in mg/L"
+    )
 
 
 class FinancialDetails(BaseModel):
@@ -39,6 +61,34 @@ class FinancialDetails(BaseModel):
     horizon: int = Field(..., description="Analysis horizon in years")
     safety_margin: float = Field(0.0, description="Safety margin (decimal)")
     temperature: float = Field(30.0, description="Water temperature in °C")
+    loan_fraction: float = Field(
+        0.0, description="Share of capex financed by a loan (decimal)"
+    )
+    loan_rate: float = Field(0.0, description="Loan interest rate (decimal)")
+    loan_term: int = Field(0, description="Loan term in years")
+    tax_rate: float = Field(0.0, description="Income tax rate (decimal)")
+    depreciation_method: str = Field(
+        "none",
+        description="none, straight_line or declining_balance",
+    )
+    depreciation_years: int = Field(
+        0, description="Depreciation period in years"
+    )
+    declining_balance_factor: float = Field(
+        2.0, description="Declining balance factor (2.0 is double)"
+    )
+
+
+class RankingDetails(BaseModel):
+    sort: Literal[
+        "total_annual_cost", "npv_savings", "sae", "cost_per_kg_o2"
+    ] = Field("total_annual_cost", description="Result field to rank by")
+    top_n: Optional[int] = Field(
+        None, ge=1, description="Rows per page, all rows when omitted"
+    )
+    cursor: Optional[str] = Field(
+        None, description="next_cursor of the previous page"
+    )
 
 
 class AeratorComparisonRequest(BaseModel):
@@ -47,20 +97,72 @@ class AeratorComparisonRequest(BaseModel):
     aerators: List[AeratorModel] = Field(
         description="List of aerators to compare", min_length=2
     )
+    ranking: Optional[RankingDetails] = Field(
+        None, description="Return one ranked page of results"
+    )
 
 
 @router.post("/compare")
 async def compare_aerators_endpoint(
     data: AeratorComparisonRequest = Body(...),
-) -> Dict[str, Any]:
-    """Compare aerator options based on the provided survey data."""
+    layout: Literal["rows", "columnar"] = "rows",
+) -> JSONResponse:
+    """Compare aerator options based on the provided survey data.
+
+    ``layout=columnar`` returns one value list per result field instead
+    of one object per aerator.
+    """
     try:
         request_data: Dict[str, Any] = {
-            "farm": data.farm.model_dump(),
+            "farm": data.farm.model_dump(exclude_none=True),
             "financial": data.financial.model_dump(),
             "aerators": [a.model_dump() for a in data.aerators],
         }
-        result = compare_aerators(request_data)
-        return result
+        if data.ranking is not None:
+            request_data["ranking"] = data.ranking.model_dump(
+                exclude_none=True
+            )
+        result = cached_compare(strip_farm_id(request_data), compare_aerators)
+        record_comparison(request_data, result)
+        if layout == "columnar":
+            result = columnar_result(result)
+        with stage("serialization"):
+            return JSONResponse(result)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/compare/stream")
+async def compare_aerators_stream_endpoint(
+    request: Request, layout: Literal["rows", "columnar"] = "rows"
+) -> JSONResponse:
+    """Compare aerators while a large request body is still arriving.
+
+    Takes the same body as ``/compare`` in the entry point and returns
+    the same result, but decodes the aerators one at a time.
+    """
+    # Imported on first use to keep it off the cold-start path
+    from ..core.streaming import compare_stream
+
+    try:
+        result = await compare_stream(request.stream())
+        if layout == "columnar":
+            result = columnar_result(result)
+        with stage("serialization"):
+            return JSONResponse(result)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/compare/ledger")
+async def compare_aerators_ledger_endpoint(
+    data: Dict[str, Any] = Body(...),
+) -> Dict[str, Any]:
+    """Compare aerators from a year-by-year cash-flow ledger."""
+    # Imported on first use to keep it off the cold-start path
+    from ..core.cashflow import compare_aerators_ledger
+
+    try:
+        return compare_aerators_ledger(data)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,22 @@
+"""
+SOTR calibration endpoints for the AeraSync API.
+"""
+
+from fastapi import APIRouter, HTTPException, Body
+from typing import Dict, Any
+
+router = APIRouter(prefix="")
+
+
+@router.post("/calibrate")
+async def calibrate_endpoint(
+    data: Dict[str, Any] = Body(...),
+) -> Dict[str, Any]:
+    """Fit SOTR and SAE from field re-aeration test data."""
+    # Imported on first use to keep it off the cold-start path
+    from ..core.calibration import calibrate_tests
+
+    try:
+        return calibrate_tests(data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
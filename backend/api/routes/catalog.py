@@ -0,0 +1,56 @@
+"""
+Aerator catalog endpoints for the AeraSync API.
+
+Available when the ``AERASYNC_CATALOG`` environment variable points to a
+catalog file (see ``core/catalog.py``).
+"""
+
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+router = APIRouter(prefix="/catalog")
+
+
+def _catalog():
+    # Imported on first use to keep it off the cold-start path
+    from ..core.catalog import catalog
+
+    current = catalog.get() if catalog is not None else None
+    if current is None:
+        raise HTTPException(status_code=404, detail="No aerator catalog")
+    return current
+
+
+@router.get("")
+async def search_catalog(
+    min_sae: Optional[float] = None,
+    max_cost: Optional[float] = None,
+    min_sotr: Optional[float] = None,
+    temperature: Optional[float] = Query(
+        None, description="Include OTR_T at this water temperature in °C"
+    ),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+) -> Dict[str, Any]:
+    """Catalog aerators passing the given bounds, sorted by name."""
+    current = _catalog()
+    entries: List[Dict[str, Any]] = []
+    matches = 0
+    for index in current.search(min_sae, max_cost, min_sotr):
+        if offset <= matches < offset + limit:
+            entries.append(current.entry(index, temperature))
+        matches += 1
+    return {"total": matches, "aerators": entries}
+
+
+@router.get("/{name}")
+async def get_catalog_aerator(
+    name: str, temperature: Optional[float] = None
+) -> Dict[str, Any]:
+    """One catalog aerator and its precomputed invariants."""
+    current = _catalog()
+    index = current.index(name)
+    if index is None:
+        raise HTTPException(status_code=404, detail="Aerator not found")
+    return current.entry(index, temperature)
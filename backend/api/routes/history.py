@@ -0,0 +1,78 @@
+"""
+Comparison history endpoints for the AeraSync API.
+
+Available when the ``AERASYNC_HISTORY_DB`` environment variable is set.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from ..core import history
+
+router = APIRouter(prefix="/history")
+
+DAY_SECONDS = 24 * 60 * 60
+
+
+def _store() -> history.HistoryStore:
+    if history.store is None:
+        raise HTTPException(status_code=404, detail="History is not enabled")
+    return history.store
+
+
+def _since(days: Optional[float], since: Optional[float]) -> Optional[float]:
+    if days is not None:
+        cutoff = time.time() - days * DAY_SECONDS
+        return cutoff if since is None else max(since, cutoff)
+    return since
+
+
+@router.get("")
+async def list_comparisons(
+    farm_id: Optional[str] = None,
+    aerator: Optional[str] = Query(
+        None, description="Comparisons that included this aerator"
+    ),
+    winner: Optional[str] = Query(
+        None, description="Comparisons won by this aerator"
+    ),
+    days: Optional[float] = Query(
+        None, gt=0, description="Only the last N days"
+    ),
+    since: Optional[float] = Query(None, description="Unix time, inclusive"),
+    until: Optional[float] = Query(None, description="Unix time, exclusive"),
+    limit: int = Query(100, ge=1, le=history.MAX_QUERY_ROWS),
+    include_result: bool = False,
+) -> List[Dict[str, Any]]:
+    """Stored comparisons, newest first, without recomputing them."""
+    store = _store()
+    return await asyncio.to_thread(
+        store.query,
+        farm_id=farm_id,
+        aerator=aerator,
+        winner=winner,
+        since=_since(days, since),
+        until=until,
+        limit=limit,
+        include_result=include_result,
+    )
+
+
+@router.get("/winners")
+async def winner_counts(
+    farm_id: Optional[str] = None,
+    days: Optional[float] = Query(None, gt=0),
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+) -> Dict[str, int]:
+    """How many stored comparisons each aerator won."""
+    store = _store()
+    return await asyncio.to_thread(
+        store.winners,
+        farm_id=farm_id,
+        since=_since(days, since),
+        until=until,
+    )
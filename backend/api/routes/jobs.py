@@ -0,0 +1,125 @@
+"""
+Background job endpoints for the AeraSync API.
+"""
+
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import APIRouter, Body, Header, HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+router = APIRouter(prefix="/jobs")
+
+EVENT_POLL_SECONDS = 0.2
+KEEPALIVE_SECONDS = 15.0
+
+
+def _store():
+    # Imported on first use to keep it off the cold-start path
+    from ..core.jobs import jobs
+
+    return jobs
+
+
+def _job(job_id: str):
+    job = _store().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("", status_code=202)
+async def submit_job(
+    response: Response,
+    data: Dict[str, Any] = Body(...),
+    idempotency_key: Optional[str] = Header(default=None),
+) -> Dict[str, Any]:
+    """Queue a ``compare``, ``simulate``, ``sweep`` or ``montecarlo`` job.
+
+    Resubmitting with the same ``Idempotency-Key`` header returns the
+    original job.
+    """
+    from ..core.jobs import JobConflict, QueueFull
+
+    try:
+        job, created = _store().submit(
+            data.get("kind", ""), data.get("payload"), idempotency_key
+        )
+    except JobConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not created:
+        response.status_code = 200
+    return job.to_dict()
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """Status and progress of a job."""
+    return _job(job_id).to_dict()
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str) -> Dict[str, Any]:
+    """Result of a succeeded job, read from the spool."""
+    from ..core.jobs import SUCCEEDED
+
+    job = _job(job_id)
+    if job.status != SUCCEEDED:
+        raise HTTPException(
+            status_code=409,
+            detail=job.error or f"Job is {job.status}, no result available",
+        )
+    result = await asyncio.to_thread(_store().result, job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job result not found")
+    return result
+
+
+@router.get("/{job_id}/events")
+async def job_events(job_id: str) -> StreamingResponse:
+    """Server-sent events with the job state on every change, ending
+    once the job has finished."""
+    from ..core.jobs import FINISHED
+
+    job = _job(job_id)
+
+    async def events() -> AsyncIterator[str]:
+        version = -1
+        idle = 0.0
+        current = job
+        while True:
+            # Jobs of other workers are only updated when fetched
+            current = _store().get(job_id) or current
+            if current.version != version:
+                version = current.version
+                state = current.to_dict()
+                data = json.dumps(state)
+                yield f"event: {state['status']}\ndata: {data}\n\n"
+                if state["status"] in FINISHED:
+                    return
+                idle = 0.0
+            elif idle >= KEEPALIVE_SECONDS:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+            idle += EVENT_POLL_SECONDS
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a queued or running job."""
+    job = _store().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
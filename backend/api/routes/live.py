@@ -0,0 +1,114 @@
+"""
+Live comparison WebSocket endpoint for the AeraSync API.
+
+Clients send the full comparison payload once and then partial patches
+(see ``core.whatif.merge_patch``) as sliders move. Patches arriving
+within ``DEBOUNCE_SECONDS`` of each other are coalesced into a single
+recomputation, and a result is dropped unsent when newer patches have
+arrived while it was computed. Each reply carries ``seq``, the number
+of client messages it includes.
+"""
+
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from ..core.whatif import WhatIfSession
+
+DEBOUNCE_SECONDS = 0.05
+
+# Queued in place of a binary frame or one that is not valid JSON
+INVALID_JSON = object()
+
+router = APIRouter(prefix="")
+
+
+@router.websocket("/ws/compare")
+async def live_compare(websocket: WebSocket) -> None:
+    """Stream comparison results for a stream of input patches."""
+    await websocket.accept()
+    # Per-connection scenario with cached parse and stage results
+    session = WhatIfSession()
+    queued: List[Any] = []
+    received = 0
+    arrived = asyncio.Event()
+
+    async def read_patches() -> None:
+        nonlocal received
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            try:
+                # Binary frames carry "bytes" instead of "text"
+                queued.append(json.loads(message["text"]))
+            except (KeyError, TypeError, ValueError):
+                queued.append(INVALID_JSON)
+            received += 1
+            arrived.set()
+
+    reader = asyncio.create_task(read_patches())
+    try:
+        while True:
+            waiter = asyncio.create_task(arrived.wait())
+            await asyncio.wait(
+                {reader, waiter}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if reader.done():
+                waiter.cancel()
+                break
+            # Debounce: let rapid updates pile up, then coalesce them
+            await asyncio.sleep(DEBOUNCE_SECONDS)
+            arrived.clear()
+            messages, queued[:] = list(queued), []
+            seq = received
+            patches: List[Dict[str, Any]] = [
+                m for m in messages if isinstance(m, dict)
+            ]
+            if any(m is INVALID_JSON for m in messages):
+                await websocket.send_json({
+                    "type": "error",
+                    "seq": seq,
+                    "error": "Messages must be valid JSON",
+                })
+            elif len(patches) < len(messages):
+                await websocket.send_json({
+                    "type": "error",
+                    "seq": seq,
+                    "error": "Messages must be JSON objects",
+                })
+            if not patches:
+                continue
+            try:
+                # Off the event loop so new patches keep arriving
+                result, recomputed = await asyncio.to_thread(
+                    session.apply, *patches
+                )
+            except Exception as e:
+                result, recomputed = {"error": str(e)}, {}
+            if arrived.is_set():
+                continue  # superseded by newer patches
+            if "error" in result:
+                await websocket.send_json({
+                    "type": "error",
+                    "seq": seq,
+                    "error": result["error"],
+                })
+            else:
+                await websocket.send_json({
+                    "type": "result",
+                    "seq": seq,
+                    "result": result,
+                    "recomputed": recomputed,
+                })
+    finally:
+        reader.cancel()
+        if reader.done() and not reader.cancelled():
+            # Retrieve the disconnect so it is not reported as unhandled
+            error = reader.exception()
+            if error is not None and not isinstance(
+                error, WebSocketDisconnect
+            ):
+                raise error
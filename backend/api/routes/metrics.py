@@ -0,0 +1,18 @@
+"""
+Metrics endpoint for the AeraSync API.
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..core.metrics import render
+
+router = APIRouter(prefix="")
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint() -> PlainTextResponse:
+    """Request and compute statistics in the Prometheus text format."""
+    return PlainTextResponse(
+        render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,22 @@
+"""
+Culture cycle simulation endpoints for the AeraSync API.
+"""
+
+from fastapi import APIRouter, HTTPException, Body
+from typing import Dict, Any
+
+router = APIRouter(prefix="")
+
+
+@router.post("/simulate/cycle")
+async def simulate_cycle_endpoint(
+    data: Dict[str, Any] = Body(...),
+) -> Dict[str, Any]:
+    """Simulate the TOD trajectory and aerator fleet over a culture cycle."""
+    # Imported on first use to keep it off the cold-start path
+    from ..core.biomass import simulate_cycle
+
+    try:
+        return simulate_cycle(data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
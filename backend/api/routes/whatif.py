@@ -0,0 +1,63 @@
+"""
+What-if session endpoints for the AeraSync API.
+"""
+
+from fastapi import APIRouter, HTTPException, Body
+from typing import Dict, Any
+
+from ..core.whatif import sessions
+
+router = APIRouter(prefix="/whatif")
+
+
+@router.post("")
+async def create_session(
+    data: Dict[str, Any] = Body(...),
+) -> Dict[str, Any]:
+    """Start a what-if session from a full comparison payload."""
+    try:
+        session_id, result, recomputed = sessions.create(data)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if session_id is None:
+        return result
+    return {
+        "session_id": session_id,
+        "result": result,
+        "recomputed": recomputed,
+    }
+
+
+@router.patch("/{session_id}")
+async def patch_session(
+    session_id: str,
+    patch: Dict[str, Any] = Body(...),
+) -> Dict[str, Any]:
+    """Apply a partial update and recompute the invalidated stages."""
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    try:
+        result, recomputed = session.apply(patch)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if "error" in result:
+        return result
+    return {"result": result, "recomputed": recomputed}
+
+
+@router.get("/{session_id}")
+async def get_session(session_id: str) -> Dict[str, Any]:
+    """Current scenario and result of a session."""
+    session = sessions.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"scenario": session.scenario, "result": session.result}
+
+
+@router.delete("/{session_id}")
+async def delete_session(session_id: str) -> Dict[str, Any]:
+    """End a session."""
+    if not sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    return {"status": "deleted"}
@@ -0,0 +1,311 @@
+"""bench_comparer.py
+Benchmarks for the aerator comparison core and the HTTP endpoints.
+Times calculate_npv, calculate_irr, process_aerator and
+compare_aerators over catalog sizes and horizons, plus the /compare
+routes through an in-process client, and writes machine-readable JSON
+so results can be tracked from one commit to the next.
+
+Usage:
+    python -m backend.benchmarks.bench_comparer --output bench.json
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+
+from ..api.core.aerator_comparer import (
+    calculate_irr,
+    calculate_npv,
+    compare_aerators,
+    parse_comparison_input,
+    process_aerator,
+)
+
+CATALOG_SIZES = [2, 100, 10000]
+HORIZONS = [1, 10, 25, 50]
+HTTP_CATALOG_SIZES = [2, 100, 1000]
+QUICK_CATALOG_SIZES = [2, 100]
+QUICK_HORIZONS = [1, 10]
+# Fast cases are called in a loop until one sample takes this long, so
+# timer resolution and scheduler jitter don't dominate microsecond calls
+MIN_SAMPLE_S = 1e-3
+
+
+class BenchmarkCase(NamedTuple):
+    name: str
+    params: Dict[str, Any]
+    func: Callable[[], Any]
+
+
+def make_request(
+    num_aerators: int, horizon: int, seed: int = 0
+) -> Dict[str, Any]:
+    """Deterministic comparison request with a random aerator catalog."""
+    rng = random.Random(seed)
+    return {
+        "farm": {
+            "tod": 5443.76,
+            "farm_area_ha": 1000,
+            "shrimp_price": 5.0,
+            "culture_days": 120,
+            "shrimp_density_kg_m3": 0.3333333,
+            "pond_depth_m": 1.0,
+        },
+        "financial": {
+            "energy_cost": 0.05,
+            "hours_per_night": 8,
+            "discount_rate": 0.1,
+            "inflation_rate": 0.025,
+            "horizon": horizon,
+            "safety_margin": 0,
+            "temperature": 31.5,
+        },
+        "aerators": [
+            {
+                "name": f"Aerator {i + 1}",
+                "sotr": round(rng.uniform(1.0, 4.0), 2),
+                "power_hp": rng.choice([1, 2, 3, 5, 10]),
+                "cost": round(rng.uniform(300, 1500), 2),
+                "durability": round(rng.uniform(1.0, 6.0), 1),
+                "maintenance": round(rng.uniform(20, 100), 2),
+            }
+            for i in range(num_aerators)
+        ],
+    }
+
+
+def core_cases(
+    catalog_sizes: List[int], horizons: List[int]
+) -> List[BenchmarkCase]:
+    """Benchmark cases for the comparison core."""
+    cases: List[BenchmarkCase] = []
+    for horizon in horizons:
+        cash_flows = [12000.0 * 1.025**t for t in range(horizon)]
+        cases.append(
+            BenchmarkCase(
+                "calculate_npv",
+                {"horizon": horizon},
+                lambda cf=cash_flows: calculate_npv(cf, 0.1, 0.025),
+            )
+        )
+        cases.append(
+            BenchmarkCase(
+                "calculate_irr",
+                {"horizon": horizon},
+                lambda cf=cash_flows: calculate_irr(50000.0, cf),
+            )
+        )
+    for size in catalog_sizes:
+        parsed = parse_comparison_input(make_request(size, horizons[0]))
+        assert not isinstance(parsed, dict)
+        farm, financial, aerators = parsed
+        cases.append(
+            BenchmarkCase(
+                "process_aerator",
+                {"aerators": size},
+                lambda f=farm, fi=financial, a=aerators: [
+                    process_aerator(x, f, fi, 1e6) for x in a
+                ],
+            )
+        )
+        for horizon in horizons:
+            request = make_request(size, horizon)
+            cases.append(
+                BenchmarkCase(
+                    "compare_aerators",
+                    {"aerators": size, "horizon": horizon},
+                    lambda r=request: compare_aerators(r),
+                )
+            )
+    return cases
+
+
+def http_cases(catalog_sizes: List[int]) -> List[BenchmarkCase]:
+    """Benchmark cases for the /compare routes via an in-process client."""
+    from fastapi.testclient import TestClient
+
+    from ..api.main import app
+
+    client = TestClient(app)
+    cases: List[BenchmarkCase] = []
+    for size in catalog_sizes:
+        request = make_request(size, 10)
+        for path in ("/compare", "/compare/ledger"):
+            cases.append(
+                BenchmarkCase(
+                    f"POST {path}",
+                    {"aerators": size, "horizon": 10},
+                    lambda p=path, r=request: client.post(p, json=r),
+                )
+            )
+    return cases
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Linear-interpolated percentile of a list of samples."""
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * q
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def run_case(
+    case: BenchmarkCase,
+    min_repeats: int = 5,
+    max_repeats: int = 200,
+    min_time: float = 0.5,
+) -> Dict[str, Any]:
+    """Time a case until both the repeat and time budgets are met.
+
+    Each sample is the mean time per call over ``number`` calls, with
+    ``number`` doubled until a sample takes at least ``MIN_SAMPLE_S``.
+    """
+    # Like timeit, keep collections of earlier cases' garbage out of
+    # the samples
+    gc.collect()
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _time_case(case, min_repeats, max_repeats, min_time)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _time_case(
+    case: BenchmarkCase, min_repeats: int, max_repeats: int, min_time: float
+) -> Dict[str, Any]:
+    number = 1
+    while True:  # Also the warm-up
+        t0 = time.perf_counter()
+        for _ in range(number):
+            case.func()
+        if time.perf_counter() - t0 >= MIN_SAMPLE_S:
+            break
+        number *= 2
+    samples: List[float] = []
+    started = time.perf_counter()
+    while len(samples) < max_repeats and (
+        len(samples) < min_repeats or time.perf_counter() - started < min_time
+    ):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            case.func()
+        samples.append((time.perf_counter() - t0) / number)
+    return {
+        "name": case.name,
+        "params": case.params,
+        "repeats": len(samples),
+        "number": number,
+        "min_s": min(samples),
+        "median_s": statistics.median(samples),
+        "mean_s": statistics.fmean(samples),
+        "p95_s": percentile(samples, 0.95),
+    }
+
+
+def case_key(name: str, params: Dict[str, Any]) -> str:
+    """Stable identifier of a benchmark case across runs."""
+    args = ",".join(f"{k}={v}" for k, v in sorted(params.items()))
+    return f"{name}[{args}]"
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    quick: bool = False,
+    include_http: bool = True,
+    name_filter: Optional[str] = None,
+    min_repeats: int = 5,
+    min_time: float = 0.5,
+    keys: Optional[Set[str]] = None,
+) -> Dict[str, Any]:
+    """Run the benchmark suite and return a JSON-ready report.
+
+    ``keys`` limits the run to the cases with these ``case_key`` values.
+    """
+    sizes = QUICK_CATALOG_SIZES if quick else CATALOG_SIZES
+    horizons = QUICK_HORIZONS if quick else HORIZONS
+    cases = core_cases(sizes, horizons)
+    if include_http:
+        cases += http_cases(
+            QUICK_CATALOG_SIZES if quick else HTTP_CATALOG_SIZES
+        )
+    if name_filter:
+        cases = [c for c in cases if name_filter in c.name]
+    if keys is not None:
+        cases = [c for c in cases if case_key(c.name, c.params) in keys]
+
+    results: List[Dict[str, Any]] = []
+    for case in cases:
+        result = run_case(case, min_repeats=min_repeats, min_time=min_time)
+        result["key"] = case_key(case.name, case.params)
+        results.append(result)
+        print(
+            f"{result['key']}: median {result['median_s'] * 1000:.3f} ms, "
+            f"p95 {result['p95_s'] * 1000:.3f} ms",
+            file=sys.stderr,
+        )
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", "-o", help="Write the JSON report here")
+    parser.add_argument(
+        "--quick", action="store_true", help="Small sizes and horizons only"
+    )
+    parser.add_argument(
+        "--no-http", action="store_true", help="Skip the HTTP route cases"
+    )
+    parser.add_argument("--filter", help="Only run cases whose name matches")
+    parser.add_argument("--min-repeats", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.5)
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        quick=args.quick,
+        include_http=not args.no_http,
+        name_filter=args.filter,
+        min_repeats=args.min_repeats,
+        min_time=args.min_time,
+    )
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as report_file:
+            report_file.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,477 @@
+"""differential.py
+Differential test harness for the comparison engines. Generates random
+and adversarial comparison requests, runs them through the reference
+``compare_aerators`` (pure Python kernels) and through every fast path
+(compute backends, streaming parser, result cache round trip, ranked
+and columnar layouts), and compares every ``AeratorResult`` field
+within a tolerance. Each mismatch is shrunk to a minimal request that
+still shows it.
+
+Every case is generated from its own seed, so a reported mismatch is
+reproduced with ``--seed`` and ``--cases 1``.
+
+Usage:
+    python -m backend.benchmarks.differential
+    python -m backend.benchmarks.differential --cases 2000 --seed 7
+    python -m backend.benchmarks.differential --engines numpy,streaming
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+)
+
+from ..api.core import aerator_comparer
+from ..api.core.aerator_comparer import columnar_result, compare_aerators
+from ..api.core.backends import load
+from ..api.core.models import AeratorResult
+from ..api.core.result_cache import ResultCache, cache_key
+from ..api.core.streaming import compare_stream_bytes
+
+DEFAULT_CASES = 200
+REL_TOL = 1e-9
+ABS_TOL = 1e-9
+MAX_SHRINK_STEPS = 2000
+
+Request = Dict[str, Any]
+Outcome = Dict[str, Any]
+
+
+class Engine(NamedTuple):
+    name: str
+    # A comparison result in the reference layout
+    run: Callable[[Request], Outcome]
+
+
+class Mismatch(NamedTuple):
+    engine: str
+    seed: int
+    request: Request  # shrunk
+    differences: List[str]
+
+
+def _value(rng: random.Random, low: float, high: float) -> float:
+    """A float in range, often with few decimals to hit rounding ties."""
+    value = rng.uniform(low, high)
+    shape = rng.random()
+    if shape < 0.2:
+        return float(round(value))
+    if shape < 0.4:
+        return round(value, 2)
+    if shape < 0.5:
+        # Halfway between two cents
+        return round(value, 2) + 0.005
+    return value
+
+
+def random_request(rng: random.Random) -> Request:
+    """A comparison request with a mix of ordinary and edge-case inputs."""
+    farm: Dict[str, Any] = {
+        "tod": _value(rng, 0.5, 12),
+        "farm_area_ha": _value(rng, 0.5, 5000),
+        "shrimp_price": _value(rng, 1, 12),
+        "culture_days": rng.randint(60, 200),
+        "shrimp_density_kg_m3": _value(rng, 0.2, 2),
+        "pond_depth_m": _value(rng, 0.5, 2),
+    }
+    if rng.random() < 0.1:
+        farm["farm_area_ha"] = rng.choice([2e9, 5e10])
+    if rng.random() < 0.05:
+        farm["shrimp_price"] = 150.0
+    if rng.random() < 0.25:
+        farm.update(
+            salinity_ppt=_value(rng, 0, 40),
+            altitude_m=_value(rng, 0, 3000),
+            alpha=_value(rng, 0.6, 1),
+            beta=_value(rng, 0.9, 1),
+            do_target_mg_l=_value(rng, 2, 5),
+        )
+
+    financial: Dict[str, Any] = {
+        "energy_cost": _value(rng, 0.01, 0.4),
+        "hours_per_night": rng.randint(0, 24),
+        "discount_rate": _value(rng, 0, 0.25),
+        "inflation_rate": _value(rng, 0, 0.1),
+        "horizon": rng.randint(1, 25),
+        "safety_margin": _value(rng, 0, 40),
+        "temperature": _value(rng, 10, 40),
+    }
+    if rng.random() < 0.1:
+        financial["inflation_rate"] = financial["discount_rate"]
+    if rng.random() < 0.05:
+        financial["temperature"] = rng.choice([-40.0, 130.0])
+    if rng.random() < 0.25:
+        financial.update(
+            loan_fraction=_value(rng, 0, 1),
+            loan_rate=_value(rng, 0, 0.2),
+            loan_term=rng.randint(1, financial["horizon"]),
+            tax_rate=_value(rng, 0, 0.4),
+            depreciation_method=rng.choice(
+                ["none", "straight_line", "declining_balance"]
+            ),
+            depreciation_years=rng.randint(1, 10),
+        )
+
+    aerators = []
+    for i in range(rng.randint(2, 12)):
+        aerator = {
+            "name": f"Aerator {i}",
+            "sotr": _value(rng, 0.3, 6),
+            "power_hp": _value(rng, 0.5, 10),
+            "cost": _value(rng, 0, 6000),
+            "durability": _value(rng, 0.5, 12),
+            "maintenance": _value(rng, 0, 300),
+        }
+        for field, chance in (("sotr", 0.08), ("durability", 0.08)):
+            if rng.random() < chance:
+                aerator[field] = 0.0
+        aerators.append(aerator)
+    if rng.random() < 0.3:
+        # The most efficient aerator is also the cheapest, so its
+        # additional cost over the least efficient one is negative
+        best = max(aerators, key=lambda a: a["sotr"])
+        best["cost"] = min(a["cost"] for a in aerators) / 2
+    if rng.random() < 0.05:
+        # Tolerated only with zero SOTR or durability
+        farm["tod"] = rng.choice([0.0, -1.0])
+    return {"farm": farm, "financial": financial, "aerators": aerators}
+
+
+def edge_cases(request: Request, result: Outcome) -> Set[str]:
+    """The edge cases of the pure Python code a request exercises."""
+    cases = set()
+    aerators = request.get("aerators", [])
+    if any(a.get("sotr") == 0 for a in aerators):
+        cases.add("zero_sotr")
+    if any(a.get("durability") == 0 for a in aerators):
+        cases.add("zero_durability")
+    if request.get("farm", {}).get("farm_area_ha", 0) > 1e9:
+        cases.add("huge_farm")
+    rows = result.get("aeratorResults", [])
+    if rows:
+        least = max(rows, key=lambda r: r["total_annual_cost"])
+        if any(
+            r["total_initial_cost"] < least["total_initial_cost"]
+            for r in rows
+        ):
+            cases.add("negative_additional_cost")
+    if "error" in result:
+        cases.add("error")
+    return cases
+
+
+def outcome(run: Callable[[Request], Outcome], request: Request) -> Outcome:
+    """The result of ``run``, or the type of the exception it raised."""
+    try:
+        return run(request)
+    except Exception as e:
+        return {"exception": type(e).__name__}
+
+
+def reference(request: Request) -> Outcome:
+    """``compare_aerators`` with the pure Python kernels."""
+    previous = aerator_comparer._backend
+    aerator_comparer.set_backend(None)
+    try:
+        return compare_aerators(request)
+    finally:
+        aerator_comparer.set_backend(previous)
+
+
+def _with_backend(backend: Any) -> Callable[[Request], Outcome]:
+    def run(request: Request) -> Outcome:
+        previous = aerator_comparer._backend
+        aerator_comparer.set_backend(backend)
+        try:
+            return compare_aerators(request)
+        finally:
+            aerator_comparer.set_backend(previous)
+
+    return run
+
+
+def _streaming(request: Request) -> Outcome:
+    body = json.dumps(request).encode()
+    return compare_stream_bytes([body[i:i + 7] for i in range(0, len(body), 7)])
+
+
+def _cache_round_trip() -> Callable[[Request], Outcome]:
+    # Entries only live on disk, so every get decodes stored JSON
+    cache = ResultCache(":memory:", memory_entries=0, version="differential")
+
+    def run(request: Request) -> Outcome:
+        result = reference(request)
+        if "error" in result:
+            return result
+        key = cache_key(request)
+        cache.put(key, result)
+        return cache.get(key) or {"exception": "CacheMiss"}
+
+    return run
+
+
+def _ranked(request: Request) -> Outcome:
+    ranked = reference({**request, "ranking": {"sort": "npv_savings"}})
+    if "aeratorResults" in ranked:
+        # Back to request order for the comparison
+        order = {a["name"]: i for i, a in enumerate(request["aerators"])}
+        ranked["aeratorResults"].sort(key=lambda r: order[r["name"]])
+        del ranked["page"]
+    return ranked
+
+
+def _columnar(request: Request) -> Outcome:
+    result = columnar_result(reference(request))
+    if result.get("layout") != "columnar":
+        return result
+    table = result["aeratorResults"]
+    prices = result["equilibriumPrices"]
+    result = dict(result)
+    del result["layout"]
+    result["aeratorResults"] = [
+        {field: values[i] for field, values in table.items()}
+        for i in range(len(table["name"]))
+    ]
+    result["equilibriumPrices"] = dict(zip(prices["name"], prices["price"]))
+    return result
+
+
+def engines() -> List[Engine]:
+    """Every fast path available in this environment."""
+    available = []
+    for name in ("numpy", "numba"):
+        backend = load(name)
+        if backend is not None:
+            available.append(Engine(name, _with_backend(backend)))
+    available += [
+        Engine("streaming", _streaming),
+        Engine("result_cache", _cache_round_trip()),
+        Engine("ranked", _ranked),
+        Engine("columnar", _columnar),
+    ]
+    return available
+
+
+def _close(expected: Any, actual: Any, rel_tol: float, abs_tol: float) -> bool:
+    if isinstance(expected, (int, float)) and isinstance(
+        actual, (int, float)
+    ):
+        if math.isnan(expected) or math.isnan(actual):
+            return math.isnan(expected) and math.isnan(actual)
+        return math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=abs_tol)
+    return expected == actual
+
+
+def differences(
+    expected: Outcome,
+    actual: Outcome,
+    rel_tol: float = REL_TOL,
+    abs_tol: float = ABS_TOL,
+) -> List[str]:
+    """Fields where ``actual`` differs from the reference result."""
+    if "error" in expected or "exception" in expected:
+        return [] if actual == expected else [f"{expected} != {actual}"]
+    if "error" in actual or "exception" in actual:
+        return [f"unexpected {actual}"]
+    found = []
+    if set(expected) != set(actual):
+        found.append(f"keys {sorted(expected)} != {sorted(actual)}")
+    for key in ("tod", "annual_revenue", "winnerLabel"):
+        if not _close(expected.get(key), actual.get(key), rel_tol, abs_tol):
+            found.append(f"{key}: {expected.get(key)} != {actual.get(key)}")
+    rows = expected.get("aeratorResults", [])
+    other_rows = actual.get("aeratorResults", [])
+    if len(rows) != len(other_rows):
+        found.append(f"{len(rows)} != {len(other_rows)} aerator results")
+    for row, other in zip(rows, other_rows):
+        for field in AeratorResult._fields:
+            if not _close(row.get(field), other.get(field), rel_tol, abs_tol):
+                found.append(
+                    f"{row.get('name')}.{field}: "
+                    f"{row.get(field)} != {other.get(field)}"
+                )
+    prices = expected.get("equilibriumPrices", {})
+    other_prices = actual.get("equilibriumPrices", {})
+    for name in sorted(set(prices) | set(other_prices)):
+        if not _close(
+            prices.get(name), other_prices.get(name), rel_tol, abs_tol
+        ):
+            found.append(
+                f"equilibriumPrices.{name}: "
+                f"{prices.get(name)} != {other_prices.get(name)}"
+            )
+    return found
+
+
+def _size(request: Request) -> int:
+    return len(json.dumps(request, sort_keys=True))
+
+
+def _simpler_numbers(value: Any) -> Iterator[Any]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return
+    for candidate in (0, 1, int(value), round(value, 1), round(value, 2)):
+        if candidate != value:
+            yield candidate
+
+
+def simplifications(request: Request) -> Iterator[Request]:
+    """Smaller variants of a request, most aggressive first."""
+    aerators = request.get("aerators", [])
+    for i in range(len(aerators)):
+        yield {**request, "aerators": aerators[:i] + aerators[i + 1:]}
+    for section in ("farm", "financial"):
+        values = request.get(section, {})
+        for key in values:
+            smaller = {k: v for k, v in values.items() if k != key}
+            yield {**request, section: smaller}
+        for key, value in values.items():
+            for candidate in _simpler_numbers(value):
+                yield {**request, section: {**values, key: candidate}}
+    for i, aerator in enumerate(aerators):
+        for key, value in aerator.items():
+            for candidate in _simpler_numbers(value):
+                changed = list(aerators)
+                changed[i] = {**aerator, key: candidate}
+                yield {**request, "aerators": changed}
+    renamed = [
+        {**a, "name": chr(ord("A") + i)} if i < 26 else a
+        for i, a in enumerate(aerators)
+    ]
+    if renamed != aerators:
+        yield {**request, "aerators": renamed}
+
+
+def shrink(
+    request: Request,
+    fails: Callable[[Request], bool],
+    max_steps: int = MAX_SHRINK_STEPS,
+) -> Request:
+    """Greedily simplify ``request`` while it still fails.
+
+    Only strictly smaller requests (by JSON length) are accepted, so
+    shrinking always ends.
+    """
+    current = request
+    steps = 0
+    improved = True
+    while improved and steps < max_steps:
+        improved = False
+        for candidate in simplifications(current):
+            steps += 1
+            if _size(candidate) < _size(current) and fails(candidate):
+                current = candidate
+                improved = True
+                break
+            if steps >= max_steps:
+                break
+    return current
+
+
+def run(
+    cases: int = DEFAULT_CASES,
+    seed: int = 0,
+    selected: Optional[List[Engine]] = None,
+    rel_tol: float = REL_TOL,
+    abs_tol: float = ABS_TOL,
+    coverage: Optional[Dict[str, int]] = None,
+) -> List[Mismatch]:
+    """Run ``cases`` generated requests through every engine.
+
+    Returns one shrunk mismatch per failing case and engine. Edge cases
+    exercised are counted in ``coverage`` when it is given.
+    """
+    mismatches = []
+    for case_seed in range(seed, seed + cases):
+        request = random_request(random.Random(case_seed))
+        expected = outcome(reference, request)
+        if coverage is not None:
+            for case in edge_cases(request, expected):
+                coverage[case] = coverage.get(case, 0) + 1
+        for engine in selected if selected is not None else engines():
+            found = differences(
+                expected, outcome(engine.run, request), rel_tol, abs_tol
+            )
+            if not found:
+                continue
+
+            def fails(candidate: Request, engine: Engine = engine) -> bool:
+                return bool(
+                    differences(
+                        outcome(reference, candidate),
+                        outcome(engine.run, candidate),
+                        rel_tol,
+                        abs_tol,
+                    )
+                )
+
+            minimal = shrink(request, fails)
+            mismatches.append(
+                Mismatch(
+                    engine=engine.name,
+                    seed=case_seed,
+                    request=minimal,
+                    differences=differences(
+                        outcome(reference, minimal),
+                        outcome(engine.run, minimal),
+                        rel_tol,
+                        abs_tol,
+                    ),
+                )
+            )
+    return mismatches
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--cases", type=int, default=DEFAULT_CASES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--engines", help="Comma-separated engines (default: all available)"
+    )
+    parser.add_argument("--rel-tol", type=float, default=REL_TOL)
+    parser.add_argument("--abs-tol", type=float, default=ABS_TOL)
+    args = parser.parse_args(argv)
+
+    selected = engines()
+    if args.engines:
+        names = set(args.engines.split(","))
+        unknown = names - {e.name for e in selected}
+        if unknown:
+            parser.error(f"unavailable engines: {', '.join(sorted(unknown))}")
+        selected = [e for e in selected if e.name in names]
+
+    coverage: Dict[str, int] = {}
+    mismatches = run(
+        args.cases, args.seed, selected, args.rel_tol, args.abs_tol, coverage
+    )
+    print(
+        f"{args.cases} cases x {len(selected)} engines "
+        f"({', '.join(e.name for e in selected)}): "
+        f"{len(mismatches)} mismatches"
+    )
+    print(
+        "edge cases: "
+        + ", ".join(f"{k}={v}" for k, v in sorted(coverage.items()))
+    )
+    for mismatch in mismatches:
+        print(f"\n{mismatch.engine}, seed {mismatch.seed}:")
+        for difference in mismatch.differences[:10]:
+            print(f"  {difference}")
+        print(json.dumps(mismatch.request, indent=2))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""gate.py
+Performance regression gate for the aerator comparison core. Runs the
+aerator_comparer benchmarks, compares median and p95 times with the
+stored baseline and exits non-zero when any case slows down beyond the
+threshold and by more than a minimum delta. Regressed cases are timed
+again before they fail the gate, so one noisy run does not. Every run
+can be appended to a history file so trends stay visible between
+baseline updates.
+
+Usage:
+    python -m backend.benchmarks.gate
+    python -m backend.benchmarks.gate --threshold 0.15
+    python -m backend.benchmarks.gate --update
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .bench_comparer import run_benchmarks
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCHMARK_DIR, "baseline.json")
+HISTORY_PATH = os.path.join(BENCHMARK_DIR, "history.jsonl")
+DEFAULT_THRESHOLD = float(os.environ.get("AERASYNC_BENCH_THRESHOLD", 0.25))
+GATED_FUNCTIONS = (
+    "calculate_npv",
+    "calculate_irr",
+    "process_aerator",
+    "compare_aerators",
+)
+GATED_STATS = ("median_s", "p95_s")
+# Slowdowns smaller than this are noise however large the ratio
+DEFAULT_MIN_DELTA = float(os.environ.get("AERASYNC_BENCH_MIN_DELTA_S", 5e-6))
+# Below this many samples p95 is just the slowest sample, so only the
+# median is gated
+MIN_P95_REPEATS = 20
+# Cases this slow per call time only a call or two per sample, so their
+# p95 follows scheduler and clock-speed noise; only the median is gated
+MAX_P95_MEDIAN_S = 5e-4
+# Regressed cases are timed again this many times; the fastest run counts
+CONFIRM_RUNS = 2
+
+
+class Regression(NamedTuple):
+    key: str
+    stat: str
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline if self.baseline > 0 else 0.0
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    """Load a benchmark report written by bench_comparer."""
+    with open(path) as report_file:
+        return json.load(report_file)
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    min_delta: float = DEFAULT_MIN_DELTA,
+) -> List[Regression]:
+    """Cases whose median or p95 grew by more than ``threshold`` and by
+    at least ``min_delta`` seconds."""
+    baseline_results = {r["key"]: r for r in baseline["results"]}
+    regressions: List[Regression] = []
+    for result in current["results"]:
+        if result["name"] not in GATED_FUNCTIONS:
+            continue
+        reference = baseline_results.get(result["key"])
+        if reference is None:
+            continue
+        for stat in GATED_STATS:
+            if stat == "p95_s" and (
+                min(
+                    result.get("repeats", MIN_P95_REPEATS),
+                    reference.get("repeats", MIN_P95_REPEATS),
+                ) < MIN_P95_REPEATS
+                or reference["median_s"] >= MAX_P95_MEDIAN_S
+            ):
+                continue
+            if (
+                result[stat] > reference[stat] * (1 + threshold)
+                and result[stat] - reference[stat] >= min_delta
+            ):
+                regressions.append(
+                    Regression(
+                        result["key"], stat, reference[stat], result[stat]
+                    )
+                )
+    return regressions
+
+
+def fastest(
+    report: Dict[str, Any], rerun: Dict[str, Any]
+) -> Dict[str, Any]:
+    """``report`` with each stat replaced by the lower of both runs."""
+    reruns = {r["key"]: r for r in rerun["results"]}
+    results = []
+    for result in report["results"]:
+        again = reruns.get(result["key"])
+        if again is not None:
+            result = {
+                **result,
+                **{s: min(result[s], again[s]) for s in GATED_STATS},
+            }
+        results.append(result)
+    return {**report, "results": results}
+
+
+def append_history(
+    report: Dict[str, Any], path: str = HISTORY_PATH
+) -> None:
+    """Append a compact summary of a report to the history file."""
+    entry = {
+        "commit": report["meta"]["commit"],
+        "timestamp": report["meta"]["timestamp"],
+        "python": report["meta"]["python"],
+        "median_s": {r["key"]: r["median_s"] for r in report["results"]},
+        "p95_s": {r["key"]: r["p95_s"] for r in report["results"]},
+    }
+    with open(path, "a") as history_file:
+        history_file.write(json.dumps(entry) + "\n")
+
+
+def _write_report(report: Dict[str, Any], path: str) -> None:
+    with open(path, "w") as report_file:
+        report_file.write(json.dumps(report, indent=2) + "\n")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--report", help="Gate an existing report instead of running"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Allowed slowdown as a fraction (default 0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=DEFAULT_MIN_DELTA,
+        help="Smallest slowdown in seconds that counts (default 5e-6)",
+    )
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument(
+        "--update", action="store_true", help="Store this run as baseline"
+    )
+    parser.add_argument(
+        "--history",
+        nargs="?",
+        const=HISTORY_PATH,
+        help="Append the run to a history file",
+    )
+    args = parser.parse_args(argv)
+
+    if args.report:
+        report = load_report(args.report)
+    else:
+        report = run_benchmarks(quick=args.quick, include_http=False)
+    if args.history:
+        append_history(report, args.history)
+    if args.update or not os.path.exists(args.baseline):
+        _write_report(report, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    baseline = load_report(args.baseline)
+    regressions = compare_reports(
+        baseline, report, args.threshold, args.min_delta
+    )
+    for _ in range(CONFIRM_RUNS if not args.report else 0):
+        if not regressions:
+            break
+        # Time only the regressed cases again to rule out noise
+        rerun = run_benchmarks(
+            quick=args.quick,
+            include_http=False,
+            keys={r.key for r in regressions},
+        )
+        report = fastest(report, rerun)
+        regressions = compare_reports(
+            baseline, report, args.threshold, args.min_delta
+        )
+    for regression in regressions:
+        print(
+            f"REGRESSION {regression.key} {regression.stat}: "
+            f"{regression.baseline * 1000:.3f} ms -> "
+            f"{regression.current * 1000:.3f} ms "
+            f"(x{regression.ratio:.2f})"
+        )
+    if regressions:
+        print(
+            f"{len(regressions)} regression(s) above "
+            f"{args.threshold:.0%} threshold"
+        )
+        return 1
+    print(f"No regressions above {args.threshold:.0%} threshold")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
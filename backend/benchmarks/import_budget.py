@@ -0,0 +1,176 @@
+"""import_budget.py
+Cold-start budget check for the serverless entry point. Imports
+``backend.api.main`` in fresh interpreters with ``-X importtime``, takes
+the median total and project-only import time, and exits non-zero when
+either exceeds its budget or when a module that should load lazily is
+imported at startup.
+
+Usage:
+    python -m backend.benchmarks.import_budget
+    python -m backend.benchmarks.import_budget --budget-ms 400 --runs 9
+    python -m backend.benchmarks.import_budget --no-bytecode
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, NamedTuple, Optional
+
+ENTRY_MODULE = "backend.api.main"
+PROJECT_PREFIX = "backend."
+REPO_ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+DEFAULT_BUDGET_MS = float(os.environ.get("AERASYNC_IMPORT_BUDGET_MS", 750))
+DEFAULT_PROJECT_BUDGET_MS = float(
+    os.environ.get("AERASYNC_PROJECT_IMPORT_BUDGET_MS", 100)
+)
+# Loaded on first use by their endpoints, never by the entry point
+LAZY_MODULES = (
+    "backend.api.core.backends",
+    "backend.api.core.biomass",
+    "backend.api.core.calibration",
+    "backend.api.core.cashflow",
+    "backend.api.core.catalog",
+    "backend.api.core.catalog_import",
+    "backend.api.core.jobs",
+    "backend.api.core.streaming",
+    "cProfile",
+    "logging.handlers",
+    "numpy",
+    "pstats",
+    "sqlite3",
+    "tracemalloc",
+)
+
+
+class ImportSample(NamedTuple):
+    total_ms: float
+    project_ms: float
+    modules: Dict[str, float]  # cumulative ms per imported module
+
+
+def parse_importtime(stderr: str) -> Dict[str, Dict[str, float]]:
+    """Self and cumulative microseconds per module from -X importtime."""
+    modules: Dict[str, Dict[str, float]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = float(fields[0]), float(fields[1])
+        except ValueError:
+            continue  # column header
+        modules[fields[2].strip()] = {
+            "self": self_us,
+            "cumulative": cumulative_us,
+        }
+    return modules
+
+
+def measure_import(
+    module: str = ENTRY_MODULE, bytecode: bool = True
+) -> ImportSample:
+    """Import ``module`` once in a fresh interpreter.
+
+    Without bytecode every module is compiled from source, as on a
+    read-only deployment that ships no ``__pycache__``.
+    """
+    env = dict(os.environ)
+    command = [sys.executable, "-X", "importtime"]
+    if not bytecode:
+        command.append("-B")
+        env["PYTHONPYCACHEPREFIX"] = tempfile.mkdtemp()
+    command += ["-c", f"import {module}"]
+    completed = subprocess.run(
+        command,
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = parse_importtime(completed.stderr)
+    project_us = sum(
+        m["self"]
+        for name, m in modules.items()
+        if name == "backend" or name.startswith(PROJECT_PREFIX)
+    )
+    return ImportSample(
+        total_ms=modules[module]["cumulative"] / 1000,
+        project_ms=project_us / 1000,
+        modules={k: v["cumulative"] / 1000 for k, v in modules.items()},
+    )
+
+
+def check_budget(
+    runs: int = 5,
+    budget_ms: float = DEFAULT_BUDGET_MS,
+    project_budget_ms: float = DEFAULT_PROJECT_BUDGET_MS,
+    bytecode: bool = True,
+) -> Dict[str, Any]:
+    """Median import times over ``runs`` and any budget violations."""
+    samples = [measure_import(bytecode=bytecode) for _ in range(runs)]
+    total_ms = statistics.median(s.total_ms for s in samples)
+    project_ms = statistics.median(s.project_ms for s in samples)
+    eager = [m for m in LAZY_MODULES if m in samples[0].modules]
+    violations: List[str] = []
+    if total_ms > budget_ms:
+        violations.append(
+            f"{ENTRY_MODULE} imports in {total_ms:.1f} ms "
+            f"(budget {budget_ms:.0f} ms)"
+        )
+    if project_ms > project_budget_ms:
+        violations.append(
+            f"Project modules take {project_ms:.1f} ms "
+            f"(budget {project_budget_ms:.0f} ms)"
+        )
+    for name in eager:
+        violations.append(f"{name} is imported at startup")
+    slowest = sorted(
+        samples[0].modules.items(), key=lambda item: item[1], reverse=True
+    )[:10]
+    return {
+        "total_ms": total_ms,
+        "project_ms": project_ms,
+        "slowest": slowest,
+        "violations": violations,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument(
+        "--project-budget-ms", type=float, default=DEFAULT_PROJECT_BUDGET_MS
+    )
+    parser.add_argument(
+        "--no-bytecode",
+        action="store_true",
+        help="Compile all modules from source on every run",
+    )
+    args = parser.parse_args(argv)
+
+    result = check_budget(
+        runs=args.runs,
+        budget_ms=args.budget_ms,
+        project_budget_ms=args.project_budget_ms,
+        bytecode=not args.no_bytecode,
+    )
+    print(
+        f"{ENTRY_MODULE}: {result['total_ms']:.1f} ms total, "
+        f"{result['project_ms']:.1f} ms in project modules"
+    )
+    for name, cumulative_ms in result["slowest"]:
+        print(f"  {cumulative_ms:8.1f} ms  {name}")
+    for violation in result["violations"]:
+        print(f"OVER BUDGET {violation}")
+    return 1 if result["violations"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Test cases for the pluggable compute backends."""
+
+import importlib.util
+import random
+import unittest
+import warnings
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from backend.api.core import aerator_comparer, backends
+from backend.api.core.aerator_comparer import compare_aerators, solve_irr
+from backend.api.core.backends import PYTHON, configure, load, verify
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+HAS_NUMBA = importlib.util.find_spec("numba") is not None
+
+
+class TestBackends(unittest.TestCase):
+    """Test cases for backend selection and verification."""
+
+    def setUp(self):
+        """Set up base test data."""
+        self.base_request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+                "loan_fraction": 0.5,
+                "loan_rate": 0.08,
+                "loan_term": 5,
+            },
+            "aerators": [
+                {
+                    "name": f"Aerator {i}",
+                    "sotr": 1.5 + i / 10,
+                    "power_hp": 2 + i % 3,
+                    "cost": 700 + 50 * i,
+                    "durability": 2.0 + i / 5,
+                    "maintenance": 65,
+                }
+                for i in range(30)
+            ],
+        }
+
+    def tearDown(self):
+        """Go back to pure Python."""
+        configure("python")
+
+    def check_backend(self, name: str):
+        """A backend agrees with pure Python everywhere."""
+        backend = load(name)
+        self.assertIsNotNone(backend)
+        self.assertEqual(verify(backend), [])
+        expected = compare_aerators(self.base_request)
+        self.assertEqual(configure(name), name)
+        self.assertEqual(aerator_comparer._backend.name, name)
+        self.assertEqual(compare_aerators(self.base_request), expected)
+
+    def test_python(self):
+        """Pure Python is the default and needs no backend object."""
+        self.assertEqual(configure("python"), "python")
+        self.assertIsNone(aerator_comparer._backend)
+        self.assertEqual(verify(PYTHON), [])
+
+    @unittest.skipUnless(HAS_NUMPY, "numpy is not installed")
+    def test_numpy(self):
+        """The NumPy backend reproduces pure Python results."""
+        self.check_backend("numpy")
+
+    @unittest.skipUnless(HAS_NUMBA, "numba is not installed")
+    def test_numba(self):
+        """The Numba backend reproduces pure Python results."""
+        self.check_backend("numba")
+
+    @unittest.skipUnless(HAS_NUMBA, "numba is not installed")
+    def test_numba_irr_unrounded(self):
+        """The compiled IRR solver sums exactly like sum() does."""
+        backend = load("numba")
+        rng = random.Random(7)
+        for _ in range(500):
+            flows = [
+                rng.uniform(-1e5, 1e6) * rng.choice([1e-3, 1, 1e3])
+                for _ in range(rng.randint(1, 40))
+            ]
+            investment = rng.uniform(1, 1e7)
+            with self.subTest(flows=flows, investment=investment):
+                self.assertEqual(
+                    backend.solve_irr(investment, flows),
+                    solve_irr(investment, flows),
+                )
+
+    def test_auto(self):
+        """Auto picks one of the installed backends."""
+        installed = [n for n in backends.FACTORIES if load(n) is not None]
+        self.assertIn(configure("auto"), installed)
+        self.assertEqual(backends.active, configure("auto"))
+
+    def test_rejects_mismatches(self):
+        """A backend that disagrees with pure Python is never used."""
+        broken = PYTHON._replace(name="broken", npv=lambda *args: 0.0)
+        factories = dict(backends.FACTORIES)
+        backends.FACTORIES["broken"] = lambda: broken
+        try:
+            self.assertNotEqual(verify(broken), [])
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                self.assertEqual(configure("broken"), "python")
+            self.assertIn("disagrees", str(caught[0].message))
+            self.assertIsNone(aerator_comparer._backend)
+        finally:
+            backends.FACTORIES.clear()
+            backends.FACTORIES.update(factories)
+        with self.assertRaises(ValueError):
+            configure("fortran")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Test cases for the performance regression gate."""
+
+import unittest
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from backend.benchmarks.gate import compare_reports, fastest
+
+
+def make_report(median: float, p95: float, name: str) -> Dict[str, Any]:
+    """Single-case benchmark report."""
+    return {
+        "meta": {},
+        "results": [
+            {
+                "name": name,
+                "key": f"{name}[horizon=10]",
+                "median_s": median,
+                "p95_s": p95,
+            }
+        ],
+    }
+
+
+class TestBenchmarkGate(unittest.TestCase):
+    """Test cases for comparing benchmark reports with a baseline."""
+
+    def test_regressions_beyond_threshold(self):
+        """Median or p95 slowdowns beyond the threshold are reported."""
+        baseline = make_report(1e-4, 2e-4, "calculate_irr")
+        within = make_report(1.2e-4, 2.4e-4, "calculate_irr")
+        self.assertEqual(compare_reports(baseline, within, 0.25), [])
+        slower = make_report(1.3e-4, 2e-4, "calculate_irr")
+        regressions = compare_reports(baseline, slower, 0.25)
+        self.assertEqual([r.stat for r in regressions], ["median_s"])
+        self.assertAlmostEqual(regressions[0].ratio, 1.3)
+        tail = make_report(1e-4, 3e-4, "calculate_irr")
+        self.assertEqual(
+            [r.stat for r in compare_reports(baseline, tail, 0.25)], ["p95_s"]
+        )
+
+    def test_noise_floor(self):
+        """Microsecond slowdowns below the minimum delta are ignored."""
+        baseline = make_report(1e-6, 2e-6, "calculate_npv")
+        noisy = make_report(3e-6, 6e-6, "calculate_npv")
+        self.assertEqual(compare_reports(baseline, noisy, 0.25, 5e-6), [])
+        self.assertEqual(
+            len(compare_reports(baseline, noisy, 0.25, 1e-6)), 2
+        )
+
+    def test_p95_needs_enough_samples(self):
+        """p95 of a handful of samples is not gated, the median is."""
+        baseline = make_report(1e-4, 2e-4, "compare_aerators")
+        current = make_report(1e-4, 3e-4, "compare_aerators")
+        current["results"][0]["repeats"] = 5
+        self.assertEqual(compare_reports(baseline, current), [])
+        current["results"][0]["median_s"] = 2e-4
+        self.assertEqual(
+            [r.stat for r in compare_reports(baseline, current)],
+            ["median_s"],
+        )
+
+    def test_p95_of_slow_cases(self):
+        """Cases timed in milliseconds are gated on the median only."""
+        baseline = make_report(7e-4, 9e-4, "process_aerator")
+        current = make_report(7e-4, 1.2e-3, "process_aerator")
+        self.assertEqual(compare_reports(baseline, current), [])
+        current["results"][0]["median_s"] = 1e-3
+        self.assertEqual(
+            [r.stat for r in compare_reports(baseline, current)],
+            ["median_s"],
+        )
+
+    def test_fastest_of_reruns(self):
+        """A confirming rerun keeps the lower time of each statistic."""
+        first = make_report(1.5, 2.0, "calculate_irr")
+        rerun = make_report(1.0, 3.0, "calculate_irr")
+        result = fastest(first, rerun)["results"][0]
+        self.assertEqual((result["median_s"], result["p95_s"]), (1.0, 2.0))
+
+    def test_only_gated_functions_and_known_cases(self):
+        """HTTP cases and cases missing from the baseline are not gated."""
+        baseline = make_report(1.0, 1.0, "POST /compare")
+        current = make_report(5.0, 5.0, "POST /compare")
+        self.assertEqual(compare_reports(baseline, current), [])
+        baseline = make_report(1.0, 1.0, "compare_aerators")
+        current = make_report(5.0, 5.0, "process_aerator")
+        self.assertEqual(compare_reports(baseline, current), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
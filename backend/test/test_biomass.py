@@ -0,0 +1,91 @@
+"""Test cases for the culture cycle biomass and TOD simulation."""
+
+import unittest
+from copy import deepcopy
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from backend.api.core.biomass import simulate_cycle
+
+
+class TestBiomassSimulation(unittest.TestCase):
+    """Test cases for the growth, respiration and fleet sizing model."""
+
+    def setUp(self):
+        """Set up a small two-pond farm."""
+        self.base_request: Dict[str, Any] = {
+            "culture_days": 120,
+            "ponds": [
+                {"name": "P1", "area_ha": 5, "pond_depth_m": 1.2},
+                {"name": "P2", "area_ha": 3, "stocking_density_pl_m2": 150},
+            ],
+            "aerator": {"name": "Paddlewheel", "sotr": 2.2, "power_hp": 3},
+            "financial": {"energy_cost": 0.05, "hours_per_night": 8},
+        }
+
+    def test_tod_and_fleet_ramp_up(self):
+        """TOD grows with biomass and installed aerators never decrease."""
+        result = simulate_cycle(self.base_request)
+        self.assertNotIn("error", result)
+        series = result["series"]
+        self.assertEqual(len(series["days"]), 120)
+        self.assertGreater(series["tod"][-1], series["tod"][0])
+        installed = series["installed_aerators"]
+        self.assertTrue(all(a <= b for a, b in zip(installed, installed[1:])))
+        self.assertEqual(result["summary"]["peak_aerators"], installed[-1])
+
+    def test_weekly_resolution(self):
+        """Weekly aggregation sums energy and keeps the peak fleet."""
+        daily = simulate_cycle(self.base_request)
+        request = deepcopy(self.base_request)
+        request["resolution"] = "week"
+        weekly = simulate_cycle(request)
+        self.assertEqual(len(weekly["series"]["weeks"]), 18)
+        self.assertAlmostEqual(
+            sum(weekly["series"]["energy_kwh"]),
+            daily["summary"]["cycle_energy_kwh"],
+            delta=1.0,
+        )
+        self.assertEqual(
+            weekly["series"]["installed_aerators"][-1],
+            daily["summary"]["peak_aerators"],
+        )
+
+    def test_deeper_pond_needs_more_oxygen(self):
+        """Water column respiration scales with pond depth."""
+        shallow = simulate_cycle(self.base_request)
+        request = deepcopy(self.base_request)
+        for pond in request["ponds"]:
+            pond["pond_depth_m"] = 3.0
+        deep = simulate_cycle(request)
+        self.assertGreater(
+            deep["summary"]["peak_tod"], shallow["summary"]["peak_tod"]
+        )
+
+    def test_invalid_inputs(self):
+        """Invalid inputs return error messages."""
+        cases = [
+            ({"ponds": []}, "At least one pond is required"),
+            ({"culture_days": 0}, "Culture days must be positive"),
+            (
+                {"aerator": {"sotr": 0, "power_hp": 3}},
+                "Aerator must have positive SOTR",
+            ),
+            (
+                {"aerator": {"power_hp": 3}},
+                "Missing required aerator field: sotr",
+            ),
+        ]
+        for update, error in cases:
+            with self.subTest(error=error):
+                request = deepcopy(self.base_request)
+                request.update(update)
+                self.assertEqual(simulate_cycle(request)["error"], error)
+
+
+if __name__ == "__main__":
+    unittest.main()
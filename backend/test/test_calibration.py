@@ -0,0 +1,179 @@
+"""Test cases for SOTR calibration from re-aeration test data."""
+
+import io
+import math
+import unittest
+from typing import List
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from backend.api.core.calibration import (
+    calibrate_stream,
+    calibrate_tests,
+    fit_reaeration_batch,
+    read_reaeration_csv,
+    ReaerationTest,
+)
+
+
+def recovery_curve(
+    kla_per_h: float, cs: float, c0: float, minutes: int = 60
+) -> List[float]:
+    """Noise-free DO recovery curve sampled every minute."""
+    return [
+        cs - (cs - c0) * math.exp(-kla_per_h * t / 60)
+        for t in range(minutes)
+    ]
+
+
+class TestCalibration(unittest.TestCase):
+    """Test cases for the nonlinear re-aeration fit."""
+
+    def test_fit_recovers_parameters(self):
+        """A batch of exact curves is fitted back to its parameters."""
+        truths = [(2.5, 9.09, 0.5), (4.0, 8.5, 1.0), (1.2, 7.8, 0.2)]
+        tests = [
+            ReaerationTest(
+                test_id=str(i),
+                time_min=[float(t) for t in range(60)],
+                do_mg_l=recovery_curve(*truth),
+                volume_m3=1000,
+                temperature=20,
+                power_hp=2,
+            )
+            for i, truth in enumerate(truths)
+        ]
+        results = fit_reaeration_batch(tests)
+        for (kla, cs, c0), result in zip(truths, results):
+            with self.subTest(test_id=result.test_id):
+                self.assertTrue(result.converged)
+                self.assertAlmostEqual(result.kla_t, kla, places=3)
+                self.assertAlmostEqual(result.cs_t, cs, places=2)
+                self.assertAlmostEqual(result.c0, c0, places=2)
+                # At 20 °C in fresh water SOTR = KLa * Cs * V
+                self.assertAlmostEqual(
+                    result.sotr, kla * cs * 1000 / 1000, delta=0.02
+                )
+        self.assertAlmostEqual(results[0].kla_20, results[0].kla_t)
+
+    def test_csv_is_streamed_in_batches(self):
+        """CSV rows are grouped by test and fitted batch by batch."""
+        lines = ["test_id,time_min,do_mg_l,volume_m3,temperature,power_hp"]
+        for test_id in ("a", "b", "c"):
+            for t, do in enumerate(recovery_curve(3.0, 8.0, 1.0)):
+                lines.append(f"{test_id},{t},{do},500,28,1.5")
+        csv_file = io.StringIO("\n".join(lines) + "\n")
+        stream = calibrate_stream(read_reaeration_csv(csv_file), batch_size=2)
+        first = next(stream)
+        self.assertEqual(first.test_id, "a")
+        remaining = list(stream)
+        self.assertEqual([r.test_id for r in remaining], ["b", "c"])
+        # Warmer water fits a higher KLa than its 20 °C equivalent
+        self.assertGreater(first.kla_t, first.kla_20)
+        self.assertGreater(first.sae, 0)
+
+    def test_unfittable_tests(self):
+        """Degenerate tests get an error without failing the batch."""
+        good = recovery_curve(2.5, 9.09, 0.5, minutes=10)
+        cases = {
+            "same_time": ([0.0] * 10, good),
+            "negative_do": ([float(t) for t in range(10)], [-1.0] * 10),
+            "good": ([float(t) for t in range(10)], good),
+        }
+        tests = [
+            ReaerationTest(
+                test_id=test_id,
+                time_min=times,
+                do_mg_l=values,
+                volume_m3=1000,
+                temperature=20,
+                power_hp=2,
+            )
+            for test_id, (times, values) in cases.items()
+        ]
+        same_time, negative, fitted = fit_reaeration_batch(tests)
+        for result in (same_time, negative):
+            with self.subTest(test_id=result.test_id):
+                self.assertFalse(result.converged)
+                self.assertIsNotNone(result.error)
+                self.assertEqual(result.sotr, 0)
+        self.assertTrue(fitted.converged)
+        self.assertIsNone(fitted.error)
+        self.assertAlmostEqual(fitted.kla_t, 2.5, places=3)
+
+    def test_falling_curve_is_unfittable(self):
+        """DO that falls instead of recovering gets an error."""
+        test = ReaerationTest(
+            test_id="falling",
+            time_min=[float(t) for t in range(8)],
+            do_mg_l=[7, 6, 5.2, 4.6, 4.1, 3.8, 3.2, 2.9],
+            volume_m3=1000,
+            temperature=20,
+            power_hp=2,
+        )
+        result = fit_reaeration_batch([test])[0]
+        self.assertFalse(result.converged)
+        self.assertEqual(
+            result.error, "DO readings must recover toward saturation"
+        )
+        self.assertEqual((result.sotr, result.sae), (0, 0))
+
+    def test_non_finite_inputs(self):
+        """nan, inf and non-positive volumes are rejected up front."""
+        base = {
+            "test_id": "t1",
+            "time_min": [0, 1, 2, 3],
+            "do_mg_l": [1, 2, 3, 3.5],
+            "volume_m3": 100,
+            "temperature": 25,
+        }
+        for field, value, message in (
+            ("do_mg_l", [1, float("nan"), 3, 3.5], "non-finite do_mg_l"),
+            ("time_min", [0, 1, float("inf"), 3], "non-finite time_min"),
+            ("volume_m3", float("nan"), "non-finite volume_m3"),
+            ("temperature", float("inf"), "non-finite temperature"),
+            ("volume_m3", 0, "positive volume_m3"),
+        ):
+            with self.subTest(field=field, value=value):
+                error = calibrate_tests({"tests": [{**base, field: value}]})
+                self.assertIn(message, error["error"])
+        lines = [
+            "test_id,time_min,do_mg_l,volume_m3",
+            "a,0,1,500",
+            "a,1,nan,500",
+            "a,2,3,500",
+            "a,3,3.5,500",
+        ]
+        with self.assertRaises(ValueError):
+            list(calibrate_stream(read_reaeration_csv(lines)))
+
+    def test_invalid_tests(self):
+        """Invalid test payloads return error messages."""
+        self.assertEqual(
+            calibrate_tests({"tests": []})["error"],
+            "At least one re-aeration test is required",
+        )
+        self.assertEqual(
+            calibrate_tests({
+                "tests": [{"time_min": [0, 1], "do_mg_l": [1, 2]}]
+            })["error"],
+            "Missing required test field: volume_m3",
+        )
+        self.assertEqual(
+            calibrate_tests({
+                "tests": [{
+                    "test_id": "t1",
+                    "time_min": [0, 1],
+                    "do_mg_l": [1, 2],
+                    "volume_m3": 100,
+                }]
+            })["error"],
+            "Test t1 needs at least 4 DO readings",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""Test cases for the year-by-year cash-flow ledger."""
+
+import unittest
+from copy import deepcopy
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from backend.api.core.cashflow import (
+    compare_aerators_ledger,
+    fleet_age_schedule,
+    irr_rows,
+    payback_rows,
+    replacement_counts,
+)
+
+
+class TestCashFlowLedger(unittest.TestCase):
+    """Test cases for replacement timing, degradation and metrics."""
+
+    def setUp(self):
+        """Set up base test data from sample request."""
+        self.base_request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": "Aerator 1",
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 900,
+                    "durability": 4.5,
+                    "maintenance": 50,
+                },
+            ],
+        }
+
+    def test_fleet_age_schedule(self):
+        """Replacements are booked in the year they happen."""
+        self.assertEqual(fleet_age_schedule(2.0, 5), (0, 1, 0, 1, 0))
+        self.assertEqual(
+            fleet_age_schedule(4.5, 10), (0, 1, 2, 3, 0, 1, 2, 3, 4, 0)
+        )
+        self.assertEqual(fleet_age_schedule(0, 3), (0, 1, 2))
+
+    def test_sub_year_durability(self):
+        """Every replacement within a year is booked in its capex."""
+        self.assertEqual(replacement_counts(0.5, 3), (1, 2, 2))
+        self.assertEqual(replacement_counts(0.1, 3), (9, 10, 10))
+        self.assertEqual(replacement_counts(2.0, 5), (0, 0, 1, 0, 1))
+        self.assertEqual(replacement_counts(0, 3), (0, 0, 0))
+        request = deepcopy(self.base_request)
+        request["financial"]["inflation_rate"] = 0
+        request["aerators"][0]["durability"] = 0.1
+        ledger = compare_aerators_ledger(request)["aeratorLedgers"][0]
+        fleet = ledger["fleet"][1]
+        # Ten purchases a year, as cost / durability charges
+        self.assertAlmostEqual(ledger["capex"][2], fleet * 700 * 10)
+        self.assertAlmostEqual(ledger["capex"][1], fleet * 700 * 9)
+
+    def test_tiny_durability(self):
+        """A tiny durability is scheduled without looping per
+        replacement."""
+        self.assertEqual(fleet_age_schedule(1e-7, 50), (0,) * 50)
+        self.assertEqual(replacement_counts(1e-7, 2)[1], 10**7)
+        request = deepcopy(self.base_request)
+        request["financial"]["horizon"] = 50
+        request["aerators"][0]["durability"] = 1e-7
+        result = compare_aerators_ledger(request)
+        self.assertNotIn("error", result)
+        self.assertEqual(len(result["aeratorLedgers"][0]["capex"]), 51)
+
+    def test_replacement_capex_in_replacement_years(self):
+        """Capex only appears at purchase and replacement years."""
+        result = compare_aerators_ledger(self.base_request)
+        ledger = result["aeratorLedgers"][1]
+        replacement_years = [
+            year for year, capex in enumerate(ledger["capex"]) if capex > 0
+        ]
+        self.assertEqual(replacement_years, [0, 5, 10])
+        self.assertEqual(result["winnerLabel"], "Aerator 2")
+        self.assertEqual(result["baselineLabel"], "Aerator 1")
+
+    def test_sotr_decay_grows_fleet(self):
+        """Degrading SOTR needs more units and costs more over time."""
+        request = deepcopy(self.base_request)
+        request["ledger"] = {"sotr_decay_rate": 0.05}
+        degraded = compare_aerators_ledger(request)
+        fresh = compare_aerators_ledger(self.base_request)
+        fleet = degraded["aeratorLedgers"][1]["fleet"]
+        self.assertGreater(fleet[4], fleet[1])
+        self.assertEqual(fleet[5], fleet[1])
+        self.assertGreater(
+            degraded["aeratorLedgers"][1]["pv_cost"],
+            fresh["aeratorLedgers"][1]["pv_cost"],
+        )
+
+    def test_financial_metrics(self):
+        """IRR, payback and NPV follow the ledger savings."""
+        irr = irr_rows([[-100, 60, 60], [100, -10], [0, 0]])
+        self.assertAlmostEqual(irr[0] or 0, 0.130662, places=5)
+        self.assertIsNone(irr[1])
+        self.assertIsNone(irr[2])
+        self.assertEqual(payback_rows([[-100, 50, 100]]), [1.5])
+        self.assertEqual(payback_rows([[-100, 10, 10]]), [None])
+        result = compare_aerators_ledger(self.base_request)
+        baseline = result["aeratorLedgers"][0]
+        self.assertEqual(baseline["npv_savings"], 0)
+        self.assertTrue(all(s == 0 for s in baseline["savings"]))
+
+    def test_invalid_inputs(self):
+        """Invalid ledger inputs return error messages."""
+        request = deepcopy(self.base_request)
+        request["ledger"] = {"sotr_decay_rate": 1.5}
+        self.assertEqual(
+            compare_aerators_ledger(request)["error"],
+            "SOTR decay rate must be between 0 and 1",
+        )
+        request = deepcopy(self.base_request)
+        request["aerators"] = request["aerators"][:1]
+        self.assertEqual(
+            compare_aerators_ledger(request)["error"],
+            "At least two aerators are required",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Test cases for the memory-mapped aerator catalog."""
+
+import mmap
+import os
+import shutil
+import tempfile
+import unittest
+from typing import Any, Dict, List
+from unittest.mock import patch
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from fastapi.testclient import TestClient
+
+from backend.api.core import catalog as catalog_module
+from backend.api.core.aerator_comparer import calculate_otr_t, calculate_sae
+from backend.api.core.catalog import Catalog, CatalogHandle, build_catalog
+from backend.api.main import app
+
+
+class TestCatalog(unittest.TestCase):
+    """Test cases for building, mapping and swapping catalogs."""
+
+    def setUp(self):
+        """Set up a scratch catalog file and supplier data."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "catalog.bin")
+        self.aerators: List[Dict[str, Any]] = [
+            {
+                "name": f"Model {i:03d}",
+                "power_hp": 1 + i % 4,
+                "sotr": 1.5 + (i % 7) * 0.4,
+                "cost": 600 + 25 * i,
+                "durability": 2 + i % 5,
+                "maintenance": 40 + i % 30,
+            }
+            for i in range(200)
+        ]
+
+    def tearDown(self):
+        """Remove the catalog file."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_round_trip(self):
+        """Mapped entries match the supplier data and invariants."""
+        self.assertEqual(build_catalog(self.aerators[::-1], self.path), 200)
+        catalog = Catalog(self.path)
+        self.assertEqual(len(catalog), 200)
+        index = catalog.index("Model 042")
+        source = self.aerators[42]
+        entry = catalog.entry(index, temperature=31.0)
+        for field in ("power_hp", "sotr", "cost", "maintenance"):
+            self.assertEqual(entry[field], source[field])
+        self.assertEqual(
+            entry["sae"], calculate_sae(source["sotr"], source["power_hp"])
+        )
+        self.assertEqual(entry["otr_t"], calculate_otr_t(source["sotr"], 31))
+        self.assertEqual(
+            catalog.otr_t(index, 31.5), calculate_otr_t(source["sotr"], 31.5)
+        )
+        self.assertEqual(catalog.aerator(index).name, "Model 042")
+        self.assertIsNone(catalog.index("Model 999"))
+        self.assertEqual(catalog.name(0), "Model 000")
+
+    def test_columns_are_mapped(self):
+        """Columns are views of the mapped file, not copies."""
+        build_catalog(self.aerators, self.path)
+        catalog = Catalog(self.path)
+        column = catalog.column("cost")
+        self.assertIsInstance(column.obj, mmap.mmap)
+        self.assertEqual(list(column[:3]), [600.0, 625.0, 650.0])
+
+    def test_search(self):
+        """Bounds filter on the mapped columns."""
+        build_catalog(self.aerators, self.path)
+        catalog = Catalog(self.path)
+        found = [catalog.entry(i) for i in catalog.search(max_cost=700)]
+        self.assertEqual([e["name"] for e in found], [
+            "Model 000", "Model 001", "Model 002", "Model 003", "Model 004"
+        ])
+        for i in catalog.search(min_sae=1.0, min_sotr=3.0):
+            self.assertGreaterEqual(catalog.column("sae")[i], 1.0)
+            self.assertGreaterEqual(catalog.column("sotr")[i], 3.0)
+
+    def test_invalid_catalog(self):
+        """Missing fields and duplicate names are rejected."""
+        with self.assertRaises(ValueError):
+            build_catalog([{"name": "A", "sotr": 1}], self.path)
+        with self.assertRaises(ValueError):
+            build_catalog(self.aerators + self.aerators[:1], self.path)
+        for field, value in (("sotr", float("nan")), ("durability", 0),
+                             ("cost", float("inf")), ("cost", -1)):
+            row = dict(self.aerators[0], **{field: value})
+            with self.assertRaises(ValueError):
+                build_catalog([row], self.path)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_hot_swap(self):
+        """A replaced file is remapped; old readers keep their view."""
+        handle = CatalogHandle(self.path, check_seconds=0)
+        self.assertIsNone(handle.get())
+        build_catalog(self.aerators, self.path)
+        old = handle.get()
+        repriced = [dict(a, cost=a["cost"] * 2) for a in self.aerators]
+        self.assertEqual(handle.replace(repriced), 200)
+        new = handle.get()
+        self.assertIsNot(new, old)
+        self.assertEqual(new.entry(0)["cost"], 1200.0)
+        self.assertEqual(old.entry(0)["cost"], 600.0)
+        self.assertIs(handle.get(), new)
+
+    def test_catalog_endpoints(self):
+        """The catalog is searched and replaced over HTTP."""
+        build_catalog(self.aerators, self.path)
+        original = catalog_module.catalog
+        catalog_module.catalog = CatalogHandle(self.path, check_seconds=0)
+        try:
+            client = TestClient(app)
+            response = client.get(
+                "/catalog", params={"max_cost": 700, "limit": 2}
+            ).json()
+            self.assertEqual(response["total"], 5)
+            self.assertEqual(len(response["aerators"]), 2)
+            entry = client.get(
+                "/catalog/Model 001", params={"temperature": 30}
+            ).json()
+            self.assertEqual(entry["otr_t"], calculate_otr_t(1.9, 30))
+            response = client.get("/catalog/Unknown")
+            self.assertEqual(response.status_code, 404)
+
+            with patch.dict(os.environ, {"AERASYNC_ADMIN_TOKEN": "secret"}):
+                response = client.put(
+                    "/admin/catalog",
+                    json=self.aerators[:10],
+                    headers={"X-Admin-Token": "secret"},
+                )
+            self.assertEqual(response.json()["aerators"], 10)
+            with patch.dict(os.environ, {"AERASYNC_ADMIN_TOKEN": "secret"}):
+                response = client.put(
+                    "/admin/catalog",
+                    content='[{"name": "A", "power_hp": 2, "sotr": NaN, '
+                    '"cost": 1, "durability": 2, "maintenance": 1}]',
+                    headers={
+                        "X-Admin-Token": "secret",
+                        "Content-Type": "application/json",
+                    },
+                )
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("non-finite sotr", response.json()["detail"])
+            response = client.get("/catalog").json()
+            self.assertEqual(response["total"], 10)
+        finally:
+            catalog_module.catalog = original
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,280 @@
+"""Test cases for supplier catalog ingestion."""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from typing import List
+from unittest.mock import patch
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from fastapi.testclient import TestClient
+
+from backend.api.core import catalog as catalog_module
+from backend.api.core.aerator_comparer import HP_TO_KW
+from backend.api.core.catalog import Catalog, CatalogHandle
+from backend.api.core.catalog_import import (
+    import_file,
+    import_rows,
+    read_csv_rows,
+    read_xlsx_rows,
+)
+from backend.api.main import app
+
+CSV_HEADER = (
+    "Model,Power (kW),SOTR (kg O2/h),Price,Lifespan (years),"
+    "Annual Maintenance\n"
+)
+
+
+def supplier_csv(rows: int, price_offset: int = 0) -> str:
+    """Supplier sheet with power in kW."""
+    lines = [CSV_HEADER]
+    for i in range(rows):
+        lines.append(
+            f"Paddle {i:04d},{1.5 + i % 3},{2 + i % 5 * 0.5},"
+            f"{800 + i + price_offset},{3 + i % 4},{50 + i % 10}\n"
+        )
+    return "".join(lines)
+
+
+def supplier_xlsx(rows: List[List[object]]) -> bytes:
+    """Minimal workbook: strings shared in the header, inline below."""
+    headers = [str(h) for h in rows[0]]
+    shared = "".join(f"<si><t>{h}</t></si>" for h in headers)
+    sheet_rows = []
+    for r, row in enumerate(rows, start=1):
+        cells = []
+        for c, value in enumerate(row):
+            ref = f"{chr(ord('A') + c)}{r}"
+            if value is None:
+                continue  # sparse cell
+            if r == 1:
+                cells.append(f'<c r="{ref}" t="s"><v>{c}</v></c>')
+            elif isinstance(value, str):
+                cells.append(
+                    f'<c r="{ref}" t="inlineStr"><is><t>{value}</t></is></c>'
+                )
+            else:
+                cells.append(f'<c r="{ref}"><v>{value}</v></c>')
+        sheet_rows.append(f'<row r="{r}">{"".join(cells)}</row>')
+    main = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    rel = (
+        "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    )
+    package = "http://schemas.openxmlformats.org/package/2006/relationships"
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr(
+            "xl/workbook.xml",
+            f'<workbook xmlns="{main}" xmlns:r="{rel}"><sheets>'
+            '<sheet name="Aerators" sheetId="1" r:id="rId1"/>'
+            "</sheets></workbook>",
+        )
+        archive.writestr(
+            "xl/_rels/workbook.xml.rels",
+            f'<Relationships xmlns="{package}">'
+            '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+            f'Type="{rel}/worksheet"/></Relationships>',
+        )
+        archive.writestr(
+            "xl/sharedStrings.xml", f'<sst xmlns="{main}">{shared}</sst>'
+        )
+        archive.writestr(
+            "xl/worksheets/sheet1.xml",
+            f'<worksheet xmlns="{main}"><sheetData>'
+            f'{"".join(sheet_rows)}</sheetData></worksheet>',
+        )
+    return buffer.getvalue()
+
+
+def broken_sheet(workbook: bytes) -> bytes:
+    """Copy a workbook with its worksheet XML cut off mid-row."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(workbook)) as source, zipfile.ZipFile(
+        buffer, "w"
+    ) as archive:
+        for name in source.namelist():
+            data = source.read(name)
+            if name == "xl/worksheets/sheet1.xml":
+                data = data[: len(data) // 2]
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+class TestCatalogImport(unittest.TestCase):
+    """Test cases for streaming CSV and XLSX imports."""
+
+    def setUp(self):
+        """Set up a scratch directory for catalogs and sources."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "catalog.bin")
+
+    def tearDown(self):
+        """Remove the scratch directory."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_units_and_validation(self):
+        """kW is converted to HP and bad rows are reported by line."""
+        source = supplier_csv(3) + (
+            "Broken,abc,2,800,3,50\n"
+            "Negative,1.5,2,-1,3,50\n"
+            ",1.5,2,800,3,50\n"
+            "Paddle 0001,2.0,2.5,900,4,51\n"
+        )
+        report = import_rows(read_csv_rows(io.StringIO(source)), self.path)
+        self.assertEqual(report.rows, 7)
+        self.assertEqual(report.rejected, 3)
+        self.assertEqual(report.duplicates, 1)
+        self.assertEqual(report.aerators, 3)
+        self.assertTrue(report.errors[0].startswith("Row 5: non-numeric"))
+        catalog = Catalog(self.path)
+        entry = catalog.entry(catalog.index("Paddle 0001"))
+        # The last row of a duplicated name wins
+        self.assertEqual(entry["cost"], 900)
+        self.assertAlmostEqual(entry["power_hp"], 2.0 / HP_TO_KW)
+        self.assertAlmostEqual(entry["power_kw"], 2.0, places=3)
+
+    def test_missing_columns(self):
+        """A sheet without the required columns is refused."""
+        with self.assertRaises(ValueError) as context:
+            import_rows(
+                read_csv_rows(io.StringIO("Model,Price\nA,1\n")), self.path
+            )
+        self.assertIn("durability", str(context.exception))
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_header_only_files(self):
+        """Columns are checked without data rows, and a full import
+        never empties the catalog."""
+        source = os.path.join(self.directory, "supplier.csv")
+        with open(source, "w") as f:
+            f.write(supplier_csv(2))
+        import_file(source, self.path)
+        for content in ("foo,bar\n", CSV_HEADER, ""):
+            with open(source, "w") as f:
+                f.write(content)
+            with self.subTest(content=content):
+                with self.assertRaises(ValueError):
+                    import_file(source, self.path, incremental=False)
+                self.assertEqual(len(Catalog(self.path)), 2)
+        with open(source, "w") as f:
+            f.write("foo,bar\n")
+        with self.assertRaises(ValueError) as context:
+            import_file(source, self.path)
+        self.assertIn("Missing catalog columns", str(context.exception))
+        with open(source, "w") as f:
+            f.write(CSV_HEADER)
+        self.assertEqual(import_file(source, self.path).aerators, 2)
+
+    def test_non_finite_values(self):
+        """nan and inf are rejected like non-numeric values."""
+        source = CSV_HEADER + (
+            "A,nan,2,800,3,50\n"
+            "B,1.5,inf,800,3,50\n"
+            "C,1.5,2,800,-inf,50\n"
+            "D,1.5,2,800,3,50\n"
+        )
+        report = import_rows(read_csv_rows(io.StringIO(source)), self.path)
+        self.assertEqual((report.rejected, report.aerators), (3, 1))
+        self.assertIn("non-finite", report.errors[0])
+
+    def test_incremental_reimport(self):
+        """Only changed rows are recomputed; unchanged files are not
+        rewritten; full imports drop missing aerators."""
+        source = os.path.join(self.directory, "supplier.csv")
+        with open(source, "w") as f:
+            f.write(supplier_csv(500))
+        report = import_file(source, self.path)
+        self.assertEqual((report.added, report.aerators), (500, 500))
+
+        identity = Catalog(self.path).identity
+        report = import_file(source, self.path)
+        self.assertEqual(report.unchanged, 500)
+        self.assertEqual(Catalog(self.path).identity, identity)
+
+        lines = supplier_csv(500).splitlines(keepends=True)
+        lines[11] = lines[11].replace(",810,", ",999,")
+        with open(source, "w") as f:
+            f.write("".join(lines[:201]))
+        report = import_file(source, self.path)
+        self.assertEqual((report.updated, report.unchanged), (1, 199))
+        self.assertEqual(report.aerators, 500)
+        catalog = Catalog(self.path)
+        index = catalog.index("Paddle 0010")
+        self.assertEqual(catalog.entry(index)["cost"], 999)
+
+        report = import_file(source, self.path, incremental=False)
+        self.assertEqual((report.removed, report.aerators), (300, 200))
+        self.assertEqual(len(Catalog(self.path)), 200)
+
+    def test_xlsx(self):
+        """Worksheets stream with shared, inline and sparse cells."""
+        rows: List[List[object]] = [
+            ["Name", "HP", "SOTR", "Cost", "Durability", "Maintenance",
+             "Notes"],
+            ["Aerator A", 2, 2.4, 1200, 3, 40, None],
+            ["Aerator B", 3, 3.5, 2500, 5, 50, "new"],
+        ]
+        source = os.path.join(self.directory, "supplier.xlsx")
+        with open(source, "wb") as f:
+            f.write(supplier_xlsx(rows))
+        with open(source, "rb") as f:
+            parsed = list(read_xlsx_rows(f))
+        self.assertEqual(parsed[0]["Name"], "Aerator A")
+        self.assertEqual(parsed[1]["SOTR"], "3.5")
+        report = import_file(source, self.path)
+        self.assertEqual(report.aerators, 2)
+        catalog = Catalog(self.path)
+        self.assertEqual(catalog.entry(1)["maintenance"], 50)
+
+    def test_import_endpoint(self):
+        """Admins upload supplier files straight into the catalog."""
+        original = catalog_module.catalog
+        catalog_module.catalog = CatalogHandle(self.path, check_seconds=0)
+        try:
+            client = TestClient(app)
+            with patch.dict(os.environ, {"AERASYNC_ADMIN_TOKEN": "secret"}):
+                response = client.post(
+                    "/admin/catalog/import",
+                    content=supplier_csv(20).encode(),
+                    headers={"X-Admin-Token": "secret"},
+                )
+                self.assertEqual(response.json()["added"], 20)
+                response = client.post(
+                    "/admin/catalog/import",
+                    params={"format": "xlsx"},
+                    content=b"not a workbook",
+                    headers={"X-Admin-Token": "secret"},
+                )
+                self.assertEqual(response.status_code, 400)
+                # Parser errors are bad uploads too
+                oversized = supplier_csv(1) + '"' + "x" * 200_000 + '"\n'
+                response = client.post(
+                    "/admin/catalog/import",
+                    content=oversized.encode(),
+                    headers={"X-Admin-Token": "secret"},
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("CSV line", response.json()["detail"])
+                response = client.post(
+                    "/admin/catalog/import",
+                    params={"format": "xlsx"},
+                    content=broken_sheet(supplier_xlsx([["Name"]])),
+                    headers={"X-Admin-Token": "secret"},
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("sheet1.xml", response.json()["detail"])
+            self.assertEqual(client.get("/catalog").json()["total"], 20)
+        finally:
+            catalog_module.catalog = original
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+"""Test cases for the columnar layout and response compression."""
+
+import gzip
+import json
+import unittest
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from fastapi.testclient import TestClient
+
+from backend.api.core.aerator_comparer import (
+    columnar_result,
+    compare_aerators,
+)
+from backend.api.main import app
+from backend.api.middleware import accepted_encoding
+
+
+class TestColumnar(unittest.TestCase):
+    """Test cases for columnar comparison results."""
+
+    def setUp(self):
+        """Set up base test data."""
+        self.client = TestClient(app)
+        self.base_request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": f"Aerator {i}",
+                    "sotr": 1.5 + i / 10,
+                    "power_hp": 3,
+                    "cost": 700 + 50 * i,
+                    "durability": 2.0 + i / 5,
+                    "maintenance": 65,
+                }
+                for i in range(40)
+            ],
+        }
+
+    def test_columnar_result(self):
+        """Every row can be rebuilt from the columns."""
+        rows = compare_aerators(self.base_request)
+        columns = columnar_result(rows)
+        self.assertEqual(columns["layout"], "columnar")
+        self.assertEqual(columns["winnerLabel"], rows["winnerLabel"])
+        table = columns["aeratorResults"]
+        rebuilt = [
+            {field: values[i] for field, values in table.items()}
+            for i in range(len(table["name"]))
+        ]
+        self.assertEqual(rebuilt, rows["aeratorResults"])
+        prices = columns["equilibriumPrices"]
+        self.assertEqual(
+            dict(zip(prices["name"], prices["price"])),
+            rows["equilibriumPrices"],
+        )
+        self.assertLess(
+            len(json.dumps(columns)), len(json.dumps(rows)) * 0.6
+        )
+        error = {"error": "At least two aerators are required"}
+        self.assertEqual(columnar_result(error), error)
+
+    def test_columnar_endpoint(self):
+        """The layout query parameter selects the columnar layout."""
+        response = self.client.post(
+            "/compare?layout=columnar", json=self.base_request
+        )
+        self.assertEqual(
+            response.json(),
+            columnar_result(compare_aerators(self.base_request)),
+        )
+
+    def test_accepted_encoding(self):
+        """Encodings refused with q=0 or unsupported are not chosen."""
+        self.assertEqual(accepted_encoding("gzip, deflate"), "gzip")
+        self.assertEqual(accepted_encoding("gzip;q=0, identity"), None)
+        self.assertEqual(accepted_encoding("*"), "gzip")
+        self.assertIsNone(accepted_encoding(""))
+
+    def test_compression(self):
+        """Large JSON responses are gzipped, small ones are not."""
+        response = self.client.post(
+            "/compare",
+            json=self.base_request,
+            headers={"Accept-Encoding": "gzip"},
+        )
+        self.assertEqual(response.headers["content-encoding"], "gzip")
+        self.assertEqual(
+            response.json(), compare_aerators(self.base_request)
+        )
+        self.assertLess(
+            int(response.headers["content-length"]),
+            len(json.dumps(response.json())),
+        )
+        response = self.client.get(
+            "/health", headers={"Accept-Encoding": "gzip"}
+        )
+        self.assertNotIn("content-encoding", response.headers)
+        response = self.client.post(
+            "/compare",
+            json=self.base_request,
+            headers={"Accept-Encoding": "identity"},
+        )
+        self.assertNotIn("content-encoding", response.headers)
+        with self.client.stream(
+            "POST",
+            "/compare",
+            json=self.base_request,
+            headers={"Accept-Encoding": "gzip"},
+        ) as stream:
+            raw = b"".join(stream.iter_raw())
+        self.assertEqual(
+            json.loads(gzip.decompress(raw)),
+            compare_aerators(self.base_request),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""Test cases for the differential test harness."""
+
+import unittest
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from backend.api.core.aerator_comparer import compare_aerators
+from backend.benchmarks.differential import (
+    Engine,
+    engines,
+    run,
+)
+
+
+def shifted_maintenance(request: Dict[str, Any]) -> Dict[str, Any]:
+    """An engine with a bug that needs expensive maintenance to show."""
+    result = compare_aerators(request)
+    if any(a.get("maintenance", 0) > 100 for a in request["aerators"]):
+        for row in result.get("aeratorResults", []):
+            row["npv_savings"] += 1
+    return result
+
+
+class TestDifferential(unittest.TestCase):
+    """Test cases for generation, comparison and shrinking."""
+
+    def test_engines_agree(self):
+        """Every fast path matches the reference."""
+        self.assertEqual(run(cases=40, seed=11, selected=engines()), [])
+
+    def test_edge_case_coverage(self):
+        """The generator reaches every adversarial input."""
+        coverage: Dict[str, int] = {}
+        run(cases=200, seed=0, selected=[], coverage=coverage)
+        for case in (
+            "zero_sotr",
+            "zero_durability",
+            "huge_farm",
+            "negative_additional_cost",
+            "error",
+        ):
+            self.assertGreater(coverage.get(case, 0), 0, case)
+
+    def test_shrinks_mismatches(self):
+        """A mismatch is reduced to a small request that still fails."""
+        buggy = Engine("buggy", shifted_maintenance)
+        mismatches = run(cases=20, seed=3, selected=[buggy])
+        self.assertTrue(mismatches)
+        for mismatch in mismatches:
+            aerators = mismatch.request["aerators"]
+            self.assertEqual(len(aerators), 2)
+            self.assertTrue(any(a["maintenance"] > 100 for a in aerators))
+            self.assertTrue(mismatch.differences)
+            self.assertIn("npv_savings", mismatch.differences[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
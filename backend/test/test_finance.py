@@ -0,0 +1,129 @@
+"""Test cases for loan, tax and depreciation schedules."""
+
+import unittest
+from copy import deepcopy
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from backend.api.core.aerator_comparer import compare_aerators
+from backend.api.core.cashflow import compare_aerators_ledger
+from backend.api.core.finance import depreciation_schedule, loan_schedule
+
+
+class TestFinanceSchedules(unittest.TestCase):
+    """Test cases for the financing terms of the financial model."""
+
+    def setUp(self):
+        """Set up base test data from sample request."""
+        self.base_request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": "Aerator 1",
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 2500,
+                    "durability": 5.0,
+                    "maintenance": 50,
+                },
+            ],
+        }
+        self.financing = {
+            "loan_fraction": 0.6,
+            "loan_rate": 0.08,
+            "loan_term": 5,
+            "tax_rate": 0.25,
+            "depreciation_method": "declining_balance",
+            "depreciation_years": 5,
+        }
+
+    def test_unit_schedules(self):
+        """Loans are repaid and assets fully depreciated."""
+        payment, interest = loan_schedule(0.08, 5, 11)
+        self.assertAlmostEqual(
+            sum(p - i for p, i in zip(payment, interest)), 1.0
+        )
+        self.assertEqual(payment[0], 0)
+        self.assertEqual(payment[6:], [0.0] * 5)
+        for method in ("straight_line", "declining_balance"):
+            with self.subTest(method=method):
+                schedule = depreciation_schedule(method, 5, 2.0, 11)
+                self.assertAlmostEqual(sum(schedule), 1.0)
+        declining = depreciation_schedule("declining_balance", 5, 2.0, 11)
+        self.assertAlmostEqual(declining[1], 0.4)
+        self.assertGreater(declining[1], declining[2])
+
+    def test_default_terms_leave_results_unchanged(self):
+        """Zero financing terms reproduce the pre-tax comparison."""
+        request = deepcopy(self.base_request)
+        request["financial"].update({
+            "loan_fraction": 0,
+            "tax_rate": 0,
+            "depreciation_method": "none",
+        })
+        self.assertEqual(
+            compare_aerators(request), compare_aerators(self.base_request)
+        )
+
+    def test_after_tax_flows_feed_npv_and_irr(self):
+        """Taxes and loans change NPV and IRR of the winner."""
+        request = deepcopy(self.base_request)
+        request["financial"].update(self.financing)
+        pre_tax = compare_aerators(self.base_request)["aeratorResults"][1]
+        after_tax = compare_aerators(request)["aeratorResults"][1]
+        self.assertLess(after_tax["npv_savings"], pre_tax["npv_savings"])
+        self.assertNotEqual(after_tax["irr"], pre_tax["irr"])
+        self.assertEqual(
+            after_tax["total_annual_cost"], pre_tax["total_annual_cost"]
+        )
+
+    def test_ledger_debt_service_and_tax_shield(self):
+        """The ledger reports debt service and tax shields per year."""
+        request = deepcopy(self.base_request)
+        request["financial"].update(self.financing)
+        ledger = compare_aerators_ledger(request)["aeratorLedgers"][1]
+        self.assertEqual(ledger["debt_service"][0], 0)
+        self.assertGreater(ledger["debt_service"][1], 0)
+        self.assertTrue(all(t > 0 for t in ledger["tax_shield"][1:]))
+        self.assertLess(ledger["total"][0], ledger["capex"][0])
+
+    def test_invalid_terms(self):
+        """Invalid financing terms return error messages."""
+        cases = [
+            ({"loan_fraction": 1.5}, "Loan fraction must be between 0 and 1"),
+            ({"loan_fraction": 0.5}, "Loan term must be positive"),
+            ({"tax_rate": 1.0}, "Tax rate must be between 0 and 1"),
+            (
+                {"depreciation_method": "straight_line"},
+                "Depreciation years must be positive",
+            ),
+        ]
+        for update, error in cases:
+            with self.subTest(error=error):
+                request = deepcopy(self.base_request)
+                request["financial"].update(update)
+                self.assertEqual(compare_aerators(request)["error"], error)
+
+
+if __name__ == "__main__":
+    unittest.main()
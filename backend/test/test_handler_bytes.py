@@ -0,0 +1,82 @@
+"""Test cases for the byte-oriented comparison handler."""
+
+import json
+import unittest
+from typing import Any, Dict
+import sys
+from unittest.mock import patch
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from backend.api.core import aerator_comparer
+from backend.api.core.aerator_comparer import handler
+
+
+class TestHandlerBytes(unittest.TestCase):
+    """Test cases for bytes and memoryview request bodies."""
+
+    def setUp(self):
+        """Set up a sample request body."""
+        self.request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": "Aerator 1",
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 2500,
+                    "durability": 5.0,
+                    "maintenance": 50,
+                },
+            ],
+        }
+        self.body = json.dumps(self.request).encode()
+
+    def test_bytes_match_string_handler(self):
+        """Bytes bodies give the same result as JSON strings."""
+        expected = json.loads(
+            handler({"body": self.body.decode()})["body"]
+        )
+        for body in (self.body, bytearray(self.body), memoryview(self.body)):
+            with self.subTest(body_type=type(body).__name__):
+                response = handler({"body": body})
+                self.assertEqual(response["statusCode"], 200)
+                self.assertIsInstance(response["body"], bytes)
+                self.assertEqual(json.loads(response["body"]), expected)
+
+    def test_stdlib_fallback(self):
+        """Without orjson the standard json module is used."""
+        expected = handler({"body": self.body})["body"]
+        with patch.object(aerator_comparer, "orjson", None):
+            response = handler({"body": memoryview(self.body)})
+        self.assertEqual(json.loads(response["body"]), json.loads(expected))
+
+    def test_invalid_bytes(self):
+        """Invalid JSON and encodings return JSONDecodeError errors."""
+        for body in (b"{invalid}", b"\xff\xfe{"):
+            with self.subTest(body=body):
+                response = handler({"body": body})
+                self.assertEqual(response["statusCode"], 500)
+                self.assertIn(b"JSONDecodeError", response["body"])
+
+
+if __name__ == "__main__":
+    unittest.main()
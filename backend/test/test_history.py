@@ -0,0 +1,163 @@
+"""Test cases for the comparison history store."""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from fastapi.testclient import TestClient
+
+from backend.api.core import history, result_cache
+from backend.api.core.aerator_comparer import compare_aerators
+from backend.api.core.history import HistoryStore
+from backend.api.core.result_cache import ResultCache
+from backend.api.core.whatif import merge_patch
+from backend.api.main import app
+
+
+class TestHistory(unittest.TestCase):
+    """Test cases for recording and querying served comparisons."""
+
+    def setUp(self):
+        """Set up a scratch database and base test data."""
+        self.directory = tempfile.mkdtemp()
+        self.store = HistoryStore(os.path.join(self.directory, "history.db"))
+        self.base_request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000, "farm_id": "north"},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": "Aerator 1",
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 2500,
+                    "durability": 5.0,
+                    "maintenance": 50,
+                },
+            ],
+        }
+        # Aerator 1 wins once Aerator 2 is expensive enough
+        self.requests = [
+            self.base_request,
+            merge_patch(self.base_request, {"farm": {"farm_id": "south"}}),
+            merge_patch(
+                self.base_request,
+                {"aerators": {"Aerator 2": {"cost": 50000}}},
+            ),
+        ]
+
+    def tearDown(self):
+        """Stop the writer and remove the database."""
+        self.store.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def record_all(self, store: HistoryStore):
+        """Record the sample comparisons and wait for the writer."""
+        results = [compare_aerators(r) for r in self.requests]
+        for request, result in zip(self.requests, results):
+            store.record(request, result)
+        store.record(self.base_request, {"error": "ignored"})
+        self.assertTrue(store.flush(timeout=10))
+        return results
+
+    def test_query_filters(self):
+        """Indexed filters answer queries without recomputing."""
+        results = self.record_all(self.store)
+        rows = self.store.query()
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(
+            [r["winner"] for r in rows], ["Aerator 1", "Aerator 2", "Aerator 2"]
+        )
+        self.assertEqual(len(self.store.query(farm_id="south")), 1)
+        self.assertEqual(len(self.store.query(aerator="Aerator 1")), 3)
+        self.assertEqual(len(self.store.query(aerator="Aerator 9")), 0)
+        won = self.store.query(winner="Aerator 1", include_result=True)
+        self.assertEqual(len(won), 1)
+        self.assertEqual(won[0]["result"], results[2])
+        self.assertEqual(won[0]["inputs"], self.requests[2])
+        aerators = {a["name"]: a for a in won[0]["aerators"]}
+        self.assertTrue(aerators["Aerator 1"]["is_winner"])
+        self.assertEqual(
+            aerators["Aerator 2"]["total_initial_cost"],
+            results[2]["aeratorResults"][1]["total_initial_cost"],
+        )
+        self.assertEqual(len(self.store.query(since=time.time() + 60)), 0)
+        self.assertEqual(len(self.store.query(limit=2)), 2)
+        self.assertEqual(
+            self.store.winners(), {"Aerator 2": 2, "Aerator 1": 1}
+        )
+        self.assertEqual(self.store.winners(farm_id="south"), {"Aerator 2": 1})
+
+    def test_batched_writes(self):
+        """Records queued between flushes are written together."""
+        store = HistoryStore(
+            self.store.path, batch_size=2, flush_interval=60
+        )
+        try:
+            self.record_all(store)
+            self.assertEqual(len(store.query()), 3)
+            self.assertEqual(store.dropped, 0)
+        finally:
+            store.close()
+
+    def test_compare_endpoint_records(self):
+        """Served /compare results are recorded and queryable."""
+        original = history.store
+        original_cache = result_cache.cache
+        history.store = self.store
+        path = os.path.join(self.directory, "cache.db")
+        result_cache.cache = ResultCache(path)
+        try:
+            client = TestClient(app)
+            response = client.post("/compare", json=self.base_request)
+            self.assertEqual(response.status_code, 200)
+            # Another farm with the same inputs shares the cached result
+            south = merge_patch(
+                self.base_request, {"farm": {"farm_id": "south"}}
+            )
+            response = client.post("/compare", json=south)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(result_cache.cache.stats()["disk_entries"], 1)
+            self.store.flush(timeout=10)
+            rows = client.get(
+                "/history", params={"winner": "Aerator 2", "days": 90}
+            ).json()
+            self.assertEqual(len(rows), 2)
+            self.assertEqual(
+                sorted(r["farm_id"] for r in rows), ["north", "south"]
+            )
+            winners = client.get("/history/winners").json()
+            self.assertEqual(winners, {"Aerator 2": 2})
+            history.store = None
+            response = client.get("/history")
+            self.assertEqual(response.status_code, 404)
+        finally:
+            history.store = original
+            result_cache.cache.close()
+            result_cache.cache = original_cache
+
+
+if __name__ == "__main__":
+    unittest.main()
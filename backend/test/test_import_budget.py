@@ -0,0 +1,45 @@
+"""Test cases for the cold-start import budget check."""
+
+import unittest
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from backend.benchmarks.import_budget import (
+    ENTRY_MODULE,
+    LAZY_MODULES,
+    measure_import,
+    parse_importtime,
+)
+
+
+class TestImportBudget(unittest.TestCase):
+    """Test cases for measuring the cost of importing the API."""
+
+    def test_parse_importtime(self):
+        """Self and cumulative times are read per module."""
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   backend\n"
+            "import time:      3000 |       5000 | backend.api.main\n"
+        )
+        modules = parse_importtime(stderr)
+        self.assertEqual(
+            modules["backend.api.main"], {"self": 3000, "cumulative": 5000}
+        )
+        self.assertEqual(len(modules), 2)
+
+    def test_entry_point_defers_optional_modules(self):
+        """Optional features are not imported with the entry point."""
+        sample = measure_import()
+        self.assertIn(ENTRY_MODULE, sample.modules)
+        self.assertIn("backend.api.core.aerator_comparer", sample.modules)
+        for name in LAZY_MODULES:
+            with self.subTest(module=name):
+                self.assertNotIn(name, sample.modules)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,306 @@
+"""Test cases for background jobs."""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from fastapi.testclient import TestClient
+
+from backend.api.core import jobs as jobs_module
+from backend.api.core.aerator_comparer import compare_aerators
+from backend.api.core.jobs import (
+    CANCELLED,
+    FAILED,
+    RUNNING,
+    SUCCEEDED,
+    Job,
+    JobConflict,
+    JobStore,
+    QueueFull,
+)
+from backend.api.core.whatif import merge_patch
+from backend.api.main import app
+
+
+class TestJobs(unittest.TestCase):
+    """Test cases for the job store, its spool and the job endpoints."""
+
+    def setUp(self):
+        """Set up a scratch spool and base test data."""
+        self.spool = tempfile.mkdtemp()
+        self.store = JobStore(spool_dir=self.spool, workers=1)
+        self.base_request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": "Aerator 1",
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 2500,
+                    "durability": 5.0,
+                    "maintenance": 50,
+                },
+            ],
+        }
+        self.sweep = {
+            "base": self.base_request,
+            "parameters": {
+                "financial.energy_cost": [0.04, 0.08],
+                "aerators.Aerator 2.cost": [2000, 2500, 3000],
+            },
+        }
+
+    def tearDown(self):
+        """Stop the workers and remove the spool."""
+        self.store.shutdown()
+        shutil.rmtree(self.spool, ignore_errors=True)
+
+    def wait(self, job):
+        """Block until a job has run."""
+        job.future.result(timeout=60)
+        return job
+
+    def long_sweep(self) -> Dict[str, Any]:
+        """A sweep that takes long enough to cancel while running."""
+        return {
+            "base": self.base_request,
+            "parameters": {
+                "financial.discount_rate": [
+                    0.05 + i / 10000 for i in range(5000)
+                ],
+            },
+        }
+
+    def test_sweep(self):
+        """Every parameter combination is compared and spooled."""
+        job, created = self.store.submit("sweep", self.sweep)
+        self.assertTrue(created)
+        self.wait(job)
+        self.assertEqual(job.status, SUCCEEDED)
+        self.assertEqual((job.done, job.total), (6, 6))
+        result = self.store.result(job.id)
+        self.assertEqual(len(result["points"]), 6)
+        point = result["points"][-1]
+        self.assertEqual(
+            point["values"],
+            {"financial.energy_cost": 0.08, "aerators.Aerator 2.cost": 3000},
+        )
+        request = merge_patch(
+            self.base_request,
+            {
+                "financial": {"energy_cost": 0.08},
+                "aerators": {"Aerator 2": {"cost": 3000}},
+            },
+        )
+        self.assertEqual(point["result"], compare_aerators(request))
+
+    def test_monte_carlo(self):
+        """Seeded runs are reproducible and report win probabilities."""
+        spec = {
+            "base": self.base_request,
+            "samples": 50,
+            "seed": 7,
+            "distributions": {
+                "financial.energy_cost": {
+                    "distribution": "uniform",
+                    "low": 0.03,
+                    "high": 0.1,
+                },
+                "farm.tod": {
+                    "distribution": "normal",
+                    "mean": 5.47,
+                    "std": 0.5,
+                },
+            },
+        }
+        first = self.wait(self.store.submit("montecarlo", spec)[0])
+        second = self.wait(self.store.submit("montecarlo", spec)[0])
+        result = self.store.result(first.id)
+        self.assertEqual(result, self.store.result(second.id))
+        self.assertEqual(result["samples"], 50)
+        self.assertAlmostEqual(
+            sum(result["win_probability"].values()), 1.0, places=3
+        )
+        summary = result["npv_savings"]["Aerator 2"]
+        self.assertLessEqual(summary["p5"], summary["p50"])
+        self.assertLessEqual(summary["p50"], summary["p95"])
+
+    def test_invalid_jobs(self):
+        """Bad requests are rejected at submit, bad inputs fail the job."""
+        with self.assertRaises(ValueError):
+            self.store.submit("unknown", {})
+        with self.assertRaises(ValueError):
+            self.store.submit("sweep", {"base": self.base_request})
+        job, _ = self.store.submit(
+            "compare", merge_patch(self.base_request, {"farm": {"tod": -1}})
+        )
+        self.wait(job)
+        self.assertEqual(job.status, FAILED)
+        self.assertEqual(job.error, "TOD must be positive")
+
+    def test_idempotency_key(self):
+        """A reused key returns the original job or conflicts."""
+        job, created = self.store.submit("sweep", self.sweep, "key-1")
+        again, created_again = self.store.submit("sweep", self.sweep, "key-1")
+        self.assertTrue(created)
+        self.assertFalse(created_again)
+        self.assertIs(again, job)
+        with self.assertRaises(JobConflict):
+            self.store.submit("compare", self.base_request, "key-1")
+
+    def test_cancel(self):
+        """A running job stops at its next step."""
+        job, _ = self.store.submit("sweep", self.long_sweep())
+        self.store.cancel(job.id)
+        self.wait(job)
+        self.assertEqual(job.status, CANCELLED)
+        self.assertLess(job.done, 5000)
+        self.assertIsNone(self.store.result(job.id))
+
+    def test_bounded_queue(self):
+        """Submissions beyond the pending limit are refused."""
+        store = JobStore(spool_dir=self.spool, workers=1, max_pending=1)
+        try:
+            job, _ = store.submit("sweep", self.long_sweep())
+            with self.assertRaises(QueueFull):
+                store.submit("compare", self.base_request)
+            store.cancel(job.id)
+            self.wait(job)
+            store.submit("compare", self.base_request)
+        finally:
+            store.shutdown()
+
+    def test_restart(self):
+        """Finished jobs and their keys are restored from the spool."""
+        job, _ = self.store.submit("sweep", self.sweep, "key-2")
+        self.wait(job)
+        restarted = JobStore(spool_dir=self.spool)
+        restored = restarted.get(job.id)
+        self.assertEqual(restored.to_dict(), job.to_dict())
+        again, created = restarted.submit("sweep", self.sweep, "key-2")
+        self.assertFalse(created)
+        self.assertEqual(again.id, job.id)
+        self.assertEqual(
+            restarted.result(job.id), self.store.result(job.id)
+        )
+
+    def test_shared_spool(self):
+        """Only jobs whose owning process is gone count as interrupted."""
+        exited = subprocess.Popen([sys.executable, "-c", "pass"])
+        exited.wait()
+        owners = {
+            "live": {**jobs_module.process_owner(), "pid": os.getppid()},
+            "dead": {**jobs_module.process_owner(), "pid": exited.pid},
+            "legacy": None,
+        }
+        for job_id, owner in owners.items():
+            job = Job(job_id, "compare", "hash")
+            job.status = RUNNING
+            job.owner = owner
+            self.store._save(job)
+
+        worker = JobStore(spool_dir=self.spool)
+        self.assertEqual(worker.get("live").status, RUNNING)
+        self.assertEqual(worker.get("dead").status, FAILED)
+        self.assertEqual(worker.get("legacy").status, FAILED)
+
+        # The other worker finishes its job
+        job = Job("live", "compare", "hash")
+        job.status = SUCCEEDED
+        job.owner = owners["live"]
+        self.store._save(job)
+        self.assertEqual(worker.get("live").status, SUCCEEDED)
+
+    def test_workers_share_cancels_and_keys(self):
+        """A second worker on the spool cancels jobs and reuses keys."""
+        worker = JobStore(spool_dir=self.spool, workers=1)
+        try:
+            job, _ = self.store.submit("sweep", self.long_sweep(), "key-3")
+            again, created = worker.submit(
+                "sweep", self.long_sweep(), "key-3"
+            )
+            self.assertFalse(created)
+            self.assertEqual(again.id, job.id)
+            with self.assertRaises(JobConflict):
+                worker.submit("compare", self.base_request, "key-3")
+
+            worker.cancel(job.id)
+            self.wait(job)
+            self.assertEqual(job.status, CANCELLED)
+            self.assertLess(job.done, 5000)
+            self.assertEqual(worker.get(job.id).status, CANCELLED)
+        finally:
+            worker.shutdown()
+
+    def test_job_endpoints(self):
+        """Jobs are submitted, followed over SSE and fetched over HTTP."""
+        original = jobs_module.jobs
+        jobs_module.jobs = self.store
+        try:
+            client = TestClient(app)
+            request = {"kind": "sweep", "payload": self.sweep}
+            response = client.post(
+                "/jobs", json=request, headers={"Idempotency-Key": "k"}
+            )
+            self.assertEqual(response.status_code, 202)
+            job_id = response.json()["job_id"]
+            response = client.post(
+                "/jobs", json=request, headers={"Idempotency-Key": "k"}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["job_id"], job_id)
+
+            with client.stream("GET", f"/jobs/{job_id}/events") as stream:
+                body = "".join(stream.iter_text())
+            events = [
+                block.split("\n")
+                for block in body.strip().split("\n\n")
+            ]
+            self.assertEqual(events[-1][0], "event: succeeded")
+            final = json.loads(events[-1][1][len("data: "):])
+            self.assertEqual(final["progress"], {"done": 6, "total": 6})
+
+            result = client.get(f"/jobs/{job_id}/result").json()
+            self.assertEqual(len(result["points"]), 6)
+            self.assertEqual(
+                client.get(f"/jobs/{job_id}").json()["status"], SUCCEEDED
+            )
+            response = client.post(
+                "/jobs",
+                json={"kind": "compare", "payload": self.base_request},
+                headers={"Idempotency-Key": "k"},
+            )
+            self.assertEqual(response.status_code, 409)
+            response = client.get("/jobs/missing")
+            self.assertEqual(response.status_code, 404)
+        finally:
+            jobs_module.jobs = original
+
+
+if __name__ == "__main__":
+    unittest.main()
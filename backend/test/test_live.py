@@ -0,0 +1,123 @@
+"""Test cases for the live comparison WebSocket."""
+
+import unittest
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from fastapi.testclient import TestClient
+
+from backend.api.core.aerator_comparer import compare_aerators
+from backend.api.core.whatif import merge_patch
+from backend.api.main import app
+
+
+class TestLiveCompare(unittest.TestCase):
+    """Test cases for streaming results over a WebSocket."""
+
+    def setUp(self):
+        """Set up base test data from sample request."""
+        self.base_request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": "Aerator 1",
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 2500,
+                    "durability": 5.0,
+                    "maintenance": 50,
+                },
+            ],
+        }
+        self.client = TestClient(app)
+
+    def receive_until(self, websocket, seq):
+        """Receive messages until the one covering message ``seq``."""
+        while True:
+            message = websocket.receive_json()
+            if message.get("seq") == seq:
+                return message
+
+    def test_patches_stream_results(self):
+        """Rapid patches coalesce into results for the latest inputs."""
+        patches = [
+            {"financial": {"energy_cost": 0.06}},
+            {"financial": {"energy_cost": 0.07}},
+            {"financial": {"discount_rate": 0.08}},
+        ]
+        with self.client.websocket_connect("/ws/compare") as websocket:
+            websocket.send_json(self.base_request)
+            first = self.receive_until(websocket, 1)
+            self.assertEqual(
+                first["result"], compare_aerators(self.base_request)
+            )
+            for patch in patches:
+                websocket.send_json(patch)
+            last = self.receive_until(websocket, 4)
+
+        request = self.base_request
+        for patch in patches:
+            request = merge_patch(request, patch)
+        self.assertEqual(last["type"], "result")
+        self.assertEqual(last["result"], compare_aerators(request))
+        self.assertEqual(last["recomputed"]["sizing"], 0)
+
+    def test_errors_keep_connection_open(self):
+        """Invalid inputs are reported and later patches still work."""
+        with self.client.websocket_connect("/ws/compare") as websocket:
+            websocket.send_json(self.base_request)
+            self.receive_until(websocket, 1)
+            websocket.send_json({"farm": {"tod": -1}})
+            error = self.receive_until(websocket, 2)
+            self.assertEqual(error["error"], "TOD must be positive")
+            websocket.send_json([1, 2])
+            error = self.receive_until(websocket, 3)
+            self.assertEqual(error["error"], "Messages must be JSON objects")
+            websocket.send_json({"financial": {"horizon": 5}})
+            result = self.receive_until(websocket, 4)
+            self.assertEqual(result["type"], "result")
+
+    def test_invalid_json_keeps_connection_open(self):
+        """A binary or non-JSON frame is reported, not fatal."""
+        with self.client.websocket_connect("/ws/compare") as websocket:
+            websocket.send_json(self.base_request)
+            self.receive_until(websocket, 1)
+            websocket.send_text("not json")
+            error = self.receive_until(websocket, 2)
+            self.assertEqual(error["type"], "error")
+            self.assertEqual(error["error"], "Messages must be valid JSON")
+            websocket.send_bytes(b'{"farm": {"tod": 5000}}')
+            error = self.receive_until(websocket, 3)
+            self.assertEqual(error["error"], "Messages must be valid JSON")
+            patch = {"financial": {"energy_cost": 0.06}}
+            websocket.send_json(patch)
+            result = self.receive_until(websocket, 4)
+            self.assertEqual(result["type"], "result")
+            self.assertEqual(
+                result["result"],
+                compare_aerators(merge_patch(self.base_request, patch)),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
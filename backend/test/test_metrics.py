@@ -0,0 +1,114 @@
+"""Test cases for the /metrics endpoint."""
+
+import unittest
+from copy import deepcopy
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from fastapi.testclient import TestClient
+
+from backend.api.core import metrics
+from backend.api.main import app
+
+
+class TestMetrics(unittest.TestCase):
+    """Test cases for request and compute statistics."""
+
+    def setUp(self):
+        """Start from empty metrics."""
+        self.request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": "Aerator 1",
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 2500,
+                    "durability": 5.0,
+                    "maintenance": 50,
+                },
+            ],
+        }
+        metrics.reset()
+        self.client = TestClient(app)
+
+    def test_error_categories(self):
+        """Error messages map to a bounded set of categories."""
+        self.assertEqual(
+            metrics.error_category("At least two aerators are required"),
+            "too_few_aerators",
+        )
+        self.assertEqual(
+            metrics.error_category("Missing required farm field: tod"),
+            "missing_field",
+        )
+        self.assertEqual(
+            metrics.error_category("Loan term must be positive"),
+            "invalid_financing",
+        )
+        self.assertEqual(
+            metrics.error_category("Ranking sort must be one of npv, irr"),
+            "invalid_ranking",
+        )
+        self.assertEqual(
+            metrics.error_category("Invalid ranking cursor"),
+            "invalid_cursor",
+        )
+        self.assertEqual(metrics.error_category("Unexpected"), "other")
+
+    def test_metrics_exposition(self):
+        """Requests, comparison sizes, solver and errors are exposed."""
+        self.client.post("/compare", json=self.request)
+        invalid = deepcopy(self.request)
+        invalid["aerators"] = invalid["aerators"][:1]
+        self.client.post("/compare", json=invalid)
+
+        body = self.client.get("/metrics").text
+        self.assertIn(
+            'aerasync_http_requests_total'
+            '{route="/compare",method="POST",status="200"} 2',
+            body,
+        )
+        self.assertIn(
+            'aerasync_http_request_duration_seconds_count{route="/compare"} 2',
+            body,
+        )
+        self.assertIn(
+            'aerasync_comparison_aerators_bucket{le="2"} 1', body
+        )
+        self.assertIn(
+            'aerasync_comparison_horizon_years_bucket{le="10"} 1', body
+        )
+        self.assertIn(
+            'aerasync_comparison_errors_total{category="too_few_aerators"} 1',
+            body,
+        )
+        self.assertIn(
+            'aerasync_newton_raphson_iterations_count{outcome="converged"}',
+            body,
+        )
+        self.assertIn("aerasync_http_requests_in_progress 1", body)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""Test cases for the event-loop lag probe and slow-request log."""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+import unittest
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from fastapi import Body, FastAPI
+from fastapi.testclient import TestClient
+
+from backend.api import monitoring
+from backend.api.core import metrics, timing
+from backend.api.core.aerator_comparer import compare_aerators
+from backend.api.middleware import ServerTimingMiddleware, SlowRequestMiddleware
+
+
+def make_app(threshold: float) -> FastAPI:
+    """App with the sampler around the stage timing middleware."""
+    app = FastAPI()
+
+    @app.post("/compare")
+    async def compare(data: Dict[str, Any] = Body(...)):
+        return compare_aerators(data)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    app.add_middleware(ServerTimingMiddleware)
+    app.add_middleware(SlowRequestMiddleware, threshold=threshold)
+    return app
+
+
+class TestMonitoring(unittest.TestCase):
+    """Test cases for lag and slow-request monitoring."""
+
+    def setUp(self):
+        """Log to a temporary file with timing enabled."""
+        self.request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": "Aerator 1",
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 2500,
+                    "durability": 5.0,
+                    "maintenance": 50,
+                },
+            ],
+        }
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmp.name, "slow.log")
+        self.saved_path = monitoring.SLOW_LOG_PATH
+        monitoring.SLOW_LOG_PATH = self.log_path
+        self.was_enabled = timing.ENABLED
+        timing.set_enabled(True)
+        metrics.reset()
+
+    def tearDown(self):
+        """Close the log and restore settings."""
+        monitoring.close_slow_log()
+        monitoring.SLOW_LOG_PATH = self.saved_path
+        timing.set_enabled(self.was_enabled)
+        self.tmp.cleanup()
+
+    def read_log(self):
+        monitoring.close_slow_log()
+        if not os.path.exists(self.log_path):
+            return []
+        with open(self.log_path) as log_file:
+            return [json.loads(line) for line in log_file]
+
+    def test_slow_compare_is_logged(self):
+        """Slow /compare requests are logged with payload and stages."""
+        client = TestClient(make_app(threshold=0))
+        client.post("/compare", json=self.request)
+        client.get("/health")
+        entries = self.read_log()
+        self.assertEqual(len(entries), 1)
+        entry = entries[0]
+        self.assertEqual(entry["path"], "/compare")
+        self.assertEqual(entry["status"], 200)
+        self.assertEqual(entry["payload"], self.request)
+        self.assertIn("process_aerator", entry["stages_ms"])
+
+    def test_fast_requests_are_not_logged(self):
+        """Requests under the threshold are not logged."""
+        client = TestClient(make_app(threshold=60))
+        client.post("/compare", json=self.request)
+        self.assertEqual(self.read_log(), [])
+
+    def test_payload_is_size_capped(self):
+        """Large payloads are truncated to the size cap."""
+        body = b"x" * (monitoring.MAX_PAYLOAD_BYTES + 10)
+        record = monitoring.payload_record(
+            body[: monitoring.MAX_PAYLOAD_BYTES], len(body)
+        )
+        self.assertTrue(record["payload_truncated"])
+        self.assertEqual(len(record["payload"]), monitoring.MAX_PAYLOAD_BYTES)
+        self.assertEqual(record["payload_bytes"], len(body))
+
+    def test_lag_probe_measures_blocking(self):
+        """Blocking the loop shows up as event-loop lag."""
+
+        async def block_loop():
+            probe = asyncio.create_task(
+                monitoring.lag_probe(interval=0.01, threshold=0.05)
+            )
+            await asyncio.sleep(0.02)
+            time.sleep(0.1)
+            await asyncio.sleep(0.02)
+            probe.cancel()
+
+        asyncio.run(block_loop())
+        lag = metrics.EVENT_LOOP_LAG_SECONDS.values[()]
+        self.assertGreaterEqual(lag[1][0], 0.05)
+        self.assertEqual(self.read_log()[0]["event"], "event_loop_lag")
+
+
+if __name__ == "__main__":
+    unittest.main()
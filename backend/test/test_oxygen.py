@@ -0,0 +1,92 @@
+"""Test cases for salinity and altitude oxygen-saturation corrections."""
+
+import unittest
+from copy import deepcopy
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from backend.api.core.aerator_comparer import calculate_otr_t, compare_aerators
+from backend.api.core.models import FieldConditions
+from backend.api.core.oxygen import (
+    interpolated_saturation,
+    pressure_atm,
+    saturation_do,
+)
+
+
+class TestOxygenSaturation(unittest.TestCase):
+    """Test cases for the DO saturation tables and field correction."""
+
+    def setUp(self):
+        """Set up base test data from sample request."""
+        self.base_request: Dict[str, Any] = {
+            "farm": {
+                "tod": 5.47,
+                "farm_area_ha": 1000,
+                "shrimp_price": 5.0,
+                "culture_days": 120,
+                "shrimp_density_kg_m3": 0.3333333,
+                "pond_depth_m": 1.0,
+            },
+            "financial": {"temperature": 31.5},
+            "aerators": [
+                {"name": "A1", "sotr": 1.9, "power_hp": 3, "cost": 700},
+                {"name": "A2", "sotr": 3.5, "power_hp": 3, "cost": 900},
+            ],
+        }
+
+    def test_saturation_reference_values(self):
+        """Saturation matches published values for fresh and sea water."""
+        self.assertAlmostEqual(saturation_do(20, 0), 9.09, places=2)
+        self.assertAlmostEqual(saturation_do(30, 0), 7.56, places=2)
+        self.assertAlmostEqual(saturation_do(20, 35), 7.40, delta=0.01)
+        self.assertAlmostEqual(pressure_atm(0), 1.0)
+        self.assertLess(pressure_atm(2000), 0.8)
+
+    def test_interpolation_matches_formula(self):
+        """Table interpolation stays within 0.01 mg/L of the formula."""
+        for temperature in (0.3, 12.7, 28.25, 33.9, 44.1):
+            for salinity in (0, 7.5, 18.2, 36.6):
+                with self.subTest(t=temperature, s=salinity):
+                    self.assertAlmostEqual(
+                        interpolated_saturation(temperature, salinity),
+                        saturation_do(temperature, salinity),
+                        delta=0.01,
+                    )
+        self.assertLess(
+            interpolated_saturation(30, 0, 2500),
+            interpolated_saturation(30, 0, 0),
+        )
+
+    def test_field_conditions_reduce_otr(self):
+        """Salinity, altitude and a higher DO target reduce OTR_T."""
+        fresh = calculate_otr_t(2.2, 30, FieldConditions())
+        for conditions in (
+            FieldConditions(salinity_ppt=35),
+            FieldConditions(altitude_m=3000),
+            FieldConditions(do_target_mg_l=4),
+        ):
+            with self.subTest(conditions=conditions):
+                self.assertLess(calculate_otr_t(2.2, 30, conditions), fresh)
+
+    def test_compare_aerators_with_field_conditions(self):
+        """Conditions are opt-in and size the fleet from field OTR_T."""
+        legacy = compare_aerators(self.base_request)
+        request = deepcopy(self.base_request)
+        request["farm"]["salinity_ppt"] = 0
+        fresh = compare_aerators(request)
+        request["farm"]["salinity_ppt"] = 35
+        saline = compare_aerators(request)
+        self.assertEqual(legacy["aeratorResults"][0]["num_aerators"], 4376)
+        self.assertGreater(
+            saline["aeratorResults"][0]["num_aerators"],
+            fresh["aeratorResults"][0]["num_aerators"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""Test cases for on-demand profiling of comparisons."""
+
+import os
+import unittest
+from typing import Any, Dict
+import sys
+from unittest.mock import patch
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from fastapi.testclient import TestClient
+
+from backend.api.core import profiling
+from backend.api.core.aerator_comparer import compare_aerators
+from backend.api.main import app
+
+
+class TestProfiling(unittest.TestCase):
+    """Test cases for the admin profiling endpoints."""
+
+    def setUp(self):
+        """Set up a client with an admin token configured."""
+        self.request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": "Aerator 1",
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 2500,
+                    "durability": 5.0,
+                    "maintenance": 50,
+                },
+            ],
+        }
+        self.client = TestClient(app)
+        self.headers = {"X-Admin-Token": "secret"}
+        self.env = patch.dict(os.environ, {"AERASYNC_ADMIN_TOKEN": "secret"})
+        self.env.start()
+
+    def tearDown(self):
+        """Discard any session."""
+        profiling.stop()
+        self.env.stop()
+
+    def test_admin_token_required(self):
+        """Profiling is hidden without a token and needs the right one."""
+        with patch.dict(os.environ, {"AERASYNC_ADMIN_TOKEN": ""}):
+            response = self.client.post("/admin/profile", json={})
+            self.assertEqual(response.status_code, 404)
+        response = self.client.post(
+            "/admin/profile", json={}, headers={"X-Admin-Token": "wrong"}
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_profiles_next_comparisons(self):
+        """Only the next N comparisons are profiled."""
+        response = self.client.post(
+            "/admin/profile",
+            json={"comparisons": 2, "memory": True},
+            headers=self.headers,
+        )
+        self.assertEqual(response.json()["status"], "armed")
+        for _ in range(3):
+            self.client.post("/compare", json=self.request)
+
+        report = self.client.get("/admin/profile", headers=self.headers).json()
+        self.assertEqual(report["completed"], 2)
+        self.assertTrue(report["finished"])
+        functions = {f["function"] for f in report["top_functions"]}
+        self.assertIn("compare_aerators", functions)
+        self.assertGreater(report["memory"]["peak_bytes"], 0)
+        self.assertTrue(
+            {s["function"] for s in report["memory"]["target_sites"]}
+            <= {
+                "compare_aerators",
+                "compare_processed",
+                "process_aerator",
+                "size_aerator",
+                "aerator_costs",
+                "replace_infinity",
+            }
+        )
+
+        self.client.delete("/admin/profile", headers=self.headers)
+        response = self.client.get("/admin/profile", headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+    def test_unarmed_results_unchanged(self):
+        """Profiled comparisons return the same results."""
+        expected = compare_aerators(self.request)
+        profiling.start(1, memory=False)
+        self.assertEqual(compare_aerators(self.request), expected)
+        self.assertEqual(profiling.report()["completed"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""Test cases for ranked and paginated comparisons."""
+
+import unittest
+from typing import Any, Dict, List
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from backend.api.core.aerator_comparer import RANK_KEYS, compare_aerators
+from backend.api.core.whatif import merge_patch
+
+
+class TestRanking(unittest.TestCase):
+    """Test cases for top-N selection and cursor pagination."""
+
+    def setUp(self):
+        """Set up a comparison with many aerators, some tied."""
+        self.base_request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": f"Aerator {i}",
+                    "sotr": 1.5 + (i % 17) / 10,
+                    "power_hp": 2 + i % 3,
+                    "cost": 700 + 37 * (i % 11),
+                    "durability": 2.0 + (i % 5) / 2,
+                    "maintenance": 40 + i % 7,
+                }
+                for i in range(60)
+            ],
+        }
+        self.full = compare_aerators(self.base_request)
+
+    def expected_order(self, sort: str) -> List[Dict[str, Any]]:
+        """Full result rows ordered best first, ties in request order."""
+        rows = self.full["aeratorResults"]
+        sign = -1 if RANK_KEYS[sort] else 1
+        order = sorted(
+            range(len(rows)), key=lambda i: (sign * rows[i][sort], i)
+        )
+        return [rows[i] for i in order]
+
+    def ranked(self, **ranking: Any) -> Dict[str, Any]:
+        """Compare with a ranking."""
+        return compare_aerators(
+            merge_patch(self.base_request, {"ranking": ranking})
+        )
+
+    def test_top_n(self):
+        """The first page holds the best rows of the full comparison."""
+        for sort in RANK_KEYS:
+            with self.subTest(sort=sort):
+                result = self.ranked(sort=sort, top_n=7)
+                expected = self.expected_order(sort)[:7]
+                self.assertEqual(result["aeratorResults"], expected)
+                self.assertEqual(
+                    result["winnerLabel"], self.full["winnerLabel"]
+                )
+                self.assertEqual(result["page"]["total"], 60)
+                self.assertEqual(result["page"]["returned"], 7)
+                names = {row["name"] for row in expected}
+                prices = self.full["equilibriumPrices"]
+                self.assertEqual(
+                    result["equilibriumPrices"],
+                    {n: p for n, p in prices.items() if n in names},
+                )
+
+    def test_cursor_pages(self):
+        """Following cursors visits every row once, in order."""
+        for sort in ("total_annual_cost", "npv_savings"):
+            with self.subTest(sort=sort):
+                rows: List[Dict[str, Any]] = []
+                cursor = None
+                while True:
+                    ranking: Dict[str, Any] = {"sort": sort, "top_n": 25}
+                    if cursor is not None:
+                        ranking["cursor"] = cursor
+                    result = self.ranked(**ranking)
+                    rows.extend(result["aeratorResults"])
+                    cursor = result["page"]["next_cursor"]
+                    if cursor is None:
+                        break
+                self.assertEqual(rows, self.expected_order(sort))
+
+    def test_invalid_ranking(self):
+        """Bad ranking options are reported as errors."""
+        cursor = self.ranked(sort="sae", top_n=5)["page"]["next_cursor"]
+        for ranking in (
+            {"sort": "name"},
+            {"top_n": 0},
+            {"top_n": "5"},
+            {"cursor": "not a cursor"},
+            {"sort": "total_annual_cost", "cursor": cursor},
+        ):
+            with self.subTest(ranking=ranking):
+                self.assertIn("error", self.ranked(**ranking))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+"""Test cases for the persistent result cache."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from typing import Any, Dict, List
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from backend.api.core import aerator_comparer, result_cache
+from backend.api.core.aerator_comparer import compare_aerators
+from backend.api.core.backends import PYTHON
+from backend.api.core.result_cache import (
+    ResultCache,
+    cache_key,
+    cached_compare,
+    code_version,
+)
+from backend.api.core.whatif import merge_patch
+
+
+class TestResultCache(unittest.TestCase):
+    """Test cases for the memory and disk cache tiers."""
+
+    def setUp(self):
+        """Set up a scratch cache file and base test data."""
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "cache.db")
+        self.base_request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": "Aerator 1",
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 2500,
+                    "durability": 5.0,
+                    "maintenance": 50,
+                },
+            ],
+        }
+        self.result = compare_aerators(self.base_request)
+
+    def tearDown(self):
+        """Remove the cache file."""
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_canonical_key(self):
+        """Key order does not change the key, values do."""
+        reordered = dict(reversed(list(self.base_request.items())))
+        self.assertEqual(
+            cache_key(reordered), cache_key(self.base_request)
+        )
+        changed = merge_patch(self.base_request, {"farm": {"tod": 5.48}})
+        self.assertNotEqual(cache_key(changed), cache_key(self.base_request))
+        self.assertEqual(len(code_version()), 16)
+
+    def test_key_includes_backend(self):
+        """Results of one compute backend are not served for another."""
+        key = cache_key(self.base_request)
+        aerator_comparer.set_backend(PYTHON._replace(name="other"))
+        try:
+            self.assertNotEqual(cache_key(self.base_request), key)
+        finally:
+            aerator_comparer.set_backend(None)
+        self.assertEqual(cache_key(self.base_request), key)
+
+    def test_survives_restart(self):
+        """A new process reads results written by the previous one."""
+        key = cache_key(self.base_request)
+        cache = ResultCache(self.path)
+        self.assertIsNone(cache.get(key))
+        cache.put(key, self.result)
+        cache.close()
+
+        restarted = ResultCache(self.path)
+        self.assertEqual(restarted.get(key), self.result)
+        self.assertEqual(restarted.stats()["disk_entries"], 1)
+        restarted.close()
+
+    def test_version_change_drops_entries(self):
+        """Entries from other calculation code are dropped on open."""
+        key = cache_key(self.base_request)
+        cache = ResultCache(self.path, version="old")
+        cache.put(key, self.result)
+        cache.close()
+
+        current = ResultCache(self.path, version="new")
+        self.assertIsNone(current.get(key))
+        self.assertEqual(current.stats()["disk_entries"], 0)
+        self.assertEqual(current.stats()["disk_bytes"], 0)
+        current.close()
+
+    def test_eviction(self):
+        """The disk tier stays under its size limit, oldest out first."""
+        size = len(str(self.result))
+        cache = ResultCache(self.path, max_bytes=size * 12, memory_entries=1)
+        keys = [f"key-{i}" for i in range(30)]
+        for key in keys:
+            cache.put(key, self.result)
+        stats = cache.stats()
+        self.assertLessEqual(stats["disk_bytes"], stats["max_bytes"])
+        self.assertLess(stats["disk_entries"], len(keys))
+        self.assertIsNone(cache.get(keys[0]))
+        self.assertEqual(cache.get(keys[-1]), self.result)
+        cache.close()
+
+    def test_cached_compare(self):
+        """Repeated comparisons are served from the cache."""
+        calls: List[Dict[str, Any]] = []
+
+        def compare(data: Dict[str, Any]) -> Dict[str, Any]:
+            calls.append(data)
+            return compare_aerators(data)
+
+        original = result_cache.cache
+        result_cache.cache = ResultCache(self.path)
+        try:
+            first = cached_compare(self.base_request, compare)
+            second = cached_compare(self.base_request, compare)
+            self.assertEqual(first, self.result)
+            self.assertEqual(second, self.result)
+            self.assertEqual(len(calls), 1)
+
+            invalid = merge_patch(self.base_request, {"farm": {"tod": -1}})
+            cached_compare(invalid, compare)
+            cached_compare(invalid, compare)
+            self.assertEqual(len(calls), 3)
+        finally:
+            result_cache.cache.close()
+            result_cache.cache = original
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+"""Test cases for the streaming comparison parser."""
+
+import json
+import unittest
+from typing import Any, Dict, List
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from fastapi.testclient import TestClient
+
+from backend.api.core.aerator_comparer import compare_aerators
+from backend.api.core.streaming import ComparisonStream, compare_stream_bytes
+from backend.api.core.whatif import merge_patch
+from backend.api.main import app
+
+
+def chunked(body: bytes, size: int) -> List[bytes]:
+    """Split a body into chunks of ``size`` bytes."""
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+class TestStreaming(unittest.TestCase):
+    """Test cases for incremental parsing of comparison requests."""
+
+    def setUp(self):
+        """Set up base test data."""
+        self.base_request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": 'Aerator "1" [a]',
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2 \\ {b},",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 2500,
+                    "durability": 5.0,
+                    "maintenance": 50,
+                },
+                {
+                    "name": "Aerator 3",
+                    "sotr": 2.4,
+                    "power_hp": 2,
+                    "cost": 1200,
+                    "durability": 3.0,
+                    "maintenance": 40,
+                },
+            ],
+        }
+
+    def test_matches_compare_aerators(self):
+        """Every chunking gives the compare_aerators result."""
+        expected = compare_aerators(self.base_request)
+        body = json.dumps(self.base_request).encode()
+        for size in (1, 2, 3, 7, 64, len(body)):
+            with self.subTest(size=size):
+                result = compare_stream_bytes(chunked(body, size))
+                self.assertEqual(result, expected)
+
+    def test_key_order(self):
+        """Aerators sent before the farm inputs are processed at the end."""
+        request = {
+            "aerators": self.base_request["aerators"],
+            "financial": self.base_request["financial"],
+            "farm": self.base_request["farm"],
+        }
+        body = json.dumps(request, indent=2).encode()
+        self.assertEqual(
+            compare_stream_bytes(chunked(body, 5)),
+            compare_aerators(self.base_request),
+        )
+
+    def test_processes_aerators_on_arrival(self):
+        """Aerators are costed before the body is complete."""
+        body = json.dumps(self.base_request).encode()
+        stream = ComparisonStream()
+        stream.feed(body[: body.index(b"Aerator 3")])
+        self.assertEqual(len(stream._results), 2)
+        stream.feed(body[body.index(b"Aerator 3"):])
+        self.assertEqual(
+            stream.finish(), compare_aerators(self.base_request)
+        )
+
+    def test_errors(self):
+        """Validation errors match compare_aerators."""
+        cases = [
+            {"farm": {"tod": -1}},
+            {"financial": {"horizon": "x"}},
+            {"aerators": [{"name": "A", "sotr": 1}, {"name": "B"}]},
+            {"aerators": [{"sotr": "x", "power_hp": 1, "cost": 1}] * 2},
+            {"aerators": []},
+        ]
+        for patch in cases:
+            request = merge_patch(self.base_request, patch)
+            body = json.dumps(request).encode()
+            with self.subTest(patch=patch):
+                self.assertEqual(
+                    compare_stream_bytes(chunked(body, 4)),
+                    compare_aerators(request),
+                )
+        for body in (b'{"aerators": [{},]}', b'{"aerators": [{}', b"[]"):
+            with self.subTest(body=body):
+                with self.assertRaises(ValueError):
+                    compare_stream_bytes([body])
+
+    def test_element_limit(self):
+        """An oversized aerator is rejected while it is received."""
+        stream = ComparisonStream(max_element_bytes=100)
+        request = merge_patch(
+            self.base_request,
+            {"aerators": [{"name": "x" * 200}] * 2},
+        )
+        with self.assertRaises(ValueError):
+            stream.feed(json.dumps(request).encode())
+
+    def test_stream_endpoint(self):
+        """The endpoint returns the /compare result."""
+        client = TestClient(app)
+        body = json.dumps(self.base_request).encode()
+        response = client.post(
+            "/compare/stream", content=iter(chunked(body, 16))
+        )
+        self.assertEqual(response.status_code, 200)
+        expected = client.post("/compare", json=self.base_request).json()
+        self.assertEqual(response.json(), expected)
+        response = client.post("/compare/stream", content=b"{")
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
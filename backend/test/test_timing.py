@@ -0,0 +1,106 @@
+"""Test cases for per-stage timing and the Server-Timing header."""
+
+import unittest
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from fastapi.testclient import TestClient
+
+from backend.api.core import timing
+from backend.api.core.aerator_comparer import compare_aerators
+from backend.api.main import app
+
+
+class TestStageTiming(unittest.TestCase):
+    """Test cases for stage timing instrumentation."""
+
+    def setUp(self):
+        """Enable timing with empty histograms."""
+        self.request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": "Aerator 1",
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 2500,
+                    "durability": 5.0,
+                    "maintenance": 50,
+                },
+            ],
+        }
+        self.was_enabled = timing.ENABLED
+        timing.set_enabled(True)
+        timing.reset_histograms()
+
+    def tearDown(self):
+        """Restore the timing switch."""
+        timing.set_enabled(self.was_enabled)
+        timing.reset_histograms()
+
+    def test_stages_recorded_per_request(self):
+        """Every comparison stage is timed into the request collector."""
+        token = timing.start_request()
+        compare_aerators(self.request)
+        timings = timing.finish_request(token)
+        self.assertEqual(
+            set(timings.durations),
+            {
+                "validation",
+                "process_aerator",
+                "financial",
+                "npv",
+                "irr",
+                "replace_infinity",
+            },
+        )
+        self.assertTrue(all(d >= 0 for d in timings.durations.values()))
+        self.assertEqual(timing.histograms()["npv"]["count"], 1)
+
+    def test_disabled_timing_records_nothing(self):
+        """Disabled timing leaves the collector and results untouched."""
+        enabled = compare_aerators(self.request)
+        timing.set_enabled(False)
+        token = timing.start_request()
+        disabled = compare_aerators(self.request)
+        self.assertEqual(timing.finish_request(token).durations, {})
+        self.assertEqual(enabled, disabled)
+        self.assertIs(timing.stage("npv"), timing.stage("irr"))
+
+    def test_server_timing_header(self):
+        """The API reports stage durations in a Server-Timing header."""
+        client = TestClient(app)
+        response = client.post("/compare", json=self.request)
+        self.assertEqual(response.status_code, 200)
+        header = response.headers["server-timing"]
+        for name in ("validation", "irr", "serialization", "total"):
+            self.assertIn(f"{name};dur=", header)
+        self.assertEqual(timing.histograms()["total"]["count"], 1)
+
+        timing.set_enabled(False)
+        response = client.post("/compare", json=self.request)
+        self.assertNotIn("server-timing", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""Test cases for incremental what-if sessions."""
+
+import unittest
+from copy import deepcopy
+from typing import Any, Dict
+import sys
+
+sys.path.append("../..")
+sys.path.append("..")
+sys.path.append(".")
+
+from fastapi.testclient import TestClient
+
+from backend.api.core.aerator_comparer import compare_aerators
+from backend.api.core.whatif import WhatIfSession, merge_patch
+from backend.api.main import app
+
+
+class TestWhatIf(unittest.TestCase):
+    """Test cases for what-if sessions and partial patches."""
+
+    def setUp(self):
+        """Set up base test data from sample request."""
+        self.base_request: Dict[str, Any] = {
+            "farm": {"tod": 5.47, "farm_area_ha": 1000},
+            "financial": {
+                "energy_cost": 0.05,
+                "hours_per_night": 8,
+                "discount_rate": 0.1,
+                "inflation_rate": 0.025,
+                "horizon": 10,
+                "temperature": 31.5,
+            },
+            "aerators": [
+                {
+                    "name": "Aerator 1",
+                    "sotr": 1.9,
+                    "power_hp": 3,
+                    "cost": 700,
+                    "durability": 2.0,
+                    "maintenance": 65,
+                },
+                {
+                    "name": "Aerator 2",
+                    "sotr": 3.5,
+                    "power_hp": 3,
+                    "cost": 2500,
+                    "durability": 5.0,
+                    "maintenance": 50,
+                },
+                {
+                    "name": "Aerator 3",
+                    "sotr": 2.4,
+                    "power_hp": 2,
+                    "cost": 1200,
+                    "durability": 3.0,
+                    "maintenance": 40,
+                },
+            ],
+        }
+
+    def test_merge_patch(self):
+        """Objects merge, None deletes and aerators patch by name."""
+        merged = merge_patch(
+            self.base_request,
+            {
+                "financial": {"discount_rate": 0.12, "temperature": None},
+                "aerators": {"Aerator 2": {"cost": 2000}, "Aerator 3": None},
+            },
+        )
+        self.assertEqual(merged["financial"]["discount_rate"], 0.12)
+        self.assertNotIn("temperature", merged["financial"])
+        self.assertEqual(merged["aerators"][1]["cost"], 2000)
+        self.assertEqual(len(merged["aerators"]), 2)
+        self.assertEqual(self.base_request["aerators"][1]["cost"], 2500)
+
+    def test_only_invalidated_stages_recompute(self):
+        """Each patch reruns only the stages depending on what changed."""
+        session = WhatIfSession()
+        _, recomputed = session.apply(self.base_request)
+        self.assertEqual(
+            recomputed,
+            {"revenue": 1, "sizing": 3, "costs": 3, "financial": 1},
+        )
+        cases = [
+            (
+                {"financial": {"discount_rate": 0.08}},
+                {"revenue": 0, "sizing": 0, "costs": 0, "financial": 1},
+            ),
+            (
+                {"financial": {"energy_cost": 0.09}},
+                {"revenue": 0, "sizing": 0, "costs": 3, "financial": 1},
+            ),
+            (
+                {"aerators": {"Aerator 2": {"cost": 2000}}},
+                {"revenue": 0, "sizing": 0, "costs": 1, "financial": 1},
+            ),
+            (
+                {"financial": {"temperature": 28}},
+                {"revenue": 0, "sizing": 3, "costs": 3, "financial": 1},
+            ),
+            (
+                {"farm": {"shrimp_price": 6}},
+                {"revenue": 1, "sizing": 0, "costs": 3, "financial": 1},
+            ),
+            (
+                {"financial": {"discount_rate": 0.08}},
+                {"revenue": 0, "sizing": 0, "costs": 0, "financial": 0},
+            ),
+        ]
+        request = deepcopy(self.base_request)
+        for patch, expected in cases:
+            with self.subTest(patch=patch):
+                result, recomputed = session.apply(patch)
+                self.assertEqual(recomputed, expected)
+                request = merge_patch(request, patch)
+                self.assertEqual(result, compare_aerators(request))
+
+    def test_invalid_patch_keeps_scenario(self):
+        """An invalid patch returns the error and changes nothing."""
+        session = WhatIfSession()
+        expected, _ = session.apply(self.base_request)
+        result, _ = session.apply({"farm": {"tod": -1}})
+        self.assertEqual(result["error"], "TOD must be positive")
+        self.assertEqual(session.result, expected)
+        self.assertEqual(session.scenario["farm"]["tod"], 5.47)
+
+    def test_session_endpoints(self):
+        """Sessions are created, patched, read and deleted over HTTP."""
+        client = TestClient(app)
+        created = client.post("/whatif", json=self.base_request).json()
+        session_id = created["session_id"]
+        patched = client.patch(
+            f"/whatif/{session_id}",
+            json={"financial": {"inflation_rate": 0.03}},
+        ).json()
+        self.assertEqual(patched["recomputed"]["sizing"], 0)
+        state = client.get(f"/whatif/{session_id}").json()
+        self.assertEqual(
+            state["scenario"]["financial"]["inflation_rate"], 0.03
+        )
+        self.assertEqual(state["result"], patched["result"])
+        response = client.delete(f"/whatif/{session_id}")
+        self.assertEqual(response.status_code, 200)
+        response = client.patch(f"/whatif/{session_id}", json={})
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()